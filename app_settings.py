@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+設定ファイル - GUIとコマンドラインで共有する保存済み設定・FTPパスワード
+"""
+
+import base64
+import configparser
+import json
+import os
+import sys
+from pathlib import Path
+
+SETTINGS_FILE = "integrated_tool_settings.json"
+PASSWORD_FILE = Path(__file__).parent / ".config.ini"
+# スケジューラー等から実行する場合のパスワード指定
+PASSWORD_ENV = "INTEGRATED_EC_FTP_PASSWORD"
+
+# ログ・キャッシュ・ブラウザプロファイルの保存先（環境変数で変更可）
+DATA_DIR_ENV = "INTEGRATED_EC_DATA_DIR"
+APP_DIR_NAME = "integrated_ec_tool"
+
+DEFAULT_FTP_SERVER = "upload.rakuten.ne.jp"
+DEFAULT_FTP_USER = "taiho-kagu"
+
+
+def user_data_dir():
+    """ユーザーごとのデータフォルダ（ソースフォルダには書き込まない）"""
+    if os.environ.get(DATA_DIR_ENV):
+        return Path(os.environ[DATA_DIR_ENV])
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(base) / APP_DIR_NAME
+
+
+DATA_DIR = user_data_dir()
+
+
+def read_settings(path=SETTINGS_FILE):
+    """設定ファイルを辞書で取得（無い・壊れている場合は空）"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_settings(settings, path=SETTINGS_FILE):
+    """設定ファイルを保存"""
+    with open(path, "w") as f:
+        json.dump(settings, f)
+
+
+def ftp_settings(settings=None):
+    """保存済みのFTP接続先 (サーバー, ユーザー)"""
+    settings = read_settings() if settings is None else settings
+    return (settings.get("ftp_server") or DEFAULT_FTP_SERVER,
+            settings.get("ftp_user") or DEFAULT_FTP_USER)
+
+
+def load_ftp_password():
+    """保存されたFTPパスワード（環境変数 → .config.ini の順、無ければ空文字）"""
+    if os.environ.get(PASSWORD_ENV):
+        return os.environ[PASSWORD_ENV]
+    try:
+        if PASSWORD_FILE.exists():
+            config = configparser.ConfigParser()
+            config.read(PASSWORD_FILE)
+            if 'FTP' in config and 'password' in config['FTP']:
+                return base64.b64decode(config['FTP']['password']).decode()
+    except Exception:
+        pass
+    return ""
+
+
+def save_ftp_password(password):
+    """FTPパスワードを保存（簡易暗号化）"""
+    encoded = base64.b64encode(password.encode()).decode()
+    config = configparser.ConfigParser()
+    config['FTP'] = {'password': encoded}
+    with open(PASSWORD_FILE, 'w') as f:
+        config.write(f)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+楽天一括処理結果の監視 - アップロードしたCSVの取り込みとエラーレポートを間隔を調整しながら確認し、エラーを商品コードに対応付け
+"""
+
+import csv
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+
+from csv_source import CSV_ENCODINGS, read_csv_rows
+from log_sink import LOGGER_NAME, log_operation
+from page_verify import CSV_SOURCES
+from sftp_transfer import RAKUTEN_CSV_DIR
+
+# 楽天がエラーレポートを置くフォルダ
+RAKUTEN_RESULT_DIR = "/ritem/logs"
+
+# 確認間隔（秒）。変化が無ければ広げ、変化があれば最初に戻す
+POLL_INITIAL_SEC = 10
+POLL_MAX_SEC = 120
+POLL_BACKOFF = 1.5
+POLL_TIMEOUT_SEC = 60 * 60
+# 取り込み後、エラーレポートが出なければ成功とみなすまでの時間
+RESULT_GRACE_SEC = 5 * 60
+
+# エラーレポートの列（候補のうち最初に見つかった列を使用）
+REPORT_COLUMNS = {
+    "code": CSV_SOURCES["rakuten"]["code"],
+    "line": ["行番号", "行", "line"],
+    "message": ["エラー内容", "エラーメッセージ", "エラー", "メッセージ", "message"],
+}
+
+# 処理状況
+PENDING = "pending"  # /ritem/batch に残っている
+PICKED_UP = "picked_up"  # 取り込まれ、エラーレポートを待っている
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def _column(header, candidates):
+    for name in candidates:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def decode_report(data):
+    """エラーレポートの文字コードを判定して文字列にする"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("cp932", errors="replace")
+
+
+def parse_error_report(data):
+    """エラーレポート（CSV）を [{"line": 行番号 or None, "code": 商品コード or "", "message": 内容}] にする"""
+    rows = [row for row in csv.reader(io.StringIO(decode_report(data))) if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip() for cell in rows[0]]
+    columns = {field: _column(header, candidates) for field, candidates in REPORT_COLUMNS.items()}
+    if all(col is None for col in columns.values()):
+        # 見出しが無い形式は行全体をエラー内容とする
+        return [{"line": None, "code": "", "message": " ".join(cell.strip() for cell in row)} for row in rows]
+
+    errors = []
+    for row in rows[1:]:
+        def cell(field):
+            col = columns[field]
+            return row[col].strip() if col is not None and col < len(row) else ""
+        line = cell("line")
+        message = cell("message") or " ".join(
+            value.strip() for index, value in enumerate(row) if index not in columns.values())
+        errors.append({"line": int(line) if line.isdigit() else None, "code": cell("code"), "message": message})
+    return errors
+
+
+def list_report_names(sftp, result_dir=RAKUTEN_RESULT_DIR):
+    """エラーレポートのファイル名（アップロード前に取得し、監視時の対象外とする）"""
+    try:
+        return set(sftp.listdir(result_dir))
+    except IOError:
+        return set()
+
+
+def map_errors_to_codes(errors, uploaded_csv):
+    """行番号しか無いエラーを、アップロードしたCSVの行から商品コードに対応付け（見出しが1行目）"""
+    if all(error["code"] for error in errors) or not Path(uploaded_csv).exists():
+        return errors
+    header, rows = read_csv_rows(uploaded_csv)
+    code_col = _column(header, REPORT_COLUMNS["code"])
+    if code_col is None:
+        return errors
+    for error in errors:
+        index = (error["line"] or 0) - 2
+        if not error["code"] and 0 <= index < len(rows) and code_col < len(rows[index]):
+            error["code"] = rows[index][code_col].strip()
+    return errors
+
+
+class BatchResultPoller:
+    """アップロードしたCSVの取り込み・エラーレポートを監視（1つのSFTPセッションを使い回し、切れたら接続し直す）"""
+
+    def __init__(self, connect, uploads, log=_default_log, result_dir=RAKUTEN_RESULT_DIR, download_dir=None,
+                 initial=POLL_INITIAL_SEC, maximum=POLL_MAX_SEC, timeout=POLL_TIMEOUT_SEC, grace=RESULT_GRACE_SEC):
+        """connect: (sftp, transport) を返す関数、
+        uploads: [(ローカルのCSVパス, 楽天側のファイル名[, アップロード前からあったレポート名の集合])]
+        （レポート名の集合が無いファイルは監視開始時の一覧を対象外とする）"""
+        self.connect = connect
+        self.log = log
+        self.result_dir = result_dir
+        self.download_dir = Path(download_dir) if download_dir else None
+        self.initial = initial
+        self.maximum = maximum
+        self.timeout = timeout
+        self.grace = grace
+        self.session = None
+        self.results = {}
+        for upload in uploads:
+            local_path, remote_name = upload[:2]
+            baseline = upload[2] if len(upload) > 2 else None
+            self.results[remote_name] = {"local_path": Path(local_path), "state": PENDING, "picked_up_at": None,
+                                         "baseline": set(baseline) if baseline is not None else None,
+                                         "reports": [], "errors": []}
+        self.seen_reports = set()
+
+    def _sftp(self):
+        if self.session is None:
+            self.session = self.connect()
+        return self.session[0]
+
+    def close(self):
+        if self.session is not None:
+            sftp, transport = self.session
+            self.session = None
+            try:
+                sftp.close()
+                transport.close()
+            except Exception:
+                pass
+
+    def _list_reports(self, sftp):
+        try:
+            return sftp.listdir_attr(self.result_dir)
+        except IOError:
+            return []
+
+    def _download(self, sftp, name):
+        with sftp.open(f"{self.result_dir}/{name}", "rb") as remote:
+            data = remote.read()
+        if self.download_dir is not None:
+            self.download_dir.mkdir(parents=True, exist_ok=True)
+            (self.download_dir / name).write_bytes(data)
+        return data
+
+    def poll_once(self):
+        """1回確認する。戻り値は状況が変化したか"""
+        sftp = self._sftp()
+        changed = False
+        now = time.monotonic()
+
+        # /ritem/batch から消えたファイルは取り込まれた
+        remaining = set(sftp.listdir(RAKUTEN_CSV_DIR))
+        for remote_name, result in self.results.items():
+            if result["state"] == PENDING and remote_name not in remaining:
+                result["state"] = PICKED_UP
+                result["picked_up_at"] = now
+                self.log(f"楽天が {remote_name} を取り込みました")
+                changed = True
+
+        # 新しいエラーレポートを取得してファイルに対応付け
+        for entry in self._list_reports(sftp):
+            if entry.filename in self.seen_reports:
+                continue
+            self.seen_reports.add(entry.filename)
+            for remote_name, result in self.results.items():
+                if (Path(remote_name).stem not in entry.filename or result["state"] not in (PENDING, PICKED_UP)
+                        or entry.filename in (result["baseline"] or ())):
+                    continue
+                errors = map_errors_to_codes(parse_error_report(self._download(sftp, entry.filename)),
+                                             result["local_path"])
+                result["reports"].append(entry.filename)
+                result["errors"].extend(errors)
+                result["state"] = FAILED if errors else SUCCEEDED
+                self.log(f"{remote_name} の処理結果 {entry.filename}: エラー {len(errors)}件",
+                         "WARNING" if errors else "INFO")
+                changed = True
+                break
+
+        # 取り込み後しばらくエラーレポートが出なければ成功
+        for remote_name, result in self.results.items():
+            if result["state"] == PICKED_UP and now - result["picked_up_at"] >= self.grace:
+                result["state"] = SUCCEEDED
+                self.log(f"{remote_name} はエラーなしで処理されました")
+                changed = True
+        return changed
+
+    def run(self, stop_event=None):
+        """すべてのファイルの結果が出るまで（またはタイムアウトまで）確認。戻り値はファイル名ごとの結果"""
+        stop_event = stop_event or threading.Event()
+        started_at = time.monotonic()
+        interval = self.initial
+        try:
+            # アップロード前の一覧が無いファイルは、監視開始前からあるレポートを対象外とする
+            if any(result["baseline"] is None for result in self.results.values()):
+                existing = {entry.filename for entry in self._list_reports(self._sftp())}
+                for result in self.results.values():
+                    if result["baseline"] is None:
+                        result["baseline"] = existing
+            while any(result["state"] in (PENDING, PICKED_UP) for result in self.results.values()):
+                if time.monotonic() - started_at > self.timeout:
+                    for result in self.results.values():
+                        if result["state"] in (PENDING, PICKED_UP):
+                            result["state"] = TIMED_OUT
+                    self.log("楽天の処理結果を確認できないまま監視を終了しました", "WARNING")
+                    break
+                if stop_event.wait(interval):
+                    break
+                try:
+                    changed = self.poll_once()
+                except Exception as e:
+                    # 接続が切れた場合は次回に接続し直す
+                    self.log(f"処理結果の確認に失敗しました: {str(e)}", "WARNING")
+                    self.close()
+                    changed = False
+                interval = self.initial if changed else min(interval * POLL_BACKOFF, self.maximum)
+        finally:
+            self.close()
+            log_operation("rakuten_batch_poll", (time.monotonic() - started_at) * 1000,
+                          files=len(self.results),
+                          errors=sum(len(result["errors"]) for result in self.results.values()))
+        return self.results
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+起動・UI構築ベンチマーク - オフスクリーン表示で起動フェーズ・メモリ・タブ切り替えを計測し、予算超過で失敗
+
+使い方:
+    python bench_startup.py [--budget 名前=ms ...] [--json 結果.json] [--no-browser-tabs]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+
+# 起動フェーズの上限（ms、memory_mb のみMB）
+DEFAULT_BUDGETS = {
+    "import": 1500,
+    "construct": 800,
+    "settings": 200,
+    "first_paint": 500,
+    "tab_switch_warm_max": 100,
+    "tab_switch_cold_max": 5000,
+    "memory_mb": 400,
+}
+# 起動全体は各フェーズを含むため、その合計にQApplication作成分を加えたもの
+QAPPLICATION_ALLOWANCE_MS = 500
+DEFAULT_BUDGETS["startup_total"] = sum(
+    DEFAULT_BUDGETS[name] for name in ("import", "construct", "settings", "first_paint")) + QAPPLICATION_ALLOWANCE_MS
+
+# 構築フェーズとして個別に計測するメソッド
+TIMED_METHODS = (
+    "setup_logging", "init_ui", "create_toolbar", "setup_workflow_tab", "setup_master_tab",
+    "setup_product_tab", "setup_upload_tab", "setup_yahoo_upload_tab", "setup_check_tab",
+    "setup_dashboard_tab", "load_settings",
+)
+BROWSER_TABS = ("アップロード", "ページ確認")
+
+
+def stub_windows_modules():
+    """Windows専用モジュールの代替（ウィンドウ埋め込みは計測対象外）"""
+    for name in ("win32gui", "win32con"):
+        if name not in sys.modules:
+            try:
+                __import__(name)
+            except ImportError:
+                sys.modules[name] = types.ModuleType(name)
+
+
+def memory_mb():
+    """プロセスの使用メモリ（psutilが無い場合は最大常駐サイズ）"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def time_methods(cls, timings):
+    """クラスのメソッドを所要時間を記録するラッパーに置き換え"""
+    for name in TIMED_METHODS:
+        original = getattr(cls, name, None)
+        if original is None:
+            continue
+
+        def timed(self, *args, _original=original, _name=name, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return _original(self, *args, **kwargs)
+            finally:
+                timings[_name] = timings.get(_name, 0) + (time.perf_counter() - started_at) * 1000
+
+        setattr(cls, name, timed)
+
+
+def switch_tab(app, tab_widget, index):
+    """タブを切り替えて描画が終わるまでの時間(ms)"""
+    started_at = time.perf_counter()
+    tab_widget.setCurrentIndex(index)
+    app.processEvents()
+    return (time.perf_counter() - started_at) * 1000
+
+
+def run_benchmark(browser_tabs=True):
+    """起動からタブ切り替えまでを計測して結果の辞書を返す"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    stub_windows_modules()
+    # 設定ファイルは作業フォルダから読まれるため、空のフォルダで実行して保存済み設定の影響を除く
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    os.chdir(work_dir)
+    # ログ・キャッシュ・ブラウザプロファイルも一時フォルダへ（app_settings.DATA_DIR_ENV、読み込み前に設定）
+    os.environ["INTEGRATED_EC_DATA_DIR"] = os.path.join(work_dir, "data")
+    process_started = time.perf_counter()
+    results = {"phases": {}, "methods": {}, "tabs": {}}
+
+    started_at = time.perf_counter()
+    import integrated_ec_tool
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    results["phases"]["import"] = (time.perf_counter() - started_at) * 1000
+
+    tool_class = integrated_ec_tool.IntegratedECTool
+    # マスタツールの起動・パスワード読み込みはベンチマークでは行わない
+    tool_class.auto_launch_master = lambda self: None
+    tool_class.load_ftp_password = lambda self: None
+    time_methods(tool_class, results["methods"])
+
+    started_at = time.perf_counter()
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results["phases"]["qapplication"] = (time.perf_counter() - started_at) * 1000
+
+    started_at = time.perf_counter()
+    window = tool_class()
+    results["phases"]["construct"] = (time.perf_counter() - started_at) * 1000
+
+    started_at = time.perf_counter()
+    window.show()
+    app.processEvents()
+    results["phases"]["first_paint"] = (time.perf_counter() - started_at) * 1000
+
+    started_at = time.perf_counter()
+    window.load_settings()
+    results["phases"]["settings"] = (time.perf_counter() - started_at) * 1000
+    results["phases"]["startup_total"] = (time.perf_counter() - process_started) * 1000
+    results["memory_mb"] = memory_mb()
+
+    # タブ切り替え（1回目は構築を含む、2回目は構築済み）
+    tabs = window.tabs
+    initial = tabs.currentIndex()
+    for round_name in ("cold", "warm"):
+        for index in range(tabs.count()):
+            title = tabs.tabText(index)
+            if not browser_tabs and title in BROWSER_TABS:
+                continue
+            results["tabs"].setdefault(title, {})[round_name] = switch_tab(app, tabs, index)
+            if title == "アップロード" and browser_tabs:
+                for sub_index in range(1, window.upload_tabs.count()):
+                    sub_title = f"{title}/{window.upload_tabs.tabText(sub_index)}"
+                    results["tabs"].setdefault(sub_title, {})[round_name] = switch_tab(
+                        app, window.upload_tabs, sub_index)
+                window.upload_tabs.setCurrentIndex(0)
+        switch_tab(app, tabs, initial)
+    results["memory_after_tabs_mb"] = memory_mb()
+
+    window.close()
+    app.processEvents()
+    return results
+
+
+def check_budgets(results, budgets):
+    """予算を超えた項目のリスト [(名前, 実測, 予算)]"""
+    measured = dict(results["phases"])
+    if results["tabs"]:
+        measured["tab_switch_cold_max"] = max(t.get("cold", 0) for t in results["tabs"].values())
+        measured["tab_switch_warm_max"] = max(t.get("warm", 0) for t in results["tabs"].values())
+    if results.get("memory_mb") is not None:
+        measured["memory_mb"] = results["memory_mb"]
+    return [(name, measured[name], limit)
+            for name, limit in budgets.items()
+            if name in measured and measured[name] > limit]
+
+
+def print_report(results, exceeded):
+    print("== 起動フェーズ ==")
+    for name, value in results["phases"].items():
+        print(f"  {name:<24}{value:9.1f} ms")
+    print("== 構築メソッド ==")
+    for name, value in sorted(results["methods"].items(), key=lambda item: -item[1]):
+        print(f"  {name:<24}{value:9.1f} ms")
+    print("== タブ切り替え (初回 / 2回目) ==")
+    for title, rounds in results["tabs"].items():
+        print(f"  {title:<24}{rounds.get('cold', 0):9.1f} ms /{rounds.get('warm', 0):7.1f} ms")
+    if results.get("memory_mb") is not None:
+        print(f"== メモリ == 起動後 {results['memory_mb']:.0f} MB / 全タブ表示後 {results['memory_after_tabs_mb']:.0f} MB")
+    for name, value, limit in exceeded:
+        print(f"予算超過: {name} {value:.1f} > {limit}")
+    print("結果: " + ("NG" if exceeded else "OK"))
+
+
+def parse_budget(text):
+    name, _, value = text.partition("=")
+    if name not in DEFAULT_BUDGETS or not value:
+        raise argparse.ArgumentTypeError(f"予算は 名前=値 で指定してください（名前: {', '.join(DEFAULT_BUDGETS)}）")
+    return name, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="起動・UI構築ベンチマーク（オフスクリーン）")
+    parser.add_argument("--budget", action="append", type=parse_budget, default=[], help="予算の上書き（例: construct=500）")
+    parser.add_argument("--json", help="計測結果をJSONで保存するファイル")
+    parser.add_argument("--no-browser-tabs", action="store_true", help="ブラウザを含むタブの切り替えを計測しない")
+    args = parser.parse_args(argv)
+
+    budgets = dict(DEFAULT_BUDGETS)
+    budgets.update(args.budget)
+    output = os.path.abspath(args.json) if args.json else None
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    results = run_benchmark(browser_tabs=not args.no_browser_tabs)
+    exceeded = check_budgets(results, budgets)
+    results["budgets"] = budgets
+    results["exceeded"] = [name for name, _, _ in exceeded]
+
+    print_report(results, exceeded)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
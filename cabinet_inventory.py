@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+R-Cabinet在庫キャッシュ - リモートの画像一覧をローカルに保存し、差分更新・照合に使う
+"""
+
+import json
+import re
+import stat
+import threading
+import time
+from pathlib import Path
+
+from app_settings import DATA_DIR
+from sftp_transfer import RAKUTEN_IMAGE_DIR
+
+DEFAULT_CACHE_DIR = DATA_DIR / "cache"
+# ローカルの更新時刻がリモート（アップロード時刻）よりこれ以上新しければ編集後とみなす（サーバーとの時計のずれを吸収）
+MTIME_TOLERANCE_SEC = 120
+# 同じ名前で上書きしてもフォルダの更新時刻は変わらないため、この時間より古い一覧は更新時刻が同じでも取り直す
+LISTING_MAX_AGE_SEC = 30 * 60
+
+
+def _join(directory, name):
+    return directory.rstrip("/") + "/" + name
+
+
+def _under(directory, root):
+    """directoryがroot自身かその配下か（/cabinet/images2 は /cabinet/images の配下ではない）"""
+    root = root.rstrip("/")
+    return directory == root or directory.startswith(root + "/")
+
+
+def _same_file(entry, path):
+    """リモートのファイル情報 [サイズ, 更新時刻] がローカルのファイルと同じ内容とみなせるか"""
+    local = Path(path).stat()
+    return entry[0] == local.st_size and local.st_mtime <= entry[1] + MTIME_TOLERANCE_SEC
+
+
+class CabinetInventory:
+    """リモートフォルダごとの {ファイル名: (サイズ, 更新時刻)}。照合はメモリ上の辞書引きのみ"""
+
+    def __init__(self, host, user, cache_dir=DEFAULT_CACHE_DIR):
+        safe_name = re.sub(r"[^\w.-]", "_", f"{user}@{host}")
+        self.path = Path(cache_dir) / f"cabinet_{safe_name}.json"
+        self.lock = threading.Lock()
+        self.dirs = {}  # リモートフォルダ -> {"mtime": フォルダの更新時刻, "listed_at": 取得時刻, "files": {名前: [サイズ, 更新時刻]}}
+        self.load()
+
+    def load(self):
+        """保存済みのキャッシュを読み込み（無い・壊れている場合は空）"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.dirs = json.load(f).get("dirs", {})
+        except Exception:
+            self.dirs = {}
+
+    def save(self):
+        """キャッシュを保存"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = json.dumps({"saved_at": time.time(), "dirs": self.dirs}, ensure_ascii=False)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(data, encoding="utf-8")
+        temp_path.replace(self.path)
+
+    @property
+    def available(self):
+        return bool(self.dirs)
+
+    def age_sec(self, directory=RAKUTEN_IMAGE_DIR):
+        """フォルダの一覧を取得してからの経過秒数（未取得はNone）"""
+        cached = self.dirs.get(directory)
+        return time.time() - cached["listed_at"] if cached else None
+
+    def refresh(self, sftp, root=RAKUTEN_IMAGE_DIR, force=False, max_age=LISTING_MAX_AGE_SEC):
+        """リモートを差分更新（フォルダの更新時刻が変わらず、一覧がmax_age秒以内のフォルダは取り直さない）"""
+        stats = {"listed": 0, "reused": 0, "files": 0}
+        pending = [root]
+        seen = set()
+        now = time.time()
+        while pending:
+            directory = pending.pop()
+            seen.add(directory)
+            dir_mtime = sftp.stat(directory).st_mtime
+            cached = self.dirs.get(directory)
+            if (cached and not force and cached["mtime"] == dir_mtime
+                    and now - cached["listed_at"] <= max_age):
+                stats["reused"] += 1
+                pending.extend(cached.get("subdirs", []))
+                stats["files"] += len(cached["files"])
+                continue
+
+            files = {}
+            subdirs = []
+            for entry in sftp.listdir_attr(directory):
+                if stat.S_ISDIR(entry.st_mode or 0):
+                    subdirs.append(_join(directory, entry.filename))
+                else:
+                    files[entry.filename] = [entry.st_size, entry.st_mtime]
+            with self.lock:
+                self.dirs[directory] = {"mtime": dir_mtime, "listed_at": time.time(),
+                                        "files": files, "subdirs": subdirs}
+            stats["listed"] += 1
+            stats["files"] += len(files)
+            pending.extend(subdirs)
+
+        # 削除されたフォルダを除去
+        with self.lock:
+            for directory in list(self.dirs):
+                if _under(directory, root) and directory not in seen:
+                    del self.dirs[directory]
+        return stats
+
+    def lookup(self, directory, name):
+        """リモートのファイル情報 (サイズ, 更新時刻)、無ければNone"""
+        entry = self.dirs.get(directory, {}).get("files", {}).get(name)
+        return tuple(entry) if entry else None
+
+    def record_upload(self, directory, name, size):
+        """アップロードしたファイルをキャッシュに反映（一覧を取り直さずに済むように）"""
+        with self.lock:
+            cached = self.dirs.get(directory)
+            if cached is not None:
+                cached["files"][name] = [size, int(time.time())]
+
+    def forget(self, directory, name):
+        """キャッシュからファイルを外す（検証で不一致だったファイルなど）"""
+        with self.lock:
+            self.dirs.get(directory, {}).get("files", {}).pop(name, None)
+
+    def is_uploaded(self, directory, path):
+        """同じ名前・同じサイズで、アップロード後に編集されていないファイルがリモートにあるか"""
+        entry = self.lookup(directory, Path(path).name)
+        return entry is not None and _same_file(entry, path)
+
+    def pending(self, files, directory=RAKUTEN_IMAGE_DIR):
+        """リモートに無い（またはサイズが異なる・アップロード後に編集された）ファイルのみ"""
+        return [path for path in files if not self.is_uploaded(directory, path)]
+
+    def files(self, root=RAKUTEN_IMAGE_DIR):
+        """root以下の全ファイル [(リモートパス, サイズ)]"""
+        result = []
+        for directory, cached in self.dirs.items():
+            if _under(directory, root):
+                result.extend((_join(directory, name), entry[0]) for name, entry in cached["files"].items())
+        return result
+
+    def reconcile(self, local_files, directory=RAKUTEN_IMAGE_DIR):
+        """ローカル画像とリモートを照合
+
+        戻り値: {"missing": リモートに無いローカル画像, "changed": サイズが異なる・アップロード後に編集された画像,
+                 "present": アップロード済み, "orphans": ローカルに無いリモートのファイル名}
+        """
+        remote = self.dirs.get(directory, {}).get("files", {})
+        result = {"missing": [], "changed": [], "present": [], "orphans": []}
+        local_names = set()
+        for path in local_files:
+            path = Path(path)
+            local_names.add(path.name)
+            entry = remote.get(path.name)
+            if entry is None:
+                result["missing"].append(path)
+            elif not _same_file(entry, path):
+                result["changed"].append(path)
+            else:
+                result["present"].append(path)
+        result["orphans"] = sorted(name for name in remote if name not in local_names)
+        return result
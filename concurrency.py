@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+並列数の自動調整 - 全体の転送速度が伸びる間は1つずつ増やし、タイムアウト・切断で半分に減らす（AIMD）。学習した値はサーバーごとに保存
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from pathlib import Path
+
+from app_settings import DATA_DIR
+from log_sink import LOGGER_NAME
+from metrics import metrics_registry
+
+CONCURRENCY_FILE = DATA_DIR / "cache" / "concurrency.json"
+MIN_WORKERS = 1
+MAX_WORKERS = 8
+DEFAULT_WORKERS = 2
+EVALUATE_SEC = 10  # 転送速度を比べる間隔
+IMPROVE_RATIO = 1.05  # 前回よりこの割合以上速ければ並列数を増やす
+BACKOFF_COOLDOWN_SEC = 5  # 同じ切断で何度も減らさないための間隔
+
+CONNECTION_ERRORS = (socket.timeout, TimeoutError, ConnectionError, EOFError)
+CONNECTION_ERROR_WORDS = ("timed out", "timeout", "reset", "connection", "dropped", "eof")
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def is_connection_error(error):
+    """タイムアウト・切断など、サーバー側の制限や回線の混雑を示すエラーか"""
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    text = str(error).lower()
+    return any(word in text for word in CONNECTION_ERROR_WORDS)
+
+
+def load_learned(path=CONCURRENCY_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+class ConcurrencyController:
+    """転送スレッドの並列数（スレッド番号が limit 未満のものだけが転送する）"""
+
+    def __init__(self, host, path=CONCURRENCY_FILE, minimum=MIN_WORKERS, maximum=MAX_WORKERS, log=_default_log):
+        self.host = host
+        self.path = Path(path)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.log = log
+        self.lock = threading.Lock()
+        learned = load_learned(self.path).get(host, {})
+        self.limit = max(minimum, min(maximum, learned.get("limit", DEFAULT_WORKERS)))
+        self.best = (0, self.limit)  # 今回の (最も速かった全体の転送速度, その時の並列数)
+        self.last_bps = None
+        self.last_change = 0  # 直前の調整（+1 / -1 / 0）
+        self.last_backoff = 0
+        self.window_started = time.monotonic()
+        self.window_bytes = 0
+        self.workers = {}  # スレッド番号 -> {"bytes", "seconds", "files", "errors"}
+        metrics_registry().set("upload.concurrency", self.limit)
+
+    def admit(self, index):
+        return index < self.limit
+
+    def _worker(self, index):
+        return self.workers.setdefault(index, {"bytes": 0, "seconds": 0.0, "files": 0, "errors": 0})
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.minimum, min(self.maximum, limit))
+        if limit != self.limit:
+            self.log(f"並列数を {self.limit} → {limit} に変更（{reason}）")
+            self.limit = limit
+            metrics_registry().set("upload.concurrency", limit)
+
+    def _reset_window(self, now):
+        self.window_started = now
+        self.window_bytes = 0
+
+    def record(self, index, nbytes, seconds):
+        """1ファイルの転送完了を記録し、一定間隔ごとに並列数を見直す"""
+        with self.lock:
+            stats = self._worker(index)
+            stats["bytes"] += nbytes
+            stats["seconds"] += seconds
+            stats["files"] += 1
+            self.window_bytes += nbytes
+            now = time.monotonic()
+            elapsed = now - self.window_started
+            if elapsed < EVALUATE_SEC:
+                return
+            bps = self.window_bytes / elapsed
+            metrics_registry().observe("upload.aggregate_kbps", bps / 1024)
+            if bps > self.best[0]:
+                self.best = (bps, self.limit)
+            if self.last_bps is None or bps > self.last_bps * IMPROVE_RATIO:
+                # 速くなっている間は1つずつ増やす
+                self.last_change = 1 if self.limit < self.maximum else 0
+                self._set_limit(self.limit + 1, f"全体 {bps / 1024:.0f}KB/s")
+            elif bps * IMPROVE_RATIO < self.last_bps and self.last_change > 0:
+                # 増やして遅くなったら戻す
+                self.last_change = -1
+                self._set_limit(self.limit - 1, f"全体 {bps / 1024:.0f}KB/s に低下")
+            else:
+                self.last_change = 0
+            self.last_bps = bps
+            self._reset_window(now)
+
+    def record_error(self, index, error):
+        """転送エラーを記録（タイムアウト・切断なら並列数を半分に）"""
+        with self.lock:
+            self._worker(index)["errors"] += 1
+            now = time.monotonic()
+            if not is_connection_error(error) or now - self.last_backoff < BACKOFF_COOLDOWN_SEC:
+                return
+            self.last_backoff = now
+            self.last_change = -1
+            self.last_bps = None
+            failed_limit = self.limit
+            self._set_limit(self.limit // 2, f"{type(error).__name__}: {str(error)[:60]}")
+            # 切断された並列数以上での計測は最速でも保存しない（次回その並列数から始めないように）
+            if self.best[1] >= failed_limit:
+                self.best = (0, self.limit)
+            self._reset_window(now)
+
+    def summary(self):
+        """スレッドごとの転送速度・エラー数"""
+        with self.lock:
+            return {index: dict(stats, throughput_bps=stats["bytes"] / stats["seconds"] if stats["seconds"] else 0)
+                    for index, stats in sorted(self.workers.items())}
+
+    def save(self):
+        """最も速かった並列数と転送速度をサーバーごとに保存（計測できなかった場合は並列数のみ更新）"""
+        learned = load_learned(self.path)
+        with self.lock:
+            bps, limit = self.best
+            entry = learned.get(self.host, {})
+            entry["limit"] = limit if bps else self.limit
+            if bps:
+                entry["throughput_bps"] = bps
+            entry["updated_at"] = time.time()
+        learned[self.host] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(learned, ensure_ascii=False, indent=2), encoding="utf-8")
+        temp_path.replace(self.path)
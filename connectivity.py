@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接続監視 - SFTPサーバーへの到達性を軽く確認し（認証はしない）、回復するまで間隔を広げながら待つ
+"""
+
+import logging
+import random
+import socket
+import threading
+
+from log_sink import LOGGER_NAME
+
+# 確認間隔（秒）。失敗するたびに2倍にし、上限で止める
+PROBE_INITIAL_SEC = 15
+PROBE_MAX_SEC = 600
+PROBE_TIMEOUT_SEC = 5
+# サーバーに届くのに接続（認証）できない状態がこの回数続いたら自動での再接続をやめる（アカウントのロック防止）
+MAX_RECONNECT_CYCLES = 5
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def probe_sftp(host, port=22, timeout=PROBE_TIMEOUT_SEC):
+    """TCP接続してSSHのバナーが返るか（認証・鍵交換はしない）"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.settimeout(timeout)
+            return sock.recv(64).startswith(b"SSH-")
+    except OSError:
+        return False
+
+
+class ReconnectBackoff:
+    """再接続の待ち時間（確認をやり直しても引き継ぎ、転送が進んだらreset）"""
+
+    def __init__(self, initial=PROBE_INITIAL_SEC, maximum=PROBE_MAX_SEC, max_cycles=MAX_RECONNECT_CYCLES):
+        self.initial = initial
+        self.maximum = maximum
+        self.max_cycles = max_cycles
+        self.delay = initial
+        self.failed_cycles = 0  # 届いたのに接続できなかった回数
+
+    def increase(self):
+        self.delay = min(self.delay * 2, self.maximum)
+
+    def record_failed_connect(self):
+        """サーバーに届いたが接続できなかった"""
+        self.failed_cycles += 1
+        self.increase()
+
+    @property
+    def exhausted(self):
+        return self.failed_cycles >= self.max_cycles
+
+    def reset(self):
+        self.delay = self.initial
+        self.failed_cycles = 0
+
+
+def wait_until_reachable(host, port=22, stop_event=None, log=_default_log,
+                         initial=PROBE_INITIAL_SEC, maximum=PROBE_MAX_SEC, backoff=None):
+    """サーバーに届くまで確認を繰り返す。届いたらTrue、stop_eventで中止されたらFalse
+    （backoff指定時は前回の待ち時間から続ける）"""
+    stop_event = stop_event or threading.Event()
+    backoff = backoff or ReconnectBackoff(initial, maximum)
+    while True:
+        # 複数の端末が同時に再接続しないよう、待ち時間を少しずらす
+        if stop_event.wait(backoff.delay * random.uniform(0.8, 1.2)):
+            return False
+        if probe_sftp(host, port):
+            log(f"SFTPサーバー {host} に接続できるようになりました")
+            return True
+        backoff.increase()
+        log(f"SFTPサーバー {host} に接続できません。{backoff.delay:.0f}秒後に再確認します", "DEBUG")
+
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSVTOOL出力の検索・Yahoo用CSVの検証と店舗別アップロード準備
+"""
+
+import csv
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Yahoo用CSV（店舗ごとのアップロード単位: 種別, ファイル名）
+YAHOO_BUNDLES = {
+    "taiho-kagu": [("item", "yahoo_item.csv"), ("option", "yahoo_option.csv")],
+    "auction": [("item", "yahoo_auction_item.csv"), ("option", "yahoo_auction_option.csv")],
+    "taiho-kagu2": [("item", "yahoo2_item.csv"), ("option", "yahoo2_option.csv")],
+}
+BUNDLE_LABELS = {
+    "taiho-kagu": "1号店",
+    "auction": "ヤフオク",
+    "taiho-kagu2": "2号店",
+}
+
+# CSVTOOLの出力文字コード（Shift_JIS系を優先）
+CSV_ENCODINGS = ("cp932", "utf-8-sig")
+
+
+def csv_root_candidates():
+    """CSVTOOLフォルダの候補（ツールと同じ場所 → デスクトップ）"""
+    candidates = [Path(__file__).parent / "CSVTOOL"]
+    if os.environ.get("USERPROFILE"):
+        candidates.append(Path(os.environ["USERPROFILE"]) / "Desktop" / "CSVTOOL")
+    return candidates
+
+
+def find_csv_root():
+    """存在するCSVTOOLフォルダを取得"""
+    for candidate in csv_root_candidates():
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def latest_csv_run(csv_root=None):
+    """最新のCSV出力フォルダを取得（ディレクトリ走査は1回だけ）"""
+    csv_root = csv_root or find_csv_root()
+    if csv_root is None:
+        return None
+    with os.scandir(csv_root) as entries:
+        run_names = [entry.name for entry in entries if entry.is_dir()]
+    if not run_names:
+        return None
+    return Path(csv_root) / max(run_names)
+
+
+def read_csv_rows(path):
+    """CSVを読み込んで (ヘッダー, 行リスト) を返す"""
+    last_error = None
+    for encoding in CSV_ENCODINGS:
+        try:
+            with open(path, "r", encoding=encoding, newline="") as f:
+                rows = list(csv.reader(f))
+            break
+        except UnicodeDecodeError as e:
+            last_error = e
+    else:
+        raise last_error
+    if not rows:
+        return [], []
+    return rows[0], rows[1:]
+
+
+def validate_csv(path):
+    """CSVの存在・ヘッダー・列数を検証"""
+    path = Path(path)
+    result = {"name": path.name, "path": str(path), "size": 0, "rows": 0, "error": None}
+    if not path.exists():
+        result["error"] = "見つかりません"
+        return result
+    result["size"] = path.stat().st_size
+    if result["size"] == 0:
+        result["error"] = "空のファイルです"
+        return result
+    try:
+        header, rows = read_csv_rows(path)
+    except (UnicodeDecodeError, csv.Error) as e:
+        result["error"] = f"読み込めません: {e}"
+        return result
+    if not header:
+        result["error"] = "ヘッダー行がありません"
+        return result
+    result["rows"] = len(rows)
+    for line_no, row in enumerate(rows, start=2):
+        if row and len(row) != len(header):
+            result["error"] = f"{line_no}行目の列数が不正です ({len(row)}列 / ヘッダー{len(header)}列)"
+            break
+    return result
+
+
+def _prepare_file(store, kind, path, staging_dir):
+    """1ファイルを検証して店舗別フォルダへ配置"""
+    result = validate_csv(path)
+    result["store"] = store
+    result["kind"] = kind
+    result["staged_path"] = None
+    if result["error"] is None:
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        staged_path = staging_dir / result["name"]
+        shutil.copy2(path, staged_path)
+        result["staged_path"] = str(staged_path)
+    return result
+
+
+def prepare_yahoo_bundles(run_dir, staging_root=None, max_workers=6):
+    """Yahoo用の6ファイルを並列に検証・配置し、店舗別のアップロード単位を返す"""
+    run_dir = Path(run_dir)
+    staging_root = Path(staging_root) if staging_root else run_dir / "yahoo_upload"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            store: [executor.submit(_prepare_file, store, kind, run_dir / name, staging_root / store)
+                    for kind, name in files]
+            for store, files in YAHOO_BUNDLES.items()
+        }
+        bundles = {}
+        for store, store_futures in futures.items():
+            files = [future.result() for future in store_futures]
+            bundles[store] = {
+                "label": BUNDLE_LABELS[store],
+                "dir": str(staging_root / store),
+                "files": files,
+                "ok": all(f["error"] is None for f in files),
+            }
+    return bundles
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コマンドライン実行 - GUIを起動せずにアップロード・検証・Yahoo準備を実行（PyQt5・win32guiは読み込まない）
+
+使い方:
+    python integrated_ec_tool.py upload-csv [--run-dir DIR] [--poll] [--dry-run]
+    python integrated_ec_tool.py upload-images [--folder DIR] [--no-skip] [--dry-run]
+    python integrated_ec_tool.py cabinet-inventory [--folder DIR] [--full]
+    python integrated_ec_tool.py drain-queue [--wait]
+    python integrated_ec_tool.py verify [--run-dir DIR] [--store STORE ...] [--code CODE ...]
+    python integrated_ec_tool.py prepare-yahoo [--run-dir DIR]
+    python integrated_ec_tool.py benchmark-sftp [--save]
+    python integrated_ec_tool.py diagnose-sftp [--port PORT] [--size-mb MB] [--history N]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from app_settings import ftp_settings, load_ftp_password, read_settings, write_settings
+from batch_results import SUCCEEDED, BatchResultPoller
+from cabinet_inventory import CabinetInventory
+from connectivity import ReconnectBackoff, wait_until_reachable
+from csv_source import latest_csv_run, prepare_yahoo_bundles
+from log_sink import LOGGER_NAME, setup_structured_logging, timed_operation
+from page_verify import CSV_SOURCES, STORE_LABELS, verify_products
+from sftp_diagnostics import describe_result, diagnose, load_history, save_result
+from sftp_transfer import (
+    DEFAULT_PROFILE, RAKUTEN_CSV_FILES, TRANSFER_PROFILES, benchmark_profiles, connect_sftp, list_images
+)
+from tracing import trace_run
+from transfer_plan import describe_plan, plan_upload
+from transfer_queue import QUEUE_FILE, TransferQueue, upload_rakuten
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# 終了コード
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def resolve_run_dir(args):
+    """--run-dir 指定が無ければ最新のCSV出力フォルダ"""
+    run_dir = Path(args.run_dir) if args.run_dir else latest_csv_run()
+    if run_dir is None or not run_dir.is_dir():
+        raise Exception("CSV出力フォルダが見つかりません")
+    return run_dir
+
+
+def connection(args, settings):
+    """保存済み設定（引数で上書き可）の接続先 (サーバー, ユーザー, パスワード)"""
+    host, user = ftp_settings(settings)
+    return args.host or host, args.user or user, load_ftp_password()
+
+
+def transfer_profile(args, settings):
+    return args.profile or settings.get("transfer_profile") or DEFAULT_PROFILE
+
+
+def print_plan(host, user, csv_dir=None, image_folder=None, inventory=None):
+    """見積もりを表示（保存済みのR-Cabinet一覧と過去の転送速度を使い、接続しない）"""
+    plan = plan_upload(host, csv_dir, image_folder, inventory)
+    for line in describe_plan(plan).splitlines():
+        log(line)
+    return EXIT_OK
+
+
+def command_upload_csv(args, settings):
+    """楽天へCSVアップロード"""
+    run_dir = resolve_run_dir(args)
+    if args.dry_run:
+        host, user, _ = connection(args, settings)
+        return print_plan(host, user, csv_dir=run_dir)
+    results = upload_rakuten(*connection(args, settings), csv_dir=run_dir,
+                             profile_name=transfer_profile(args, settings), log=log)
+    uploaded = results.get("csv", [])
+    log(f"CSVアップロードが完了しました: {len(uploaded)}ファイル ({run_dir.name})")
+    if not uploaded:
+        return EXIT_FAILED
+    if not args.poll:
+        return EXIT_OK
+
+    # 楽天の処理結果を確認
+    host, user, password = connection(args, settings)
+    local_names = {remote_name: local_name for local_name, remote_name in RAKUTEN_CSV_FILES}
+    poller = BatchResultPoller(lambda: connect_sftp(host, user, password, log=log),
+                               [(run_dir / local_names[name], name, results["csv_baselines"].get(name))
+                                for name in uploaded], log=log,
+                               download_dir=run_dir / "rakuten_results")
+    results = poller.run()
+    for name, result in results.items():
+        for error in result["errors"]:
+            line = f"{error['line']}行目 " if error["line"] else ""
+            log(f"✗ {name} {line}{error['code'] or '(商品コード不明)'}: {error['message']}", "WARNING")
+        log(f"{name}: {'正常に処理されました' if result['state'] == SUCCEEDED else result['state']}")
+    return EXIT_OK if all(result["state"] == SUCCEEDED for result in results.values()) else EXIT_FAILED
+
+
+def image_folder(args, settings):
+    folder = args.folder or settings.get("rakuten_image_folder")
+    if not folder or not Path(folder).is_dir():
+        raise Exception("画像フォルダが設定されていません（--folder で指定してください）")
+    return folder
+
+
+def command_upload_images(args, settings):
+    """楽天へ画像アップロード"""
+    folder = image_folder(args, settings)
+    host, user, password = connection(args, settings)
+    inventory = None if args.no_skip else CabinetInventory(host, user)
+    if args.dry_run:
+        return print_plan(host, user, image_folder=folder, inventory=inventory)
+    results = upload_rakuten(host, user, password, image_folder=folder,
+                             profile_name=transfer_profile(args, settings), log=log, inventory=inventory)
+    log(f"画像アップロード完了: {results.get('image', 0)}ファイル")
+    return EXIT_OK
+
+
+def command_cabinet_inventory(args, settings):
+    """R-Cabinetの一覧を差分更新し、画像フォルダと照合"""
+    host, user, password = connection(args, settings)
+    inventory = CabinetInventory(host, user)
+    sftp, transport = connect_sftp(host, user, password, log=log)
+    try:
+        with timed_operation("cabinet_inventory_refresh") as operation:
+            stats = inventory.refresh(sftp, force=args.full)
+            operation.files = stats["files"]
+    finally:
+        sftp.close()
+        transport.close()
+    inventory.save()
+    log(f"R-Cabinet一覧を更新: {stats['files']}ファイル ({stats['listed']}フォルダ取得 / {stats['reused']}フォルダ変更なし)")
+
+    if not (args.folder or settings.get("rakuten_image_folder")):
+        return EXIT_OK
+    result = inventory.reconcile(list_images(image_folder(args, settings)))
+    for path in result["missing"]:
+        log(f"未アップロード: {path.name}", "WARNING")
+    for path in result["changed"]:
+        log(f"変更あり（サイズ・更新時刻）: {path.name}", "WARNING")
+    for name in result["orphans"]:
+        log(f"ローカルに無い画像: {name}")
+    log(f"照合完了: アップロード済み {len(result['present'])}件 / 未アップロード {len(result['missing'])}件 / "
+        f"変更あり {len(result['changed'])}件 / ローカルに無い画像 {len(result['orphans'])}件")
+    return EXIT_FAILED if result["missing"] or result["changed"] else EXIT_OK
+
+
+def command_drain_queue(args, settings):
+    """保存済みの転送キュー（GUIで転送できなかったファイル）を転送"""
+    host, user, password = connection(args, settings)
+    transfer_queue = TransferQueue(QUEUE_FILE)
+    restored = transfer_queue.load(log)
+    if not restored:
+        log("転送キューは空です")
+        return EXIT_OK
+    log(f"転送キューの {restored}件を転送します")
+    transfer_queue.inventory = CabinetInventory(host, user)
+    backoff = ReconnectBackoff()
+    while True:
+        done_before = transfer_queue.counts()["done"]
+        failed = transfer_queue.run(host, user, password, transfer_profile(args, settings), log=log)
+        if transfer_queue.counts()["done"] > done_before:
+            backoff.reset()
+        elif transfer_queue.offline:
+            backoff.record_failed_connect()
+        if not (transfer_queue.offline and args.wait):
+            break
+        if backoff.exhausted:
+            log(f"SFTPサーバーに{backoff.failed_cycles}回続けて接続できなかったため待機をやめます", "ERROR")
+            break
+        wait_until_reachable(host, log=log, backoff=backoff)
+    counts = transfer_queue.counts()
+    log(f"転送完了: 完了 {counts['done']}件 / スキップ {counts['skipped']}件 / 失敗 {counts['failed']}件 / "
+        f"未転送 {counts['queued']}件")
+    return EXIT_FAILED if failed or transfer_queue.offline or transfer_queue.auth_failed else EXIT_OK
+
+
+def command_benchmark_sftp(args, settings):
+    """各転送プロファイルを実測し、最速のものを表示（--save で設定に保存）"""
+    best, results = benchmark_profiles(*connection(args, settings), profile_names=args.profile_name,
+                                       sample_size=args.size_mb * 1024 * 1024, remote_dir=args.remote_dir, log=log)
+    if args.save:
+        settings["transfer_profile"] = best
+        write_settings(settings)
+        log(f"転送プロファイル {best} を設定に保存しました")
+    return EXIT_OK
+
+
+def command_diagnose_sftp(args, settings):
+    """接続の各段階（名前解決・TCP・鍵交換・認証・転送速度）を計測し、過去の結果と比較"""
+    host, user, password = connection(args, settings)
+    history = load_history(host, limit=args.history)
+    result = diagnose(host, user, password, port=args.port, sample_size=args.size_mb * 1024 * 1024,
+                      remote_dir=args.remote_dir, profile_name=transfer_profile(args, settings), log=log)
+    save_result(result)
+    for line in describe_result(result, history).splitlines():
+        log(line)
+    return EXIT_FAILED if result["failed_phase"] else EXIT_OK
+
+
+def command_verify(args, settings):
+    """CSVと公開ページを照合"""
+    run_dir = resolve_run_dir(args)
+    with timed_operation("page_verify", run=run_dir.name) as operation:
+        results = verify_products(run_dir, stores=args.store, codes=set(args.code) if args.code else None,
+                                  max_workers=args.workers)
+        operation.files = len(results)
+
+    mismatched = [r for r in results if r["mismatches"]]
+    errors = [r for r in results if r["error"]]
+    for result in mismatched:
+        details = " / ".join(f"{field}: CSV={expected} ページ={actual}"
+                             for field, expected, actual in result["mismatches"])
+        log(f"✗ {result['code']} [{STORE_LABELS[result['store']]}] {details}", "WARNING")
+    for result in errors:
+        log(f"⚠ {result['code']} [{STORE_LABELS[result['store']]}] 取得失敗: {result['error']}", "WARNING")
+    unverified = [r for r in results if r["unverified"] and not r["error"]]
+    log(f"照合完了: {len(results)}件中 不一致 {len(mismatched)}件 / 取得失敗 {len(errors)}件 / "
+        f"一部未確認 {len(unverified)}件")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return EXIT_FAILED if mismatched or errors else EXIT_OK
+
+
+def command_prepare_yahoo(args, settings):
+    """Yahoo用CSVを検証して店舗別フォルダに準備"""
+    run_dir = resolve_run_dir(args)
+    with timed_operation("yahoo_prepare", run=run_dir.name) as operation:
+        bundles = prepare_yahoo_bundles(run_dir)
+        operation.files = sum(1 for bundle in bundles.values() for f in bundle["files"] if f["staged_path"])
+    for bundle in bundles.values():
+        for file_result in bundle["files"]:
+            if file_result["error"]:
+                log(f"{bundle['label']}: {file_result['name']} {file_result['error']}", "WARNING")
+        if bundle["ok"]:
+            names = ", ".join(f"{f['name']}({f['rows']}行)" for f in bundle["files"])
+            log(f"{bundle['label']}: CSVファイル確認完了: {names} → {bundle['dir']}")
+    return EXIT_OK if all(bundle["ok"] for bundle in bundles.values()) else EXIT_FAILED
+
+
+COMMANDS = {
+    "upload-csv": command_upload_csv,
+    "upload-images": command_upload_images,
+    "verify": command_verify,
+    "prepare-yahoo": command_prepare_yahoo,
+    "benchmark-sftp": command_benchmark_sftp,
+    "cabinet-inventory": command_cabinet_inventory,
+    "drain-queue": command_drain_queue,
+    "diagnose-sftp": command_diagnose_sftp,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="integrated_ec_tool.py",
+                                     description="統合ECツールの処理をGUIなしで実行")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    upload_csv = subparsers.add_parser("upload-csv", help="楽天へCSVアップロード")
+    upload_csv.add_argument("--poll", action="store_true", help="アップロード後に楽天の処理結果（エラー）を確認")
+    upload_images = subparsers.add_parser("upload-images", help="楽天へ画像アップロード")
+    upload_images.add_argument("--no-skip", action="store_true", help="アップロード済みの画像もすべて送信")
+    cabinet_inventory = subparsers.add_parser("cabinet-inventory", help="R-Cabinetの一覧を更新して画像フォルダと照合")
+    cabinet_inventory.add_argument("--full", action="store_true", help="変更の無いフォルダも一覧を取り直す")
+    benchmark_sftp = subparsers.add_parser("benchmark-sftp", help="SFTP転送プロファイルを実測して比較")
+    benchmark_sftp.add_argument("--profile-name", action="append", choices=list(TRANSFER_PROFILES),
+                                help="計測するプロファイル（複数指定可、省略時はすべて）")
+    benchmark_sftp.add_argument("--size-mb", type=int, default=4, help="計測用ファイルの大きさ(MB)")
+    benchmark_sftp.add_argument("--remote-dir", required=True,
+                                help="計測用ファイルを送信・削除する作業フォルダ（/ritem・/cabinet 以外）")
+    benchmark_sftp.add_argument("--save", action="store_true", help="最速のプロファイルを設定に保存")
+    drain_queue = subparsers.add_parser("drain-queue", help="保存済みの転送キューを転送")
+    drain_queue.add_argument("--wait", action="store_true", help="接続できない場合は回復を待って転送")
+    diagnose_sftp = subparsers.add_parser("diagnose-sftp", help="SFTP接続の遅延・認証時間・転送速度を計測")
+    diagnose_sftp.add_argument("--port", type=int, default=22, help="SFTPポート")
+    diagnose_sftp.add_argument("--size-mb", type=int, default=1, help="計測用ファイルの大きさ(MB)")
+    diagnose_sftp.add_argument("--remote-dir", default=".", help="計測用ファイルを送信するフォルダ")
+    diagnose_sftp.add_argument("--history", type=int, default=20, help="比較する過去の診断回数")
+    for sub in (upload_images, cabinet_inventory):
+        sub.add_argument("--folder", help="画像フォルダ（省略時は保存済みの設定）")
+    for sub in (upload_csv, upload_images, benchmark_sftp, cabinet_inventory, drain_queue, diagnose_sftp):
+        sub.add_argument("--host", help="SFTPサーバー（省略時は保存済みの設定）")
+        sub.add_argument("--user", help="SFTPユーザー（省略時は保存済みの設定）")
+    for sub in (upload_csv, upload_images):
+        sub.add_argument("--dry-run", action="store_true", help="転送せずにファイル数・バイト数・所要時間を見積もる")
+    for sub in (upload_csv, upload_images, drain_queue, diagnose_sftp):
+        sub.add_argument("--profile", choices=list(TRANSFER_PROFILES), help="転送プロファイル（省略時は保存済みの設定）")
+
+    verify = subparsers.add_parser("verify", help="CSVと公開ページを照合")
+    verify.add_argument("--store", action="append", choices=list(CSV_SOURCES), help="照合する店舗（複数指定可）")
+    verify.add_argument("--code", action="append", help="照合する商品コード（複数指定可）")
+    verify.add_argument("--workers", type=int, default=8, help="同時取得数")
+    verify.add_argument("--json", help="照合結果をJSONで保存するファイル")
+
+    prepare_yahoo = subparsers.add_parser("prepare-yahoo", help="Yahoo用CSVを検証して店舗別フォルダに準備")
+
+    for sub in (upload_csv, verify, prepare_yahoo):
+        sub.add_argument("--run-dir", help="CSV出力フォルダ（省略時は最新）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_structured_logging()
+    settings = read_settings()
+    try:
+        with trace_run(args.command.replace("-", "_")):
+            return COMMANDS[args.command](args, settings)
+    except Exception as e:
+        logger.error(f"{args.command} に失敗しました: {str(e)}")
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
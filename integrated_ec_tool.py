@@ -8,32 +8,77 @@ import sys
 import os
 import subprocess
 import logging
+import threading
+import time
 from pathlib import Path
+
+# コマンド指定時はGUIを作らずに実行（PyQt5・win32guiは読み込まない）
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+    from ec_cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
+# 起動時間の計測（フェーズ名, 所要時間ms）
+_startup_mark = time.perf_counter()
+startup_phases = []
+
+
+def mark_startup_phase(phase):
+    """前回の区切りからの経過時間を起動フェーズとして記録"""
+    global _startup_mark
+    now = time.perf_counter()
+    startup_phases.append((phase, (now - _startup_mark) * 1000))
+    _startup_mark = now
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTabWidget, QTextEdit, QLabel, QFileDialog,
     QMessageBox, QGroupBox, QGridLayout, QListWidget, QSplitter,
     QProgressBar, QStatusBar, QToolBar, QAction, QLineEdit, QComboBox,
-    QInputDialog, QProgressDialog
+    QInputDialog, QProgressDialog, QPlainTextEdit, QTableWidget, QTableWidgetItem,
+    QHeaderView
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, pyqtSlot
-from PyQt5.QtGui import QIcon, QFont
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, pyqtSlot, QEventLoop
+from PyQt5.QtGui import QIcon, QFont, QTextCursor
 import csv
-import json
-from datetime import datetime
 import shutil
-import time
-import win32gui
-import win32con
-from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtCore import QUrl, QTimer
-import configparser
+from csv_source import find_csv_root, latest_csv_run, prepare_yahoo_bundles
+from page_verify import PRODUCT_PAGE_URLS, STORE_LABELS, verify_products
+from app_settings import ftp_settings, load_ftp_password, read_settings, save_ftp_password, write_settings
+from connectivity import ReconnectBackoff
+from log_sink import (
+    LOGGER_NAME, LogRingBuffer, format_record, level_rank, log_operation, redact,
+    register_secret, setup_structured_logging, timed_operation
+)
+from metrics import metrics_registry, sparkline
+from tracing import span, trace_run, traced_run
+from progress_bus import ProgressBus, describe
+from transfer_queue import (
+    FINISHED_STATES, PRIORITY_BULK, PRIORITY_NORMAL, PRIORITY_URGENT, QUEUE_FILE, QUEUED, RUNNING, STATE_LABELS,
+    TransferQueue
+)
 
-# 既存のproduct_appをインポート
-try:
-    from product_app import ProductApp
-except ImportError:
-    ProductApp = None
+logger = logging.getLogger(LOGGER_NAME)
+
+# WebEngine（Chromium）・win32gui・product_app は使用する時点で読み込む
+mark_startup_phase("imports")
+
+class TaskWorker(QThread):
+    """時間のかかる処理をバックグラウンドで実行"""
+    
+    progress = pyqtSignal(int, int)  # 完了数, 全体数
+    result_ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, func, parent=None):
+        super().__init__(parent)
+        self.func = func  # func(progress) の形で呼び出す
+        
+    def run(self):
+        try:
+            self.result_ready.emit(self.func(self.progress.emit))
+        except Exception as e:
+            self.failed.emit(str(e))
 
 class IntegratedECTool(QMainWindow):
     """メインの統合ツールウィンドウ"""
@@ -50,8 +95,44 @@ class IntegratedECTool(QMainWindow):
         self.resize_timer.setSingleShot(True)
         self.last_resize_size = None  # 前回のサイズを記録
         self.embed_attempt_count = 0  # 埋め込み試行回数
-        self.init_ui()
         self.setup_logging()
+        self.page_request = None  # ページ確認タブの読み込み中リクエスト
+        self.page_load_stats = {}  # URLごとの読み込み時間(ms)履歴
+        self.page_browser_url = None  # ページ確認タブで表示中のURL
+        self.render_pool = None  # オフスクリーンレンダリング用ページプール
+        self.yahoo_automation = None  # ストアクリエイターCSVアップロード自動化
+        self.verify_worker = None  # 公開ページ照合
+        self.upload_worker = None  # 楽天アップロード
+        self.benchmark_worker = None  # 転送プロファイル計測
+        self.inventory_worker = None  # R-Cabinet照合
+        self.diagnostics_worker = None  # SFTP接続診断
+        # 転送スレッドが進捗を通知し、画面はタイマーでまとめて反映
+        self.progress_bus = ProgressBus()
+        self.progress_version = None
+        # 楽天へのアップロードキュー（優先度順に1つの転送スレッドで処理、未完了分はファイルに保存）
+        self.transfer_queue = TransferQueue(QUEUE_FILE)
+        self.connectivity_worker = None  # 接続できない間の到達確認
+        self.connectivity_stop = threading.Event()
+        self.reconnect_backoff = ReconnectBackoff()  # 確認をやり直しても待ち時間を引き継ぐ
+        self.transfer_done_before = 0  # 転送開始時の完了数（転送が進んだかの判定用）
+        self.batch_poll_worker = None  # 楽天の一括処理結果の確認
+        self.batch_polled_jobs = set()  # 処理結果を確認済み（確認中）のCSVジョブ
+        self.queue_view_version = None
+        self.view_lifecycle = None  # 非表示ブラウザのフリーズ・破棄管理（最初のブラウザ作成時に作成）
+        self.render_pool_size = 3
+        self.render_memory_budget_mb = 600
+        # ブラウザは設定読み込み前に作成されるため、ブラウザ関連の設定は先に読む
+        saved = self.read_settings_file()
+        self.web_cache_size_mb = saved.get("web_cache_size_mb", 300)
+        self.lifecycle_grace_sec = saved.get("lifecycle_grace_sec", 30)  # 非表示ビューをフリーズするまでの猶予
+        self.web_memory_ceiling_mb = saved.get("web_memory_ceiling_mb", 800)
+        self.prefetch_cache_size = saved.get("prefetch_cache_size", 6)  # 先読みしておくページ数
+        self.transfer_profile = saved.get("transfer_profile", "standard")  # SFTP転送プロファイル
+        self.benchmark_remote_dir = saved.get("benchmark_remote_dir", "")  # 転送プロファイル計測用の作業フォルダ
+        # ログは固定長バッファに溜め、画面にはタイマーでまとめて反映
+        self.log_buffer = LogRingBuffer(saved.get("log_capacity", 5000))
+        self.log_view_seq = 0
+        self.init_ui()
         
     def init_ui(self):
         """UI初期化"""
@@ -85,12 +166,14 @@ class IntegratedECTool(QMainWindow):
         self.tabs = QTabWidget()
         layout.addWidget(self.tabs)
         
-        # 各タブを追加
+        # 各タブを追加（ログ・進捗を持つワークフローと初期表示のマスタタブ以外は初回表示時に作成）
+        self.lazy_tabs = {}  # 仮ウィジェット -> 作成関数
         self.setup_workflow_tab()
         self.setup_master_tab()
-        self.setup_product_tab()
-        self.setup_upload_tab()
-        self.setup_check_tab()
+        self.add_lazy_tab(self.tabs, "商品情報入力", self.setup_product_tab)
+        self.add_lazy_tab(self.tabs, "アップロード", self.setup_upload_tab)
+        self.add_lazy_tab(self.tabs, "ページ確認", self.setup_check_tab)
+        self.add_lazy_tab(self.tabs, "パフォーマンス", self.setup_dashboard_tab)
         
         # 初期タブをマスタタブに設定
         self.tabs.setCurrentIndex(1)  # マスタタブ
@@ -98,6 +181,11 @@ class IntegratedECTool(QMainWindow):
         # タブ切り替え時の処理を追加
         self.tabs.currentChanged.connect(self.on_tab_changed)
         
+        # 計測値の履歴は常時サンプリング（表示はパフォーマンスタブ）
+        self.metrics_sample_timer = QTimer(self)
+        self.metrics_sample_timer.timeout.connect(self.sample_metrics)
+        self.metrics_sample_timer.start(5000)
+        
         # 準備完了
         # self.statusBar().showMessage("準備完了")
         
@@ -278,6 +366,14 @@ class IntegratedECTool(QMainWindow):
         """)
         progress_layout.addWidget(self.progress_bar)
         
+        # 転送中の進捗表示は一定間隔でのみ更新
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(200)
+        self.progress_timer.timeout.connect(self.refresh_progress)
+        self.progress_timer.timeout.connect(self.refresh_queue_view)
+        # CSVの転送が終わったら画像の転送を待たずに処理結果の確認を始める
+        self.progress_timer.timeout.connect(self.poll_batch_results)
+        
         right_layout.addWidget(progress_group)
         
         # ログ表示
@@ -298,13 +394,31 @@ class IntegratedECTool(QMainWindow):
         """)
         log_layout = QVBoxLayout(log_group)
         
-        self.log_text = QTextEdit()
+        # 絞り込み（レベル・文字列検索）
+        log_filter_layout = QHBoxLayout()
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItem("すべて", "DEBUG")
+        self.log_level_combo.addItem("INFO以上", "INFO")
+        self.log_level_combo.addItem("WARNING以上", "WARNING")
+        self.log_level_combo.addItem("ERRORのみ", "ERROR")
+        self.log_level_combo.setCurrentIndex(1)
+        self.log_level_combo.currentIndexChanged.connect(self.rebuild_log_view)
+        log_filter_layout.addWidget(self.log_level_combo)
+        
+        self.log_search_input = QLineEdit()
+        self.log_search_input.setPlaceholderText("🔎 ログを検索...")
+        self.log_search_input.textChanged.connect(self.rebuild_log_view)
+        log_filter_layout.addWidget(self.log_search_input, 1)
+        log_layout.addLayout(log_filter_layout)
+        
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(self.log_buffer.capacity)  # 表示行数もバッファと同じ上限
         self.log_text.setPlaceholderText("ワークフロー実行ログがここに表示されます...")
         log_font_size = max(8, int(10 * self.dpi_scale))
         log_border_radius = max(2, int(3 * self.dpi_scale))
         self.log_text.setStyleSheet(f"""
-            QTextEdit {{
+            QPlainTextEdit {{
                 background-color: #fafafa;
                 border: 1px solid #ddd;
                 border-radius: {log_border_radius}px;
@@ -314,6 +428,10 @@ class IntegratedECTool(QMainWindow):
         """)
         log_layout.addWidget(self.log_text)
         
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.timeout.connect(self.flush_log_view)
+        self.log_flush_timer.start(250)
+        
         right_layout.addWidget(log_group)
         
         main_layout.addWidget(right_panel, 1)
@@ -463,16 +581,22 @@ class IntegratedECTool(QMainWindow):
         
     def setup_product_tab(self):
         """商品情報入力タブ"""
+        # 既存のproduct_appをインポート
+        try:
+            from product_app import ProductApp
+        except ImportError:
+            ProductApp = None
+        
         if ProductApp:
             # 既存のProductAppを組み込み
             self.product_app = ProductApp()
-            self.tabs.addTab(self.product_app, "商品情報入力")
+            return self.product_app
         else:
             # フォールバック
             product_widget = QWidget()
             layout = QVBoxLayout(product_widget)
             layout.addWidget(QLabel("商品情報入力機能（product_app.py）"))
-            self.tabs.addTab(product_widget, "商品情報入力")
+            return product_widget
             
     def setup_image_tab(self):
         """画像管理タブ"""
@@ -690,32 +814,78 @@ class IntegratedECTool(QMainWindow):
         layout = QVBoxLayout(upload_widget)
         
         # タブウィジェットでアップロード先を分ける
-        upload_tabs = QTabWidget()
+        self.upload_tabs = QTabWidget()
         
         # 楽天タブ
         rakuten_widget = QWidget()
         rakuten_layout = QVBoxLayout(rakuten_widget)
         self.setup_rakuten_upload(rakuten_layout)
-        upload_tabs.addTab(rakuten_widget, "楽天市場")
+        self.upload_tabs.addTab(rakuten_widget, "楽天市場")
         
-        # Yahooタブ
-        yahoo_widget = QWidget()
-        yahoo_layout = QVBoxLayout(yahoo_widget)
-        self.setup_yahoo_upload(yahoo_layout)
-        upload_tabs.addTab(yahoo_widget, "Yahooショッピング")
+        # Yahooタブ（ブラウザを含むため初回表示時に作成）
+        self.add_lazy_tab(self.upload_tabs, "Yahooショッピング", self.setup_yahoo_upload_tab)
+        self.upload_tabs.currentChanged.connect(self.on_upload_tab_changed)
         
-        layout.addWidget(upload_tabs)
-        self.tabs.addTab(upload_widget, "アップロード")
+        layout.addWidget(self.upload_tabs)
+        self.upload_tab_widget = upload_widget
+        return upload_widget
+    
+    def setup_yahoo_upload_tab(self):
+        """Yahooショッピングのアップロードタブ"""
+        self.yahoo_upload_widget = QWidget()
+        yahoo_layout = QVBoxLayout(self.yahoo_upload_widget)
+        self.setup_yahoo_upload(yahoo_layout)
+        return self.yahoo_upload_widget
     
     def setup_rakuten_upload(self, layout):
-        # 簡略化されたアップロードタブ
+        from sftp_transfer import TRANSFER_PROFILES
         main_layout = QVBoxLayout()
         
+        # SFTP接続設定
+        ftp_group = QGroupBox("🔐 SFTP接続設定")
+        ftp_layout = QGridLayout(ftp_group)
+        host, user = ftp_settings(self.read_settings_file())
+        
+        ftp_layout.addWidget(QLabel("サーバー:"), 0, 0)
+        self.ftp_server_input = QLineEdit(host)
+        ftp_layout.addWidget(self.ftp_server_input, 0, 1, 1, 2)
+        
+        ftp_layout.addWidget(QLabel("ユーザー:"), 1, 0)
+        self.ftp_user_input = QLineEdit(user)
+        ftp_layout.addWidget(self.ftp_user_input, 1, 1, 1, 2)
+        
+        ftp_layout.addWidget(QLabel("パスワード:"), 2, 0)
+        self.ftp_pass_input = QLineEdit(load_ftp_password())
+        self.ftp_pass_input.setEchoMode(QLineEdit.Password)
+        ftp_layout.addWidget(self.ftp_pass_input, 2, 1)
+        save_pass_btn = QPushButton("💾 保存")
+        save_pass_btn.clicked.connect(self.save_ftp_password)
+        ftp_layout.addWidget(save_pass_btn, 2, 2)
+        
+        ftp_layout.addWidget(QLabel("転送プロファイル:"), 3, 0)
+        self.transfer_profile_combo = QComboBox()
+        for name, profile in TRANSFER_PROFILES.items():
+            self.transfer_profile_combo.addItem(profile["label"], name)
+        self.transfer_profile_combo.setCurrentIndex(max(0, self.transfer_profile_combo.findData(self.transfer_profile)))
+        self.transfer_profile_combo.currentIndexChanged.connect(self.on_transfer_profile_changed)
+        ftp_layout.addWidget(self.transfer_profile_combo, 3, 1)
+        self.benchmark_btn = QPushButton("⏱️ 計測して選択")
+        self.benchmark_btn.setToolTip("各プロファイルでテストファイルを作業フォルダに送信・削除し、最速のものを選択します")
+        self.benchmark_btn.clicked.connect(self.benchmark_transfer_profiles)
+        ftp_layout.addWidget(self.benchmark_btn, 3, 2)
+        self.diagnose_btn = QPushButton("🩺 接続診断")
+        self.diagnose_btn.setToolTip("名前解決・TCP接続・鍵交換・認証・転送速度を計測し、過去の結果と比較します")
+        self.diagnose_btn.clicked.connect(self.diagnose_sftp_connection)
+        ftp_layout.addWidget(self.diagnose_btn, 4, 2)
+        
+        main_layout.addWidget(ftp_group)
+        
         # 画像フォルダ設定
         image_folder_group = QGroupBox("📁 画像フォルダ設定")
         image_folder_layout = QVBoxLayout(image_folder_group)
         
-        self.rakuten_image_folder_label = QLabel("📂 未設定")
+        saved_folder = getattr(self, "rakuten_image_folder", None)
+        self.rakuten_image_folder_label = QLabel(f"📂 {saved_folder}" if saved_folder else "📂 未設定")
         self.rakuten_image_folder_label.setWordWrap(True)
         image_folder_layout.addWidget(self.rakuten_image_folder_label)
         
@@ -725,14 +895,77 @@ class IntegratedECTool(QMainWindow):
         
         main_layout.addWidget(image_folder_group)
         
+        # アップロード
+        upload_buttons = QHBoxLayout()
+        upload_csv_btn = QPushButton("📤 CSVをアップロード")
+        upload_csv_btn.clicked.connect(lambda: self.upload_csv_to_rakuten())
+        upload_buttons.addWidget(upload_csv_btn)
+        upload_images_btn = QPushButton("🖼️ 画像をアップロード")
+        upload_images_btn.clicked.connect(lambda: self.upload_images_to_rakuten())
+        upload_buttons.addWidget(upload_images_btn)
+        plan_btn = QPushButton("🧮 見積もり")
+        plan_btn.setToolTip("CSV・画像のアップロード量と所要時間を、接続せずに保存済みの一覧と過去の転送速度から見積もります")
+        plan_btn.clicked.connect(lambda: self.plan_rakuten_upload(csv=True, images=True))
+        upload_buttons.addWidget(plan_btn)
+        self.reconcile_btn = QPushButton("🗂️ R-Cabinetと照合")
+        self.reconcile_btn.setToolTip("R-Cabinetの一覧を更新し、未アップロードの画像とローカルに無い画像を確認します")
+        self.reconcile_btn.clicked.connect(self.reconcile_cabinet)
+        upload_buttons.addWidget(self.reconcile_btn)
+        main_layout.addLayout(upload_buttons)
+        
+        # 転送キュー
+        queue_group = QGroupBox("📋 転送キュー")
+        queue_layout = QVBoxLayout(queue_group)
+        self.queue_summary_label = QLabel("転送待ちはありません")
+        queue_layout.addWidget(self.queue_summary_label)
+        self.queue_table = QTableWidget(0, 6)
+        self.queue_table.setHorizontalHeaderLabels(["状態", "ファイル", "種別", "優先度", "サイズ", "試行"])
+        self.queue_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QTableWidget.SelectRows)
+        queue_layout.addWidget(self.queue_table)
+        
+        queue_buttons = QHBoxLayout()
+        self.queue_pause_btn = QPushButton("⏸️ 一時停止")
+        self.queue_pause_btn.clicked.connect(self.toggle_queue_pause)
+        queue_buttons.addWidget(self.queue_pause_btn)
+        urgent_btn = QPushButton("⚡ 優先して転送")
+        urgent_btn.setToolTip("選択したファイルを画像の一括アップロードより先に転送します")
+        urgent_btn.clicked.connect(lambda: self.update_selected_jobs(
+            lambda job: self.transfer_queue.set_priority(job.id, PRIORITY_URGENT)))
+        queue_buttons.addWidget(urgent_btn)
+        hold_btn = QPushButton("✋ 保留/解除")
+        hold_btn.clicked.connect(lambda: self.update_selected_jobs(
+            lambda job: self.transfer_queue.set_job_paused(job.id, not job.paused)))
+        queue_buttons.addWidget(hold_btn)
+        cancel_btn = QPushButton("✖ キャンセル")
+        cancel_btn.clicked.connect(lambda: self.update_selected_jobs(
+            lambda job: self.transfer_queue.cancel(job.id)))
+        queue_buttons.addWidget(cancel_btn)
+        cancel_all_btn = QPushButton("すべてキャンセル")
+        cancel_all_btn.clicked.connect(self.cancel_all_transfers)
+        queue_buttons.addWidget(cancel_all_btn)
+        retry_btn = QPushButton("🔁 失敗を再試行")
+        retry_btn.clicked.connect(self.retry_failed_transfers)
+        queue_buttons.addWidget(retry_btn)
+        clear_btn = QPushButton("🧹 終了分を消去")
+        clear_btn.clicked.connect(lambda: (self.transfer_queue.clear_finished(), self.refresh_queue_view()))
+        queue_buttons.addWidget(clear_btn)
+        queue_layout.addLayout(queue_buttons)
+        
+        main_layout.addWidget(queue_group)
+        self.queue_view_version = None
+        self.refresh_queue_view()
+        
         # 説明
         info_group = QGroupBox("アップロード手順")
         info_layout = QVBoxLayout(info_group)
         
         info_text = QLabel("1. 画像フォルダを選択\n"
-                          "2. 外部FTPツールを使用してアップロード\n"
-                          "   - CSV: /csv/ フォルダ\n"
-                          "   - 画像: /cabinet/images/ フォルダ\n\n"
+                          "2. CSV・画像をアップロード（進捗は「ワークフロー」タブ、転送中の追加は転送キューへ）\n"
+                          "   - CSV: /ritem/batch/ フォルダ\n"
+                          "   - 画像: /cabinet/images/ フォルダ（アップロード済みの画像は自動でスキップ）\n\n"
                           "※先に「商品情報入力」タブでCSVを生成してください")
         info_text.setWordWrap(True)
         info_layout.addWidget(info_text)
@@ -818,6 +1051,12 @@ class IntegratedECTool(QMainWindow):
         prepare_yahoo_csv_btn.clicked.connect(self.prepare_yahoo_csv)
         action_layout.addWidget(prepare_yahoo_csv_btn)
         
+        auto_upload_btn = QPushButton("🤖 CSVを自動アップロード (1号店・2号店)")
+        auto_upload_btn.setMinimumHeight(btn_height)
+        auto_upload_btn.setStyleSheet(f"QPushButton {{ background-color: #9C27B0; color: white; font-weight: bold; font-size: {btn_font_size}px; }}")
+        auto_upload_btn.clicked.connect(self.auto_upload_yahoo_csv)
+        action_layout.addWidget(auto_upload_btn)
+        
         open_folder_btn = QPushButton("📂 出力フォルダを開く")
         open_folder_btn.setMinimumHeight(btn_height)
         open_folder_btn.setStyleSheet(f"QPushButton {{ background-color: #2196F3; color: white; font-weight: bold; font-size: {btn_font_size}px; }}")
@@ -850,7 +1089,8 @@ class IntegratedECTool(QMainWindow):
                            "4. ログイン後、商品データアップロード\n"
                            "5. yahoo_item.csv をアップロード\n"
                            "6. オプションデータアップロード\n"
-                           "7. yahoo_option.csv をアップロード")
+                           "7. yahoo_option.csv をアップロード\n\n"
+                           "※ログイン後「CSVを自動アップロード」で5〜7を両店舗分まとめて実行できます")
         yahoo_info.setWordWrap(True)
         yahoo_info_font_size = max(12, int(14 * self.dpi_scale))
         yahoo_info.setStyleSheet(f"color: #666; font-size: {yahoo_info_font_size}px;")
@@ -883,8 +1123,12 @@ class IntegratedECTool(QMainWindow):
         """)
         browser_layout = QVBoxLayout(browser_group)
         
-        # ブラウザウィジェット
+        # ブラウザウィジェット（ログイン状態・キャッシュを保持する共有プロファイル）
+        from PyQt5.QtWebEngineWidgets import QWebEngineView
+        from yahoo_upload import YahooUploadPage
         self.yahoo_browser = QWebEngineView()
+        self.yahoo_browser.setPage(YahooUploadPage(self.web_profile(), self.yahoo_browser))
+        self.register_browser("yahoo", self.yahoo_browser)
         browser_layout.addWidget(self.yahoo_browser)
         
         main_layout.addWidget(browser_group, 1)
@@ -944,7 +1188,11 @@ class IntegratedECTool(QMainWindow):
                 background-color: #f8f9fa;
             }}
         """)
-        self.product_code_input.textChanged.connect(self.auto_generate_urls)  # 10桁で自動生成
+        # 入力が止まってからURL生成（1文字ごとに読み込まない）
+        self.code_input_timer = QTimer(self)
+        self.code_input_timer.setSingleShot(True)
+        self.code_input_timer.timeout.connect(self.auto_generate_urls)
+        self.product_code_input.textChanged.connect(lambda: self.code_input_timer.start(400))  # 10桁で自動生成
         code_layout.addWidget(self.product_code_input)
         
         left_layout.addWidget(code_group)
@@ -1117,6 +1365,40 @@ class IntegratedECTool(QMainWindow):
         nav_layout.addWidget(reload_btn)
         
         control_layout.addLayout(nav_layout)
+        
+        render_check_btn = QPushButton("🧪 全ページをレンダリング確認")
+        render_check_btn.setMinimumHeight(nav_btn_height)
+        render_check_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: #2196F3;
+                color: white;
+                font-weight: bold;
+                border-radius: {nav_border_radius}px;
+                font-size: {nav_btn_font_size}px;
+            }}
+            QPushButton:hover {{
+                background-color: #1976D2;
+            }}
+        """)
+        render_check_btn.clicked.connect(self.check_pages)
+        control_layout.addWidget(render_check_btn)
+        
+        self.verify_btn = QPushButton("🔍 CSVと公開ページを照合")
+        self.verify_btn.setMinimumHeight(nav_btn_height)
+        self.verify_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: #9C27B0;
+                color: white;
+                font-weight: bold;
+                border-radius: {nav_border_radius}px;
+                font-size: {nav_btn_font_size}px;
+            }}
+            QPushButton:hover {{
+                background-color: #7B1FA2;
+            }}
+        """)
+        self.verify_btn.clicked.connect(self.verify_uploaded_pages)
+        control_layout.addWidget(self.verify_btn)
         left_layout.addWidget(control_group)
         
         # 確認結果
@@ -1153,6 +1435,15 @@ class IntegratedECTool(QMainWindow):
         """)
         result_layout.addWidget(self.check_result)
         
+        latency_label = QLabel("⏱️ 読み込み時間 (URL別):")
+        latency_label.setStyleSheet("font-weight: bold; margin-top: 5px;")
+        result_layout.addWidget(latency_label)
+        
+        self.load_latency_list = QListWidget()
+        self.load_latency_list.setMaximumHeight(90)
+        self.load_latency_list.setStyleSheet("font-family: 'Courier New', monospace; font-size: 10px;")
+        result_layout.addWidget(self.load_latency_list)
+        
         left_layout.addWidget(result_group)
         left_layout.addStretch()
         
@@ -1200,8 +1491,12 @@ class IntegratedECTool(QMainWindow):
         
         browser_layout.addLayout(url_bar_layout)
         
-        # ブラウザウィジェット
+        # ブラウザウィジェット（ストアクリエイターと共有プロファイル）
+        from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineSettings
+        from web_pages import PagePrefetchCache
         self.page_browser = QWebEngineView()
+        self.page_browser.setPage(QWebEnginePage(self.web_profile(), self.page_browser))
+        self.register_browser("page", self.page_browser)
         browser_border_radius = int(3 * self.dpi_scale)
         self.page_browser.setStyleSheet(f"""
             QWebEngineView {{
@@ -1211,48 +1506,198 @@ class IntegratedECTool(QMainWindow):
             }}
         """)
         
-        # JavaScriptコンソールエラーを無視する設定
-        from PyQt5.QtWebEngineWidgets import QWebEngineSettings
+        # JavaScriptコンソールエラーを無視する設定（先読みページにも同じ設定を適用）
+        page_settings = {
+            QWebEngineSettings.JavascriptEnabled: True,
+            QWebEngineSettings.ErrorPageEnabled: False,
+        }
         settings = self.page_browser.settings()
-        settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
-        settings.setAttribute(QWebEngineSettings.ErrorPageEnabled, False)
+        for attribute, value in page_settings.items():
+            settings.setAttribute(attribute, value)
+        
+        # 生成URLの先読みキャッシュ
+        self.prefetch_cache = PagePrefetchCache(
+            profile=self.web_profile(),
+            capacity=self.prefetch_cache_size,
+            page_settings=page_settings,
+            parent=self
+        )
+        self.prefetch_cache.page_loaded.connect(self.on_prefetch_loaded)
         
         browser_layout.addWidget(self.page_browser)
         
         layout.addWidget(browser_group, 1)  # 最大領域を占有
         
-        self.tabs.addTab(check_widget, "ページ確認")
+        self.check_tab_widget = check_widget
+        return check_widget
+        
+    def setup_dashboard_tab(self):
+        """パフォーマンス計測タブ"""
+        dashboard_widget = QWidget()
+        layout = QVBoxLayout(dashboard_widget)
+        
+        control_layout = QHBoxLayout()
+        info_label = QLabel("💡 SFTP転送・画像スキャン・ページ読み込み・ワークフロー各手順の計測値（推移は5秒ごとのサンプル）")
+        info_label.setWordWrap(True)
+        control_layout.addWidget(info_label, 1)
+        reset_btn = QPushButton("🗑️ リセット")
+        reset_btn.clicked.connect(self.reset_metrics)
+        control_layout.addWidget(reset_btn)
+        layout.addLayout(control_layout)
+        
+        self.metrics_table = QTableWidget(0, 9)
+        self.metrics_table.setHorizontalHeaderLabels(
+            ["メトリクス", "種類", "件数", "最新", "平均", "p50", "p90", "p99", "推移"])
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.metrics_table.horizontalHeader().setStretchLastSection(True)
+        self.metrics_table.setStyleSheet("QTableWidget { font-family: 'Courier New', monospace; }")
+        layout.addWidget(self.metrics_table)
+        
+        # 表の更新はタブ表示中のみ
+        self.metrics_refresh_timer = QTimer(self)
+        self.metrics_refresh_timer.timeout.connect(self.refresh_metrics_table)
+        self.metrics_refresh_timer.start(1000)
+        
+        self.dashboard_tab_widget = dashboard_widget
+        return dashboard_widget
+    
+    def sample_metrics(self):
+        """ブラウザのメモリ使用量を記録して履歴を追加"""
+        metrics = metrics_registry()
+        if self.view_lifecycle is not None:
+            metrics.set("browser.memory_mb", round(self.view_lifecycle.renderer_memory_mb()))
+        metrics.sample()
+    
+    def refresh_metrics_table(self):
+        """計測値の一覧を更新"""
+        if self.tabs.currentWidget() is not getattr(self, "dashboard_tab_widget", None):
+            return
+        metrics = metrics_registry()
+        rows = metrics.snapshot()
+        
+        def cell(value):
+            if value is None:
+                return "-"
+            return f"{value:,.1f}" if isinstance(value, float) else f"{value:,}"
+        
+        self.metrics_table.setRowCount(len(rows))
+        for row, (name, kind, summary) in enumerate(rows):
+            history = metrics.history.get(name, ())
+            values = [name, kind, cell(summary.get("count")), cell(summary.get("value")),
+                      cell(summary.get("mean")), cell(summary.get("p50")), cell(summary.get("p90")),
+                      cell(summary.get("p99")), sparkline(value for _, value in history)]
+            for column, text in enumerate(values):
+                self.metrics_table.setItem(row, column, QTableWidgetItem(text))
+    
+    def reset_metrics(self):
+        """計測値をリセット"""
+        metrics_registry().reset()
+        self.metrics_table.setRowCount(0)
+        self.log_message("パフォーマンス計測値をリセットしました")
+    
+    def add_lazy_tab(self, tab_widget, title, builder):
+        """仮のタブを追加し、初回表示時に builder() が返すウィジェットに置き換える"""
+        placeholder = QWidget()
+        self.lazy_tabs[placeholder] = builder
+        return tab_widget.addTab(placeholder, title)
+    
+    def build_lazy_tab(self, tab_widget, index):
+        """表示されたタブが仮のタブなら作成して置き換える"""
+        placeholder = tab_widget.widget(index)
+        builder = self.lazy_tabs.pop(placeholder, None)
+        if builder is None:
+            return
+        title = tab_widget.tabText(index)
+        with timed_operation("tab_build", tab=title):
+            widget = builder()
+        # 置き換え中のタブ切り替え通知は抑止
+        tab_widget.blockSignals(True)
+        tab_widget.removeTab(index)
+        tab_widget.insertTab(index, widget, title)
+        tab_widget.setCurrentIndex(index)
+        tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+    
+    def register_browser(self, name, view):
+        """ブラウザビューをライフサイクル管理に登録"""
+        from web_pages import ViewLifecycleManager
+        if self.view_lifecycle is None:
+            self.view_lifecycle = ViewLifecycleManager(
+                grace_ms=int(self.lifecycle_grace_sec * 1000),
+                memory_ceiling_mb=self.web_memory_ceiling_mb,
+                parent=self
+            )
+            self.view_lifecycle.state_changed.connect(
+                lambda name, state: logger.info(f"ブラウザ {name} の状態: {state}"))
+            self.view_lifecycle.add_reclaimer(self.release_background_pages)
+        self.view_lifecycle.register(name, view)
+    
+    def release_background_pages(self):
+        """先読みキャッシュ・レンダリングプールの待機中ページを破棄（メモリ上限超過時）。戻り値は破棄したページ数"""
+        released = 0
+        if getattr(self, "prefetch_cache", None) is not None:
+            released += self.prefetch_cache.release()
+        if self.render_pool is not None:
+            released += self.render_pool.release_idle_pages()
+        if released:
+            logger.info(f"メモリ上限超過のため先読み・レンダリング用のページを{released}件破棄しました")
+        return released
+    
+    def report_startup(self):
+        """起動フェーズごとの所要時間をログ・メトリクスに出力"""
+        mark_startup_phase("first_paint")
+        for phase, duration_ms in startup_phases:
+            log_operation(f"startup.{phase}", duration_ms)
+        total_ms = sum(duration_ms for _, duration_ms in startup_phases)
+        details = ", ".join(f"{phase} {duration_ms:.0f}ms" for phase, duration_ms in startup_phases)
+        self.log_message(f"起動時間: {total_ms:.0f}ms ({details})")
+    
+    def web_profile(self):
+        """ブラウザ共通のWebEngineプロファイル"""
+        from web_pages import shared_profile
+        return shared_profile(cache_size_mb=self.web_cache_size_mb)
         
     def setup_logging(self):
-        """ログ設定"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        """ログ設定（logs/ にローテーションするJSONLで保存）"""
+        setup_structured_logging()
         
     def log_message(self, message, level="INFO"):
-        """ログメッセージ表示"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {level}: {message}"
-        if hasattr(self, 'log_text'):
-            self.log_text.append(log_entry)
+        """ログメッセージ表示（ワーカースレッドからも呼び出し可能）"""
+        message = redact(message)
+        self.log_buffer.append(message, level)
+        logger.log(getattr(logging, level, logging.INFO), message)
         # ステータスバーへの表示は必要な時のみ行う
         # self.statusBar().showMessage(message)
         
+    def log_record_visible(self, record):
+        """現在の絞り込み条件に合うか"""
+        if level_rank(record[2]) < level_rank(self.log_level_combo.currentData()):
+            return False
+        search = self.log_search_input.text().lower()
+        return not search or search in record[3].lower()
+        
+    def flush_log_view(self):
+        """バッファに追加されたログをまとめて画面に反映"""
+        self.log_view_seq, records = self.log_buffer.since(self.log_view_seq)
+        lines = [format_record(record) for record in records if self.log_record_visible(record)]
+        if lines:
+            self.log_text.appendPlainText("\n".join(lines))
+        
+    def rebuild_log_view(self):
+        """絞り込み条件の変更時に表示を作り直す"""
+        self.log_view_seq, records = self.log_buffer.since(0)
+        lines = [format_record(record) for record in records if self.log_record_visible(record)]
+        self.log_text.setPlainText("\n".join(lines))
+        self.log_text.moveCursor(QTextCursor.End)
+        
     def save_ftp_password(self):
         """FTPパスワードを保存（簡易暗号化）"""
         password = self.ftp_pass_input.text()
         if password:
             try:
-                # 簡単な暗号化
-                encoded = base64.b64encode(password.encode()).decode()
-                config = configparser.ConfigParser()
-                config['FTP'] = {'password': encoded}
-                
-                config_path = Path(__file__).parent / '.config.ini'
-                with open(config_path, 'w') as f:
-                    config.write(f)
-                    
+                save_ftp_password(password)
                 QMessageBox.information(self, "保存完了", "パスワードが保存されました。")
             except Exception as e:
                 QMessageBox.warning(self, "保存エラー", f"パスワードの保存に失敗しました: {str(e)}")
@@ -1261,19 +1706,9 @@ class IntegratedECTool(QMainWindow):
             
     def load_ftp_password(self):
         """保存されたFTPパスワードを読み込み"""
-        try:
-            config_path = Path(__file__).parent / '.config.ini'
-            if config_path.exists():
-                config = configparser.ConfigParser()
-                config.read(config_path)
-                
-                if 'FTP' in config and 'password' in config['FTP']:
-                    encoded = config['FTP']['password']
-                    password = base64.b64decode(encoded).decode()
-                    if hasattr(self, 'ftp_pass_input'):
-                        self.ftp_pass_input.setText(password)
-        except Exception:
-            pass  # エラーがある場合は何もしない
+        password = load_ftp_password()
+        if password and hasattr(self, 'ftp_pass_input'):
+            self.ftp_pass_input.setText(password)
         
     def browse_master_tool(self):
         """マスタツール選択"""
@@ -1289,6 +1724,7 @@ class IntegratedECTool(QMainWindow):
         """マスタツール自動起動・埋め込み"""
         self.launch_and_embed_master()
     
+    @traced_run("master_launch", lambda self: {"path": self.master_tool_path})
     def launch_and_embed_master(self):
         """マスタツール起動・埋め込み"""
         if not self.master_tool_path:
@@ -1299,7 +1735,7 @@ class IntegratedECTool(QMainWindow):
         if not os.path.exists(self.master_tool_path):
             error_msg = f"マスタツール '{self.master_tool_path}' が見つかりません。\n\n考えられる原因:\n1. ネットワークドライブが接続されていない\n2. ファイルパスが間違っている\n3. アクセス権限がない\n\nネットワーク接続を確認してください。"
             QMessageBox.warning(self, "マスタツール接続エラー", error_msg)
-            print(f"マスタツールパスエラー: {self.master_tool_path}")
+            logger.error(f"マスタツールパスエラー: {self.master_tool_path}")
             return
             
         try:
@@ -1310,27 +1746,29 @@ class IntegratedECTool(QMainWindow):
                 result = subprocess.run(['taskkill', '/f', '/im', 'HAMST040.exe'], 
                                      capture_output=True, text=True)
                 if result.returncode == 0:
-                    print("既存のHAMST040プロセスをクリーンアップしました")
+                    logger.info("既存のHAMST040プロセスをクリーンアップしました")
                     time.sleep(1)  # 1秒待機
             except:
                 pass
             
             # 作業ディレクトリをDBConfig.xmlがある場所に設定
             work_dir = os.path.dirname(self.master_tool_path)
-            print(f"マスタツール起動: {self.master_tool_path}")
-            print(f"作業ディレクトリ: {work_dir}")
+            logger.info(f"マスタツール起動: {self.master_tool_path}")
+            logger.info(f"作業ディレクトリ: {work_dir}")
             
             # HAMST040.exeを起動
-            self.master_process = subprocess.Popen(
-                self.master_tool_path, 
-                cwd=work_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            print(f"プロセスID: {self.master_process.pid}")
+            with span("master_popen"):
+                self.master_process = subprocess.Popen(
+                    self.master_tool_path, 
+                    cwd=work_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+            logger.info(f"プロセスID: {self.master_process.pid}")
             
             # プロセス起動確認のため少し待つ
-            time.sleep(2)
+            with span("master_startup_wait"):
+                time.sleep(2)
             
             # プロセスが生きているか確認
             if self.master_process.poll() is not None:
@@ -1342,11 +1780,11 @@ class IntegratedECTool(QMainWindow):
                     error_msg += f"エラー出力: {stderr.decode('utf-8', errors='ignore')}\n"
                 if stdout:
                     error_msg += f"標準出力: {stdout.decode('utf-8', errors='ignore')}\n"
-                print(error_msg)
+                logger.error(error_msg)
                 QMessageBox.warning(self, "マスタツール起動エラー", error_msg)
                 return
             else:
-                print("プロセスは正常に動作中")
+                logger.info("プロセスは正常に動作中")
             
             # 埋め込み試行回数をリセット
             self.embed_attempt_count = 0
@@ -1356,13 +1794,15 @@ class IntegratedECTool(QMainWindow):
             
         except Exception as e:
             error_msg = f"起動に失敗しました: {str(e)}"
-            print(f"エラー詳細: {error_msg}")
+            logger.error(f"エラー詳細: {error_msg}")
             import traceback
-            print(f"スタックトレース: {traceback.format_exc()}")
+            logger.error(f"スタックトレース: {traceback.format_exc()}")
             QMessageBox.critical(self, "エラー", error_msg)
     
     def try_embed_master(self):
         """マスタツールの埋め込みを試行"""
+        import win32con
+        import win32gui
         try:
             self.embed_attempt_count += 1
             
@@ -1374,7 +1814,7 @@ class IntegratedECTool(QMainWindow):
                 error_msg += f"終了コード: {self.master_process.returncode}\n"
                 if stderr:
                     error_msg += f"エラー: {stderr.decode('utf-8', errors='ignore')[:200]}\n"
-                print(error_msg)
+                logger.error(error_msg)
                 QMessageBox.warning(self, "マスタツールエラー", error_msg)
                 return
             
@@ -1408,17 +1848,17 @@ class IntegratedECTool(QMainWindow):
             
             # デバッグ情報をログに出力
             if not self.master_hwnd:
-                print(f"検索キーワード: HAMST, マスタ, 大宝, TAIHO, 040")
-                # print(f"現在開いているウィンドウ: {found_windows}") # ログが長くなるためコメントアウト
+                logger.debug(f"検索キーワード: HAMST, マスタ, 大宝, TAIHO, 040")
+                # logger.debug(f"現在開いているウィンドウ: {found_windows}") # ログが長くなるためコメントアウト
                 # self.log_message(f"自動検出失敗。現在開いているウィンドウ: {', '.join(found_windows[:10])}")  # 最初の10個だけ表示
             
             if self.master_hwnd:
                 try:
                     window_title = win32gui.GetWindowText(self.master_hwnd)
-                    print(f"ウィンドウを発見: {window_title} (HWND: {self.master_hwnd})")
+                    logger.info(f"ウィンドウを発見: {window_title} (HWND: {self.master_hwnd})")
 
                     parent_hwnd = int(self.master_embed_widget.winId())
-                    print(f"埋め込み先ウィジェットの HWND: {parent_hwnd}")
+                    logger.debug(f"埋め込み先ウィジェットの HWND: {parent_hwnd}")
                     
                     # 親ウィンドウを設定
                     win32gui.SetParent(self.master_hwnd, parent_hwnd)
@@ -1443,7 +1883,7 @@ class IntegratedECTool(QMainWindow):
                     border_width = 4
                     target_width = max(widget_size.width() - border_width, 50)
                     target_height = max(widget_size.height() - border_width, 50)
-                    print(f"埋め込みウィジェットのサイズ（ボーダー調整後）: {target_width}x{target_height}")
+                    logger.debug(f"埋め込みウィジェットのサイズ（ボーダー調整後）: {target_width}x{target_height}")
 
                     # ウィンドウを表示域内に移動・リサイズ (0,0 は親ウィジェットの左上からの相対位置)
                     # SWP_FRAMECHANGED を追加してスタイル変更を適用
@@ -1456,7 +1896,7 @@ class IntegratedECTool(QMainWindow):
                     )
                     
                     self.embed_timer.stop()
-                    print("表示域内配置完了")
+                    logger.info("表示域内配置完了")
                     self.last_resize_size = (target_width, target_height) # 初期サイズを記録
                     # OSにウィンドウ状態の変更を処理させる時間を確保
                     QApplication.processEvents()
@@ -1470,13 +1910,14 @@ class IntegratedECTool(QMainWindow):
     
     def close_master_tool(self):
         """マスタツール終了"""
+        import win32gui
         try:
             # すべてのHAMST040プロセスを確実に終了
             import subprocess
             try:
                 subprocess.run(['taskkill', '/f', '/im', 'HAMST040.exe'], 
                              capture_output=True, text=True)
-                print("すべてのHAMST040プロセスを強制終了しました")
+                logger.info("すべてのHAMST040プロセスを強制終了しました")
             except:
                 pass
             
@@ -1507,11 +1948,12 @@ class IntegratedECTool(QMainWindow):
             self.log_message("マスタツールを完全終了しました")
             
         except Exception as e:
-            print(f"終了エラー: {str(e)}")
+            logger.error(f"終了エラー: {str(e)}")
             QMessageBox.critical(self, "エラー", f"終了に失敗しました: {str(e)}")
     
     def manual_embed_window(self):
         """手動でウィンドウを選択して埋め込み"""
+        import win32gui
         try:
             # 現在開いているウィンドウを取得
             windows = []
@@ -1554,6 +1996,8 @@ class IntegratedECTool(QMainWindow):
     
     def embed_selected_window(self):
         """選択されたウィンドウを埋め込み"""
+        import win32con
+        import win32gui
         try:
             if not self.master_hwnd:
                 return
@@ -1603,7 +2047,7 @@ class IntegratedECTool(QMainWindow):
         """埋め込みウィジェットリサイズ時の処理"""
         # 現在のサイズを取得
         current_size = (self.master_embed_widget.width(), self.master_embed_widget.height())
-        print(f"埋め込みウィジェットリサイズ検出: {current_size}")
+        logger.debug(f"埋め込みウィジェットリサイズ検出: {current_size}")
         
         # サイズが小さすぎる場合はスキップ（初期化中など）
         if current_size[0] < 100 or current_size[1] < 100:
@@ -1620,6 +2064,8 @@ class IntegratedECTool(QMainWindow):
     
     def resize_embedded_window(self):
         """埋め込まれたウィンドウのサイズを調整"""
+        import win32con
+        import win32gui
         if not self.master_hwnd:
             return
             
@@ -1660,17 +2106,19 @@ class IntegratedECTool(QMainWindow):
         super().resizeEvent(event)
         # マスタタブが表示されている場合のみリサイズ
         if self.tabs.currentIndex() == 1 and self.master_hwnd:
-            print("メインウィンドウリサイズ検出")
+            logger.debug("メインウィンドウリサイズ検出")
             # リサイズが完了してから実行（頻繁な実行を防ぐ）
             self.resize_timer.stop()
             self.resize_timer.start(200)  # 統一された間隔で実行
     
     def manual_resize_master(self):
         """手動リサイズボタンが押された時の処理"""
+        import win32con
+        import win32gui
         if self.master_hwnd:
             # もう埋め込みは諦めて、外部ウィンドウとして最大化
             try:
-                print("埋め込みを諦めて、ウィンドウを最大化します")
+                logger.info("埋め込みを諦めて、ウィンドウを最大化します")
                 
                 # ウィンドウを最大化
                 win32gui.ShowWindow(self.master_hwnd, win32con.SW_MAXIMIZE)
@@ -1681,19 +2129,39 @@ class IntegratedECTool(QMainWindow):
                 self.log_message("マスタツールを最大化しました。統合ツールは最小化されました。", "INFO")
                 
             except Exception as e:
-                print(f"最大化エラー: {e}")
+                logger.error(f"最大化エラー: {e}")
                 self.log_message(f"最大化エラー: {str(e)}", "ERROR")
                 
         else:
-            print("埋め込みウィンドウハンドルがNullです")
+            logger.warning("埋め込みウィンドウハンドルがNullです")
             self.log_message("埋め込みウィンドウが見つかりません", "WARNING")
     
     def on_tab_changed(self, index):
         """タブが切り替わった時の処理"""
+        self.build_lazy_tab(self.tabs, index)
+        
         # マスタタブ（index 1）に切り替わった場合
         if index == 1 and self.master_hwnd:
             # サイズ調整のみ行う
             QTimer.singleShot(200, self.resize_embedded_window)  # 統一された遅延  # 少し遅延させて確実に実行
+        
+        # 非表示になったブラウザはフリーズ、表示されたものはアクティブに戻す
+        self.update_view_lifecycle()
+    
+    def on_upload_tab_changed(self, index):
+        """アップロード先タブが切り替わった時の処理"""
+        self.build_lazy_tab(self.upload_tabs, index)
+        self.update_view_lifecycle()
+    
+    def update_view_lifecycle(self):
+        """ブラウザビューの表示状態をライフサイクル管理に通知"""
+        if self.view_lifecycle is None:
+            return
+        current = self.tabs.currentWidget()
+        yahoo_visible = (current is getattr(self, "upload_tab_widget", None)
+                         and self.upload_tabs.currentWidget() is getattr(self, "yahoo_upload_widget", None))
+        self.view_lifecycle.set_visible("yahoo", yahoo_visible)
+        self.view_lifecycle.set_visible("page", current is getattr(self, "check_tab_widget", None))
             
     def browse_rakuten_image_folder(self):
         """楽天用画像フォルダ選択"""
@@ -1723,13 +2191,16 @@ class IntegratedECTool(QMainWindow):
             try:
                 folder_path = Path(folder)
                 if folder_path.exists():
-                    for file in folder_path.iterdir():
-                        if file.suffix.lower() in image_extensions:
-                            # ファイルサイズも表示
-                            file_size = file.stat().st_size
-                            size_mb = file_size / (1024 * 1024)
-                            self.image_list.addItem(f"🖼️ {file.name} ({size_mb:.1f}MB)")
-                            count += 1
+                    with timed_operation("image_scan", folder=folder) as operation:
+                        for file in folder_path.iterdir():
+                            if file.suffix.lower() in image_extensions:
+                                # ファイルサイズも表示
+                                file_size = file.stat().st_size
+                                size_mb = file_size / (1024 * 1024)
+                                self.image_list.addItem(f"🖼️ {file.name} ({size_mb:.1f}MB)")
+                                operation.bytes += file_size
+                                count += 1
+                        operation.files = count
                     
                     self.image_count_label.setText(f"画像ファイル数: {count}")
                     self.log_message(f"画像リストを更新: {count}ファイル")
@@ -1754,131 +2225,475 @@ class IntegratedECTool(QMainWindow):
             except Exception as e:
                 self.log_message(f"フォルダを開けませんでした: {str(e)}", "WARNING")
                     
-    def connect_sftp_with_retry(self):
+    def ftp_connection_settings(self):
+        """SFTP接続先 (サーバー, ユーザー, パスワード)。入力欄が無い場合は保存済みの設定"""
+        host, user = ftp_settings()
+        password = load_ftp_password()
+        if hasattr(self, 'ftp_server_input'):
+            host = self.ftp_server_input.text() or host
+            user = self.ftp_user_input.text() or user
+            password = self.ftp_pass_input.text() or password
+        register_secret(password)
+        return host, user, password
+    
+    def connect_sftp_with_retry(self, connection=None):
         """SFTPに接続（パスワード自動切り替え）"""
-        passwords = ["ta1hoKa9", "Ta1hoka9"]
-        
-        if self.ftp_pass_input.text():
-            # ユーザーが入力したパスワードを優先
-            passwords.insert(0, self.ftp_pass_input.text())
-        
-        for password in passwords:
-            try:
-                transport = paramiko.Transport((self.ftp_server_input.text(), 22))
-                transport.connect(username=self.ftp_user_input.text(), password=password)
-                sftp = paramiko.SFTPClient.from_transport(transport)
-                self.log_message(f"SFTP接続成功")
-                return sftp, transport
-            except Exception as e:
-                self.log_message(f"パスワード {password} で接続失敗: {str(e)}", "WARNING")
-                continue
-        
-        raise Exception("すべてのパスワードで接続に失敗しました")
+        from sftp_transfer import connect_sftp
+        host, user, password = connection or self.ftp_connection_settings()
+        return connect_sftp(host, user, password, log=self.log_message)
     
-    def upload_csv_to_rakuten(self):
-        """楽天へCSVアップロード"""
+    def upload_csv_to_rakuten(self, dry_run=False):
+        """楽天へCSVアップロード（dry_run=Trueは見積もりのみ）"""
+        if dry_run:
+            return self.plan_rakuten_upload(csv=True, images=False)
+        return self.start_rakuten_upload(csv=True, images=False)
+    
+    def upload_images_to_rakuten(self, dry_run=False):
+        """楽天へ画像アップロード（dry_run=Trueは見積もりのみ）"""
+        if dry_run:
+            return self.plan_rakuten_upload(csv=False, images=True)
+        return self.start_rakuten_upload(csv=False, images=True)
+    
+    def plan_rakuten_upload(self, csv=True, images=True):
+        """アップロードするファイル数・バイト数・所要時間を見積もって表示（接続はしない）"""
+        from cabinet_inventory import CabinetInventory
+        from transfer_plan import describe_plan, plan_upload
         try:
-            # CSV出力フォルダを確認
-            csv_folder = os.path.join(os.path.dirname(__file__), "CSVTOOL")
-            if not os.path.exists(csv_folder):
-                QMessageBox.warning(self, "警告", "CSVフォルダが見つかりません。先にCSVを生成してください。")
-                return
-            
-            # 最新のCSVフォルダを取得
-            csv_dirs = [d for d in os.listdir(csv_folder) if os.path.isdir(os.path.join(csv_folder, d))]
-            if not csv_dirs:
-                QMessageBox.warning(self, "警告", "CSVファイルが見つかりません")
-                return
-            
-            latest_dir = os.path.join(csv_folder, sorted(csv_dirs)[-1])
-            
-            # SFTP接続
-            sftp, transport = self.connect_sftp_with_retry()
-            
-            try:
-                # CSVファイルをアップロード（順番通り）
-                csv_files = [
-                    ("rakuten_normal-item.csv", "normal-item.csv"),
-                    ("rakuten_item-cat.csv", "item-cat.csv")
-                ]
-                
-                sftp.chdir("/ritem/batch")
-                
-                for local_name, remote_name in csv_files:
-                    local_path = os.path.join(latest_dir, local_name)
-                    if os.path.exists(local_path):
-                        self.log_message(f"{local_name} をアップロード中...")
-                        # ファイルサイズを確認
-                        file_size = os.path.getsize(local_path)
-                        uploaded = 0
-                        
-                        # プログレスバー更新用のコールバック
-                        def progress_callback(transferred, total):
-                            percent = int((transferred / total) * 100)
-                            self.progress_bar.setValue(percent)
-                            QApplication.processEvents()
-                        
-                        # ファイルをアップロード
-                        with open(local_path, 'rb') as f:
-                            sftp.putfo(f, remote_name, callback=progress_callback)
-                        
-                        self.log_message(f"{remote_name} としてアップロード完了")
-                    else:
-                        self.log_message(f"{local_name} が見つかりません", "WARNING")
-                
-                self.log_message("CSVアップロードが完了しました")
-                
-            except Exception as e:
-                # エラー時に再接続を試みる
-                if "Connection" in str(e) or "timed out" in str(e):
-                    self.log_message("接続が切れました。再接続します...", "WARNING")
-                    sftp.close()
-                    transport.close()
-                    # 再度接続して続きから実行
-                    self.upload_csv_to_rakuten()
-                    return
-                else:
-                    raise e
-            finally:
-                sftp.close()
-                transport.close()
-                
+            csv_dir = latest_csv_run() if csv else None
+            image_folder = getattr(self, 'rakuten_image_folder', None) if images else None
+            if not csv_dir and not image_folder:
+                QMessageBox.warning(self, "警告", "アップロードするCSV・画像フォルダがありません")
+                return None
+            host, user, _ = self.ftp_connection_settings()
+            with span("transfer_plan"):
+                plan = plan_upload(host, csv_dir, image_folder,
+                                   CabinetInventory(host, user) if image_folder else None)
         except Exception as e:
-            QMessageBox.critical(self, "エラー", f"CSVアップロードに失敗しました: {str(e)}")
+            QMessageBox.critical(self, "エラー", f"見積もりに失敗しました: {str(e)}")
+            return None
+        text = describe_plan(plan)
+        self.log_message("アップロードの見積もり: " + text.replace("\n", " / "))
+        QMessageBox.information(self, "アップロードの見積もり", text)
+        return plan
     
-    def upload_images_to_rakuten(self):
-        """楽天へ画像アップロード"""
+    def start_rakuten_upload(self, csv=True, images=True):
+        """楽天へのCSV・画像を転送キューに追加し、転送スレッドが止まっていれば開始（進捗はキュー全体で表示）"""
+        from cabinet_inventory import CabinetInventory
         try:
-            # 楽天用画像フォルダをチェック
-            if not hasattr(self, 'rakuten_image_folder') or not self.rakuten_image_folder:
-                QMessageBox.warning(self, "警告", "画像フォルダが設定されていません")
+            csv_dir = None
+            if csv:
+                # 最新のCSVフォルダを取得
+                with span("csv_listdir"):
+                    csv_dir = latest_csv_run()
+                if csv_dir is None:
+                    QMessageBox.warning(self, "警告", "CSVファイルが見つかりません。先にCSVを生成してください。")
+                    return None
+            
+            image_folder = None
+            if images:
+                # 楽天用画像フォルダをチェック
+                image_folder = getattr(self, 'rakuten_image_folder', None)
+                if not image_folder:
+                    QMessageBox.warning(self, "警告", "画像フォルダが設定されていません")
+                    return None
+            
+            # 接続先は画面スレッドで確定してから渡す
+            connection = self.ftp_connection_settings()
+            
+            # CSVは画像の一括アップロードより先に転送（item-cat.csvはnormal-item.csvの完了後）
+            jobs = self.transfer_queue.add_rakuten_csv(csv_dir, PRIORITY_NORMAL, self.log_message) if csv_dir else []
+            if image_folder:
+                # アップロード済みの画像は保存済みの一覧で除外
+                jobs += self.transfer_queue.add_images(image_folder, PRIORITY_BULK, CabinetInventory(*connection[:2]))
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"アップロードの準備に失敗しました: {str(e)}")
+            return None
+        
+        if not jobs and self.upload_worker is not None and self.upload_worker.isRunning():
+            QMessageBox.information(self, "情報", "アップロード対象のファイルはすべて転送キューにあります（実行中です）")
+            return self.upload_worker
+        self.log_message(f"転送キューに {len(jobs)}件を追加しました")
+        self.transfer_queue.save()
+        if self.upload_worker is not None and self.upload_worker.isRunning():
+            # 実行中の転送スレッドがそのまま処理する
+            self.progress_bus.add_total(sum(job.size for job in jobs), len(jobs))
+            self.refresh_queue_view()
+            return self.upload_worker
+        return self.start_transfer_worker(connection)
+    
+    def start_transfer_worker(self, connection=None):
+        """転送スレッドが止まっていれば、待機中のジョブの転送を開始"""
+        if self.upload_worker is not None and self.upload_worker.isRunning():
+            return self.upload_worker
+        pending = [job for job in self.transfer_queue.ordered() if job.state == QUEUED and not job.paused]
+        if not pending:
+            return None
+        connection = connection or self.ftp_connection_settings()
+        self.transfer_done_before = self.transfer_queue.counts()["done"]
+        self.progress_bus.begin(sum(job.size for job in pending), len(pending), "楽天アップロード")
+        profile_name = self.transfer_profile
+        self.upload_worker = TaskWorker(lambda progress: self.run_transfer_queue(connection, profile_name), self)
+        self.upload_worker.result_ready.connect(self.on_transfer_queue_result)
+        self.upload_worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "エラー", f"アップロードに失敗しました: {message}"))
+        self.upload_worker.finished.connect(self.on_rakuten_upload_finished)
+        self.progress_timer.start()
+        self.upload_worker.start()
+        return self.upload_worker
+    
+    def run_transfer_queue(self, connection, profile_name):
+        """転送キューの処理（バックグラウンドスレッドで実行）"""
+        host, user, password = connection
+        with trace_run("rakuten_upload", profile=profile_name):
+            return self.transfer_queue.run(host, user, password, profile_name,
+                                           progress=self.progress_bus, log=self.log_message)
+    
+    def on_transfer_queue_result(self, failed):
+        """転送キューの結果を表示"""
+        progressed = self.transfer_queue.counts()["done"] > self.transfer_done_before
+        if progressed:
+            self.reconnect_backoff.reset()
+        if self.transfer_queue.offline:
+            if not progressed:
+                # 届くのに接続できない状態が続く場合は、パスワードの試行を繰り返さないよう自動再開をやめる
+                self.reconnect_backoff.record_failed_connect()
+            if self.reconnect_backoff.exhausted:
+                self.log_message(f"SFTPサーバーに{self.reconnect_backoff.failed_cycles}回続けて接続できなかったため、"
+                                 "自動での再開を停止しました", "ERROR")
+                QMessageBox.warning(self, "警告", "SFTPサーバーに接続できない状態が続いています。\n"
+                                    "未転送のファイルは転送キューに残っています。接続を確認してから再度アップロードしてください。")
                 return
-            
-            # SFTP接続
-            sftp, transport = self.connect_sftp_with_retry()
-            
+            self.log_message(f"未転送の {len(self.transfer_queue.pending())}件を保存しました。"
+                             "接続が回復したら自動で転送します", "WARNING")
+            self.watch_connectivity()
+            return
+        if self.transfer_queue.auth_failed:
+            QMessageBox.warning(self, "警告", "SFTPの認証に失敗しました。パスワードを確認してください。\n"
+                                "未転送のファイルは転送キューに残っています。")
+            return
+        counts = self.transfer_queue.counts()
+        self.log_message(f"アップロード完了: 完了 {counts['done']}件 / スキップ {counts['skipped']}件 / "
+                         f"キャンセル {counts['cancelled']}件 / 失敗 {counts['failed']}件")
+        self.poll_batch_results()
+        if failed:
+            names = "\n".join(job.name for job in failed[:20])
+            QMessageBox.warning(self, "警告", f"{len(failed)}件のファイルが正しくアップロードできませんでした:\n{names}")
+    
+    def poll_batch_results(self):
+        """アップロードしたCSVを楽天が処理した結果（エラーレポート）をバックグラウンドで確認（確認中に完了したCSVは次回）"""
+        from batch_results import BatchResultPoller
+        jobs = [job for job in self.transfer_queue.jobs.values()
+                if job.kind == "csv" and job.state == "done" and job.id not in self.batch_polled_jobs]
+        if not jobs or (self.batch_poll_worker is not None and self.batch_poll_worker.isRunning()):
+            return
+        self.batch_polled_jobs.update(job.id for job in jobs)
+        connection = self.ftp_connection_settings()
+        poller = BatchResultPoller(lambda: self.connect_sftp_with_retry(connection),
+                                   [(job.local_path, job.name, job.report_baseline) for job in jobs],
+                                   log=self.log_message,
+                                   download_dir=jobs[0].local_path.parent / "rakuten_results")
+        stop_event = self.connectivity_stop
+        self.log_message("楽天の処理結果の確認を開始します")
+        self.batch_poll_worker = TaskWorker(lambda progress: poller.run(stop_event), self)
+        self.batch_poll_worker.result_ready.connect(self.on_batch_results)
+        self.batch_poll_worker.failed.connect(
+            lambda message: self.log_message(f"楽天の処理結果を確認できませんでした: {message}", "ERROR"))
+        self.batch_poll_worker.start()
+    
+    def on_batch_results(self, results):
+        """楽天の処理結果を表示（エラーは商品コードごと）"""
+        from batch_results import FAILED, SUCCEEDED
+        failed = {name: result for name, result in results.items() if result["state"] == FAILED}
+        for name, result in results.items():
+            for error in result["errors"]:
+                line = f"{error['line']}行目 " if error["line"] else ""
+                self.log_message(f"✗ {name} {line}{error['code'] or '(商品コード不明)'}: {error['message']}", "WARNING")
+            if result["state"] == SUCCEEDED:
+                self.log_message(f"✓ {name} は楽天で正常に処理されました")
+        if failed:
+            codes = sorted({error["code"] for result in failed.values() for error in result["errors"] if error["code"]})
+            QMessageBox.warning(self, "楽天一括処理エラー",
+                                f"{', '.join(failed)} の処理でエラーがありました（{len(codes)}商品）。\n"
+                                f"{', '.join(codes[:20])}{' ...' if len(codes) > 20 else ''}\n\n"
+                                "詳細はログとCSVフォルダの rakuten_results を確認してください")
+        # 確認中に転送が完了したCSV
+        self.poll_batch_results()
+    
+    def restore_transfer_queue(self):
+        """前回までに転送できなかったジョブを読み込み、接続できるようになったら転送"""
+        from cabinet_inventory import CabinetInventory
+        try:
+            restored = self.transfer_queue.load(self.log_message)
+        except Exception as e:
+            self.log_message(f"転送キューの復元に失敗しました: {str(e)}", "WARNING")
+            return
+        if restored:
+            host, user, _ = self.ftp_connection_settings()
+            self.transfer_queue.inventory = CabinetInventory(host, user)
+            self.log_message(f"未転送のファイル {restored}件を転送キューに復元しました")
+            self.refresh_queue_view()
+            self.watch_connectivity()
+    
+    def watch_connectivity(self):
+        """SFTPサーバーに届くようになるまで間隔を広げながら確認し、届いたら転送キューを再開"""
+        from connectivity import wait_until_reachable
+        if self.connectivity_worker is not None and self.connectivity_worker.isRunning():
+            return
+        host, _, _ = self.ftp_connection_settings()
+        stop_event = self.connectivity_stop
+        backoff = self.reconnect_backoff
+        self.connectivity_worker = TaskWorker(
+            lambda progress: wait_until_reachable(host, stop_event=stop_event, log=self.log_message, backoff=backoff),
+            self)
+        self.connectivity_worker.result_ready.connect(
+            lambda reachable: self.start_transfer_worker() if reachable else None)
+        self.connectivity_worker.start()
+    
+    def selected_jobs(self):
+        """転送キューの表で選択されているジョブ"""
+        rows = {index.row() for index in self.queue_table.selectionModel().selectedRows()}
+        return [self.queue_table.item(row, 0).data(Qt.UserRole) for row in sorted(rows)]
+    
+    def update_selected_jobs(self, action):
+        """選択したジョブに操作を適用"""
+        for job in self.selected_jobs():
+            if job.state not in FINISHED_STATES:
+                action(job)
+        self.refresh_queue_view()
+        # 保留を解除したジョブは転送スレッドが止まっていれば開始
+        if not self.transfer_queue.paused:
+            self.start_transfer_worker()
+    
+    def retry_failed_transfers(self):
+        """失敗したジョブを再転送"""
+        count = self.transfer_queue.retry_failed()
+        if count:
+            self.log_message(f"失敗した {count}件を再転送します")
+            self.transfer_queue.save()
+            self.start_transfer_worker()
+        self.refresh_queue_view()
+    
+    def toggle_queue_pause(self):
+        """転送キュー全体の一時停止・再開（転送中のファイルは最後まで送る）"""
+        if self.transfer_queue.paused:
+            self.transfer_queue.resume()
+            self.queue_pause_btn.setText("⏸️ 一時停止")
+            self.log_message("転送を再開しました")
+            self.start_transfer_worker()
+        else:
+            self.transfer_queue.pause()
+            self.queue_pause_btn.setText("▶️ 再開")
+            self.log_message("転送を一時停止しました")
+        self.refresh_queue_view()
+    
+    def cancel_all_transfers(self):
+        """待機中・転送中のジョブをすべてキャンセル"""
+        reply = QMessageBox.question(self, "確認", "転送キューのファイルをすべてキャンセルしますか？")
+        if reply == QMessageBox.Yes:
+            self.transfer_queue.cancel_all()
+            self.queue_pause_btn.setText("⏸️ 一時停止")
+            self.refresh_queue_view()
+    
+    def closeEvent(self, event):
+        """終了時に接続の確認を止め、未完了の転送キューを保存"""
+        self.connectivity_stop.set()
+        try:
+            self.transfer_queue.save()
+        except Exception as e:
+            self.log_message(f"転送キューの保存に失敗しました: {str(e)}", "WARNING")
+        super().closeEvent(event)
+    
+    def refresh_queue_view(self):
+        """転送キューの表を更新（変化が無ければ何もしない、表示は先頭200件まで）"""
+        if not hasattr(self, 'queue_table') or self.transfer_queue.version == self.queue_view_version:
+            return
+        self.queue_view_version = self.transfer_queue.version
+        jobs = self.transfer_queue.ordered()
+        counts = self.transfer_queue.counts()
+        summary = " / ".join(f"{STATE_LABELS[state]} {count}件" for state, count in counts.items() if count)
+        if self.transfer_queue.paused:
+            summary = f"⏸️ 一時停止中  {summary}"
+        self.queue_summary_label.setText(summary or "転送待ちはありません")
+        
+        priority_labels = {PRIORITY_URGENT: "優先", PRIORITY_NORMAL: "通常", PRIORITY_BULK: "一括"}
+        shown = jobs[:200]
+        self.queue_table.setUpdatesEnabled(False)
+        self.queue_table.setRowCount(len(shown))
+        for row, job in enumerate(shown):
+            state = STATE_LABELS[job.state] + ("（保留）" if job.paused and job.state == QUEUED else "")
+            if job.state == RUNNING and job.cancel_requested:
+                state = "キャンセル中"
+            values = [state, job.name, "CSV" if job.kind == "csv" else "画像",
+                      priority_labels.get(job.priority, str(job.priority)),
+                      f"{job.size / 1024:.0f}KB", str(job.attempts)]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setData(Qt.UserRole, job)
+                    if job.error:
+                        item.setToolTip(job.error)
+                self.queue_table.setItem(row, column, item)
+        self.queue_table.setUpdatesEnabled(True)
+    
+    def reconcile_cabinet(self):
+        """R-Cabinetの一覧を差分更新し、ローカルの画像フォルダと照合"""
+        from cabinet_inventory import CabinetInventory
+        from sftp_transfer import list_images
+        if self.inventory_worker is not None and self.inventory_worker.isRunning():
+            return
+        image_folder = getattr(self, 'rakuten_image_folder', None)
+        if not image_folder:
+            QMessageBox.warning(self, "警告", "画像フォルダが設定されていません")
+            return
+        
+        connection = self.ftp_connection_settings()
+        inventory = CabinetInventory(*connection[:2])
+        
+        def run_reconcile(progress):
+            sftp, transport = self.connect_sftp_with_retry(connection)
             try:
-                sftp.chdir("/cabinet/images")
-                
-                # 画像ファイルをアップロード
-                image_folder = self.rakuten_image_folder
-                image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
-                uploaded_count = 0
-                
-                for file in Path(image_folder).iterdir():
-                    if file.suffix.lower() in image_extensions:
-                        self.log_message(f"{file.name} をアップロード中...")
-                        sftp.put(str(file), file.name)
-                        uploaded_count += 1
-                
-                self.log_message(f"画像アップロード完了: {uploaded_count}ファイル")
-                
+                with timed_operation("cabinet_inventory_refresh") as operation:
+                    stats = inventory.refresh(sftp)
+                    operation.files = stats["files"]
             finally:
                 sftp.close()
                 transport.close()
-                
-        except Exception as e:
-            QMessageBox.critical(self, "エラー", f"画像アップロードに失敗しました: {str(e)}")
+            inventory.save()
+            self.log_message(f"R-Cabinet一覧を更新: {stats['files']}ファイル "
+                             f"({stats['listed']}フォルダ取得 / {stats['reused']}フォルダ変更なし)")
+            return inventory.reconcile(list_images(image_folder))
+        
+        self.reconcile_btn.setEnabled(False)
+        self.inventory_worker = TaskWorker(run_reconcile, self)
+        self.inventory_worker.result_ready.connect(self.on_reconcile_finished)
+        self.inventory_worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "エラー", f"R-Cabinetとの照合に失敗しました: {message}"))
+        self.inventory_worker.finished.connect(lambda: self.reconcile_btn.setEnabled(True))
+        self.inventory_worker.start()
+    
+    def on_reconcile_finished(self, result):
+        """照合結果を表示"""
+        for path in result["missing"]:
+            self.log_message(f"未アップロード: {path.name}", "WARNING")
+        for path in result["changed"]:
+            self.log_message(f"変更あり（サイズ・更新時刻）: {path.name}", "WARNING")
+        for name in result["orphans"]:
+            self.log_message(f"ローカルに無い画像: {name}")
+        summary = (f"アップロード済み {len(result['present'])}件\n"
+                   f"未アップロード {len(result['missing'])}件\n"
+                   f"変更あり {len(result['changed'])}件\n"
+                   f"ローカルに無い画像 {len(result['orphans'])}件")
+        self.log_message("R-Cabinet照合: " + summary.replace("\n", " / "))
+        QMessageBox.information(self, "R-Cabinet照合", summary + "\n\n詳細はログを確認してください")
+    
+    def on_transfer_profile_changed(self, index):
+        """転送プロファイルの変更"""
+        self.transfer_profile = self.transfer_profile_combo.itemData(index)
+        self.log_message(f"転送プロファイル: {self.transfer_profile_combo.itemText(index)}")
+    
+    def benchmark_transfer_profiles(self):
+        """各転送プロファイルを実測し、最速のものを選択"""
+        from sftp_transfer import benchmark_profiles, check_scratch_dir
+        if self.benchmark_worker is not None and self.benchmark_worker.isRunning():
+            return
+        remote_dir, ok = QInputDialog.getText(
+            self, "計測用フォルダ", "テストファイルを送信・削除する作業フォルダ（/ritem・/cabinet 以外）:",
+            text=self.benchmark_remote_dir)
+        if not ok:
+            return
+        try:
+            remote_dir = check_scratch_dir(remote_dir)
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+        reply = QMessageBox.question(
+            self, "確認",
+            f"各転送プロファイルで4MBのテストファイル2種類を {remote_dir} に送信・削除して速度を計測します。\n実行しますか？")
+        if reply != QMessageBox.Yes:
+            return
+        self.benchmark_remote_dir = remote_dir
+        
+        host, user, password = self.ftp_connection_settings()
+        self.benchmark_btn.setEnabled(False)
+        self.benchmark_btn.setText("⏱️ 計測中...")
+        self.benchmark_worker = TaskWorker(
+            lambda progress: benchmark_profiles(host, user, password, remote_dir, log=self.log_message), self)
+        self.benchmark_worker.result_ready.connect(self.on_benchmark_finished)
+        self.benchmark_worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "エラー", f"転送プロファイルの計測に失敗しました: {message}"))
+        self.benchmark_worker.finished.connect(self.reset_benchmark_button)
+        self.benchmark_worker.start()
+    
+    def reset_benchmark_button(self):
+        """計測ボタンを元に戻す"""
+        self.benchmark_btn.setText("⏱️ 計測して選択")
+        self.benchmark_btn.setEnabled(True)
+    
+    def on_benchmark_finished(self, result):
+        """最速のプロファイルを選択して保存"""
+        best, _ = result
+        self.transfer_profile_combo.setCurrentIndex(self.transfer_profile_combo.findData(best))
+        self.save_settings()
+    
+    def diagnose_sftp_connection(self):
+        """SFTP接続の各段階を計測し、過去の診断結果と比較して表示"""
+        from sftp_diagnostics import diagnose, load_history, save_result
+        if self.diagnostics_worker is not None and self.diagnostics_worker.isRunning():
+            return
+        host, user, password = self.ftp_connection_settings()
+        if not host or not user:
+            QMessageBox.warning(self, "警告", "SFTPサーバーとユーザーを入力してください")
+            return
+        
+        def run(progress):
+            history = load_history(host)
+            result = diagnose(host, user, password, profile_name=self.transfer_profile, log=self.log_message)
+            save_result(result)
+            return result, history
+        
+        self.diagnose_btn.setEnabled(False)
+        self.diagnose_btn.setText("🩺 診断中...")
+        self.diagnostics_worker = TaskWorker(run, self)
+        self.diagnostics_worker.result_ready.connect(self.on_diagnostics_finished)
+        self.diagnostics_worker.failed.connect(
+            lambda message: QMessageBox.critical(self, "エラー", f"接続診断に失敗しました: {message}"))
+        self.diagnostics_worker.finished.connect(self.reset_diagnose_button)
+        self.diagnostics_worker.start()
+    
+    def reset_diagnose_button(self):
+        """診断ボタンを元に戻す"""
+        self.diagnose_btn.setText("🩺 接続診断")
+        self.diagnose_btn.setEnabled(True)
+    
+    def on_diagnostics_finished(self, outcome):
+        """診断結果をログとダイアログに表示"""
+        from sftp_diagnostics import describe_result
+        result, history = outcome
+        summary = describe_result(result, history)
+        self.log_message("接続診断: " + summary.replace("\n", " / "),
+                         "WARNING" if result["failed_phase"] else "INFO")
+        if result["failed_phase"]:
+            QMessageBox.warning(self, "接続診断", summary)
+        else:
+            QMessageBox.information(self, "接続診断", summary)
+    
+    def on_rakuten_upload_finished(self):
+        """アップロード終了時に最終の進捗を表示"""
+        self.progress_bus.finish()
+        self.progress_timer.stop()
+        self.refresh_progress()
+        self.refresh_queue_view()
+    
+    def refresh_progress(self):
+        """進捗を進捗バーとステータスバーに反映（変化が無ければ何もしない）"""
+        snapshot = self.progress_bus.snapshot()
+        if snapshot["version"] == self.progress_version:
+            return
+        self.progress_version = snapshot["version"]
+        text = describe(snapshot)
+        self.progress_bar.setValue(snapshot["percent"])
+        self.progress_bar.setFormat(f"%p%  {text}")
+        self.statusBar().showMessage(f"{snapshot['label']}: {text}")
             
     def update_yahoo_url(self):
         """選択された店舗のURLを更新"""
@@ -1898,52 +2713,122 @@ class IntegratedECTool(QMainWindow):
         self.yahoo_browser.load(QUrl(url))
         self.log_message(f"Yahooショッピング {self.yahoo_store_combo.currentText()} を読み込みました")
     
+    def find_latest_yahoo_csv_dir(self):
+        """Yahoo用CSVの最新出力フォルダを取得（見つからない場合は警告してNone）"""
+        csv_folder = find_csv_root()
+        if csv_folder is None:
+            QMessageBox.warning(self, "警告", "CSVフォルダが見つかりません")
+            return None
+        
+        latest_dir = latest_csv_run(csv_folder)
+        if latest_dir is None:
+            QMessageBox.warning(self, "警告", "CSVファイルが見つかりません")
+            return None
+        
+        return str(latest_dir)
+    
     def prepare_yahoo_csv(self):
-        """Yahoo用CSVファイルを確認してフォルダを開く"""
+        """1号店・2号店・ヤフオクのCSVを一括で検証し、店舗別フォルダに準備"""
         try:
-            # CSVフォルダを確認
-            csv_folder = os.path.join(os.path.dirname(__file__), "CSVTOOL")
-            if not os.path.exists(csv_folder):
-                csv_folder = os.path.join(os.environ['USERPROFILE'], 'Desktop', 'CSVTOOL')
-            
-            if not os.path.exists(csv_folder):
-                QMessageBox.warning(self, "警告", "CSVフォルダが見つかりません")
+            latest_dir = self.find_latest_yahoo_csv_dir()
+            if not latest_dir:
+                return None
+            
+            with timed_operation("yahoo_prepare", run=os.path.basename(latest_dir)) as operation:
+                bundles = prepare_yahoo_bundles(latest_dir)
+                staged = [f for bundle in bundles.values() for f in bundle["files"] if f["staged_path"]]
+                operation.files = len(staged)
+                operation.bytes = sum(f["size"] for f in staged)
+            for bundle in bundles.values():
+                for file_result in bundle["files"]:
+                    if file_result["error"]:
+                        self.log_message(f"{bundle['label']}: {file_result['name']} {file_result['error']}", "WARNING")
+                if bundle["ok"]:
+                    names = ", ".join(f"{f['name']}({f['rows']}行)" for f in bundle["files"])
+                    self.log_message(f"{bundle['label']}: CSVファイル確認完了: {names}")
+            
+            # フォルダを開く（すべて検証エラーの場合は作成されない）
+            upload_dir = os.path.join(latest_dir, "yahoo_upload")
+            if sys.platform == "win32" and os.path.isdir(upload_dir):
+                os.startfile(upload_dir)
+            
+            return bundles
+                
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"CSV確認に失敗しました: {str(e)}")
+            return None
+    
+    def auto_upload_yahoo_csv(self):
+        """1号店・2号店のCSVをストアクリエイターProへ続けて自動アップロード"""
+        if self.yahoo_automation is not None and self.yahoo_automation.is_running():
+            QMessageBox.information(self, "情報", "自動アップロードを実行中です")
+            return
+        
+        try:
+            latest_dir = self.find_latest_yahoo_csv_dir()
+            if not latest_dir:
                 return
-            
-            # 最新のCSVフォルダを取得
-            csv_dirs = [d for d in os.listdir(csv_folder) if os.path.isdir(os.path.join(csv_folder, d))]
-            if not csv_dirs:
-                QMessageBox.warning(self, "警告", "CSVファイルが見つかりません")
+            bundles = prepare_yahoo_bundles(latest_dir)
+            
+            form_spec = self.read_settings_file().get("yahoo_upload_form")
+            from yahoo_upload import YahooUploadAutomation
+            self.yahoo_automation = YahooUploadAutomation(self.yahoo_browser, form_spec, parent=self)
+            self.yahoo_automation.job_started.connect(
+                lambda job: self.log_message(f"Yahoo {job.store}: {job.name} をアップロード中..."))
+            self.yahoo_automation.job_finished.connect(self.on_yahoo_upload_job_finished)
+            self.yahoo_automation.all_finished.connect(self.on_yahoo_upload_finished)
+            
+            # フォームが設定されていない種類のファイルがあれば、一部の店舗・種類だけ送ることになるため開始しない
+            unconfigured = [f for store in ("taiho-kagu", "taiho-kagu2") for f in bundles[store]["files"]
+                            if not f["error"] and not self.yahoo_automation.can_upload(f["kind"])]
+            if unconfigured:
+                for file_result in unconfigured:
+                    self.log_message(f"{file_result['name']}: アップロードフォームが設定されていません"
+                                     f"（設定ファイルの yahoo_upload_form.{file_result['kind']}）", "WARNING")
+                QMessageBox.critical(self, "エラー",
+                                     "アップロードフォームが設定されていないファイルがあるため自動アップロードを中止しました:\n" +
+                                     "\n".join(f["name"] for f in unconfigured))
                 return
             
-            latest_dir = os.path.join(csv_folder, sorted(csv_dirs)[-1])
-            
-            # 出力されたCSVファイルを確認
-            csv_files = []
-            if self.yahoo_store_combo.currentIndex() == 0:
-                # 1号店とヤフオク
-                csv_files = ["yahoo_item.csv", "yahoo_option.csv", "yahoo_auction_item.csv", "yahoo_auction_option.csv"]
-            else:
-                # 2号店
-                csv_files = ["yahoo2_item.csv", "yahoo2_option.csv"]
+            # 店舗ごとに商品データ → オプションデータの順（検証済みのファイルのみ）
+            for store in ("taiho-kagu", "taiho-kagu2"):
+                for file_result in bundles[store]["files"]:
+                    if file_result["error"]:
+                        self.log_message(f"{file_result['name']}: {file_result['error']}（スキップします）", "WARNING")
+                    else:
+                        self.yahoo_automation.enqueue(store, file_result["kind"], file_result["staged_path"])
             
-            # ファイル存在確認
-            missing_files = []
-            for csv_file in csv_files:
-                if not os.path.exists(os.path.join(latest_dir, csv_file)):
-                    missing_files.append(csv_file)
+            if not self.yahoo_automation.queue:
+                QMessageBox.warning(self, "警告", "アップロードするYahoo用CSVがありません")
+                return
             
-            if missing_files:
-                self.log_message(f"警告: {', '.join(missing_files)} が見つかりません", "WARNING")
-            else:
-                self.log_message(f"CSVファイル確認完了: {', '.join(csv_files)}")
+            # 画面上でクリック操作を行うためストアクリエイターを表示しておく
+            self.tabs.setCurrentWidget(self.upload_tab_widget)
+            self.upload_tabs.setCurrentWidget(self.yahoo_upload_widget)
+            self.yahoo_automation.start()
             
-            # フォルダを開く
-            if sys.platform == "win32":
-                os.startfile(latest_dir)
-                
         except Exception as e:
-            QMessageBox.critical(self, "エラー", f"CSV確認に失敗しました: {str(e)}")
+            QMessageBox.critical(self, "エラー", f"自動アップロードを開始できませんでした: {str(e)}")
+    
+    def on_yahoo_upload_job_finished(self, job):
+        """自動アップロード1件分の結果"""
+        log_operation("yahoo_csv_upload", job.duration * 1000, os.path.getsize(job.path), 1,
+                      store=job.store, file=job.name, status=job.status)
+        if job.status == "success":
+            self.log_message(f"Yahoo {job.store}: {job.name} アップロード完了 ({job.duration:.1f}秒) {job.message}")
+        else:
+            self.log_message(f"Yahoo {job.store}: {job.name} アップロード失敗: {job.message}", "ERROR")
+    
+    def on_yahoo_upload_finished(self, results):
+        """自動アップロード全体の結果"""
+        failed = [job for job in results if job.status != "success"]
+        summary = f"成功 {len(results) - len(failed)}件 / 失敗 {len(failed)}件"
+        self.log_message(f"Yahoo自動アップロード終了: {summary}")
+        if failed:
+            QMessageBox.warning(self, "Yahoo自動アップロード", summary + "\n\n" +
+                                "\n".join(f"{job.store} {job.name}: {job.message}" for job in failed))
+        else:
+            QMessageBox.information(self, "Yahoo自動アップロード", summary)
     
     def open_output_folder(self):
         """出力フォルダを開く"""
@@ -1958,19 +2843,96 @@ class IntegratedECTool(QMainWindow):
             subprocess.call(["open", output_path])
             
     def check_pages(self):
-        """ページ確認"""
-        urls = self.url_list.toPlainText().strip().split('\n')
-        self.check_result.clear()
-        
-        for url in urls:
-            if url.strip():
-                # TODO: 実際のページチェック処理
-                self.check_result.append(f"✓ {url} - OK")
+        """ページ確認（オフスクリーンでJS実行後の価格・在庫を取得）"""
+        urls = []
+        for i in range(self.url_list_widget.count()):
+            text = self.url_list_widget.item(i).text()
+            if ": " in text:
+                urls.append(text.split(": ", 1)[1])
+        
+        if not urls:
+            QMessageBox.information(self, "情報", "確認するURLがありません。商品コードを入力してください。")
+            return
+        
+        if self.render_pool is None:
+            from web_pages import RenderPagePool
+            self.render_pool = RenderPagePool(
+                size=self.render_pool_size,
+                profile=self.web_profile(),
+                memory_budget_mb=self.render_memory_budget_mb,
+                parent=self
+            )
+            self.render_pool.result_ready.connect(self.on_render_result)
+            self.render_pool.queue_finished.connect(
+                lambda: self.log_message("レンダリング確認が完了しました"))
+        
+        self.check_result.append(f"レンダリング確認を開始: {len(urls)}件 (並列数 {self.render_pool.size})")
+        self.render_pool.enqueue(urls)
+    
+    def on_render_result(self, url, ok, data):
+        """レンダリング確認結果の表示"""
+        if ok:
+            price = data.get("price") or "-"
+            availability = data.get("availability") or "-"
+            latency_ms = data.get("load_ms", 0)
+            self.check_result.append(f"✓ {url} - 価格: {price} 在庫: {availability} ({latency_ms:.0f}ms)")
+            self.record_page_load_latency(url, latency_ms)
+        else:
+            reason = "タイムアウト" if data.get("error") == "timeout" else "読み込み失敗"
+            self.check_result.append(f"✗ {url} - {reason}")
+            self.log_message(f"レンダリング確認失敗: {url} ({reason})", "WARNING")
                 
-    def auto_execute_workflow(self):
-        """ワークフロー自動実行"""
-        self.log_message("ワークフローの自動実行を開始します")
-        # TODO: 各ステップの自動実行
+    def verify_uploaded_pages(self):
+        """最新CSVの全商品について公開ページの価格・商品名・在庫を照合"""
+        if self.verify_worker is not None and self.verify_worker.isRunning():
+            QMessageBox.information(self, "情報", "照合を実行中です")
+            return
+        
+        latest_dir = latest_csv_run()
+        if latest_dir is None:
+            QMessageBox.warning(self, "警告", "CSVファイルが見つかりません")
+            return
+        
+        self.check_result.append(f"公開ページ照合を開始: {latest_dir.name}")
+        self.verify_btn.setEnabled(False)
+        
+        def run_verify(progress):
+            with timed_operation("page_verify", run=latest_dir.name) as operation:
+                results = verify_products(latest_dir, progress=progress)
+                operation.files = len(results)
+            return results
+        
+        self.verify_worker = TaskWorker(run_verify, self)
+        self.verify_worker.progress.connect(
+            lambda done, total: self.verify_btn.setText(f"🔍 照合中... {done}/{total}"))
+        self.verify_worker.result_ready.connect(self.on_verify_finished)
+        self.verify_worker.failed.connect(
+            lambda message: self.check_result.append(f"✗ 照合に失敗しました: {message}"))
+        self.verify_worker.finished.connect(self.reset_verify_button)
+        self.verify_worker.start()
+    
+    def reset_verify_button(self):
+        """照合ボタンを元に戻す"""
+        self.verify_btn.setText("🔍 CSVと公開ページを照合")
+        self.verify_btn.setEnabled(True)
+    
+    def on_verify_finished(self, results):
+        """照合結果を確認結果欄に表示"""
+        mismatched = [r for r in results if r["mismatches"]]
+        errors = [r for r in results if r["error"]]
+        for result in mismatched:
+            details = " / ".join(f"{field}: CSV={expected} ページ={actual}"
+                                 for field, expected, actual in result["mismatches"])
+            self.check_result.append(f"✗ {result['code']} [{STORE_LABELS[result['store']]}] {details}")
+        for result in errors:
+            self.check_result.append(f"⚠ {result['code']} [{STORE_LABELS[result['store']]}] 取得失敗: {result['error']}")
+        
+        unverified = [r for r in results if r["unverified"] and not r["error"]]
+        summary = (f"照合完了: {len(results)}件中 不一致 {len(mismatched)}件 / 取得失敗 {len(errors)}件 / "
+                   f"一部未確認 {len(unverified)}件")
+        self.check_result.append(summary)
+        self.log_message(summary, "WARNING" if mismatched or errors else "INFO")
+    
         
     def open_settings(self):
         """設定画面"""
@@ -1993,13 +2955,24 @@ class IntegratedECTool(QMainWindow):
         
     def save_settings(self):
         """設定保存"""
-        settings = {
+        host, user, _ = self.ftp_connection_settings()
+        # 画面に無い項目（yahoo_upload_form 等）は保持
+        settings = self.read_settings_file()
+        settings.update({
             "master_tool_path": self.master_tool_path,
-            "ftp_server": self.ftp_server_input.text(),
-            "ftp_user": self.ftp_user_input.text()
-        }
-        with open("integrated_tool_settings.json", "w") as f:
-            json.dump(settings, f)
+            "ftp_server": host,
+            "ftp_user": user,
+            "rakuten_image_folder": getattr(self, "rakuten_image_folder", None),
+            "render_pool_size": self.render_pool_size,
+            "render_memory_budget_mb": self.render_memory_budget_mb,
+            "web_cache_size_mb": self.web_cache_size_mb,
+            "lifecycle_grace_sec": self.lifecycle_grace_sec,
+            "web_memory_ceiling_mb": self.web_memory_ceiling_mb,
+            "prefetch_cache_size": self.prefetch_cache_size,
+            "transfer_profile": self.transfer_profile,
+            "benchmark_remote_dir": self.benchmark_remote_dir
+        })
+        write_settings(settings)
             
     def auto_generate_urls(self):
         """商品コード入力時の自動URL生成"""
@@ -2016,23 +2989,18 @@ class IntegratedECTool(QMainWindow):
             return
             
         # 10桁の数字なら自動でURL生成
-        urls = [
-            f"https://item.rakuten.co.jp/taiho-kagu/{product_code}/",
-            f"https://store.shopping.yahoo.co.jp/taiho-kagu/{product_code}.html", 
-            f"https://store.shopping.yahoo.co.jp/taiho-kagu2/{product_code}.html"
-        ]
+        urls = [template.format(code=product_code) for template in PRODUCT_PAGE_URLS.values()]
         
         # URLリストウィジェットに追加
         self.url_list_widget.clear()
-        for i, url in enumerate(urls):
-            store_name = ["楽天市場", "Yahoo 1号店", "Yahoo 2号店"][i]
-            self.url_list_widget.addItem(f"{store_name}: {url}")
+        for store, url in zip(PRODUCT_PAGE_URLS, urls):
+            self.url_list_widget.addItem(f"{STORE_LABELS[store]}: {url}")
         
         self.log_message(f"商品コード {product_code} のURLを生成しました")
         
-        # 最初のURLを自動読み込み
-        if urls:
-            self.load_page_by_url(urls[0])
+        # 全店舗のページを裏で先読みし、最初のURLを表示
+        self.prefetch_cache.prefetch(urls)
+        self.show_page(urls[0])
     
     def load_selected_page(self, item):
         """選択されたページを読み込み"""
@@ -2040,7 +3008,41 @@ class IntegratedECTool(QMainWindow):
         # "店舗名: URL" から URL部分を抽出
         if ": " in text:
             url = text.split(": ", 1)[1]
+            self.show_page(url)
+    
+    def show_page(self, url):
+        """先読み済みならページを差し替えて即表示、無ければ通常読み込み"""
+        page, request = self.prefetch_cache.take(url)
+        if page is None:
             self.load_page_by_url(url)
+            return
+        
+        if self.page_request is not None:
+            self.page_request.cancel()
+            self.page_request.deleteLater()
+        self.page_request = request  # 読み込み途中なら完了時に結果を表示
+        
+        old_page = self.page_browser.page()
+        keep_old_page = bool(self.page_browser_url) and old_page is not page
+        if keep_old_page and old_page.parent() is not self.prefetch_cache:
+            # ビュー所有のページはsetPageで破棄されるため、先にキャッシュの所有にしておく
+            old_page.setParent(self.prefetch_cache)
+        self.page_browser.setPage(page)
+        if keep_old_page:
+            self.prefetch_cache.put(self.page_browser_url, old_page)
+        self.page_browser_url = url
+        
+        display_url = url if len(url) <= 60 else url[:57] + "..."
+        self.current_url_label.setText(f"URL: {display_url}")
+        if request is None:
+            self.check_result.append(f"✓ {url} - 先読みキャッシュから表示")
+    
+    def on_prefetch_loaded(self, request):
+        """先読み完了時の処理"""
+        if request is self.page_request:
+            self.on_page_loaded(request)
+        elif request.ok:
+            self.record_page_load_latency(request.url, request.latency_ms or 0)
     
     def load_manual_url(self):
         """手動入力されたURLを読み込み"""
@@ -2054,28 +3056,53 @@ class IntegratedECTool(QMainWindow):
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
             
-            self.page_browser.load(QUrl(url))
+            # 前回の読み込みは結果を受け取らない（接続は読み込みごとに1つ）
+            if self.page_request is not None:
+                self.page_request.cancel()
+                self.page_request.deleteLater()
+            
+            from web_pages import PageLoadRequest
+            self.page_request = PageLoadRequest(self.page_browser.page(), url, self)
+            self.page_request.finished.connect(self.on_page_loaded)
+            self.page_request.start()
+            self.page_browser_url = url
+            
             # URLを短縮表示
             display_url = url if len(url) <= 60 else url[:57] + "..."
             self.current_url_label.setText(f"URL: {display_url}")
             self.log_message(f"ページを読み込み中: {url}")
             
-            # ページ読み込み完了を監視
-            self.page_browser.loadFinished.connect(self.on_page_loaded)
-            
         except Exception as e:
             self.log_message(f"ページ読み込みエラー: {str(e)}", "ERROR")
     
-    def on_page_loaded(self, success):
+    def on_page_loaded(self, request):
         """ページ読み込み完了時の処理"""
-        if success:
-            current_url = self.page_browser.url().toString()
-            self.check_result.append(f"✓ {current_url} - 読み込み成功")
-            self.log_message("ページ読み込み完了")
+        if request is self.page_request:
+            self.page_request = None
+        request.deleteLater()
+        
+        latency_ms = request.latency_ms or 0
+        log_operation("page_load", latency_ms, request.bytes, 1, url=request.url, ok=request.ok)
+        if request.ok:
+            size_kb = request.bytes / 1024
+            self.check_result.append(f"✓ {request.final_url} - 読み込み成功 ({latency_ms:.0f}ms, {size_kb:.0f}KB)")
+            self.log_message(f"ページ読み込み完了 ({latency_ms:.0f}ms)")
         else:
-            current_url = self.page_browser.url().toString()
-            self.check_result.append(f"✗ {current_url} - 読み込み失敗")
+            self.check_result.append(f"✗ {request.final_url} - 読み込み失敗 ({latency_ms:.0f}ms)")
             self.log_message("ページ読み込み失敗", "WARNING")
+        self.record_page_load_latency(request.url, latency_ms)
+    
+    def record_page_load_latency(self, url, latency_ms):
+        """URL別の読み込み時間を記録して一覧を更新"""
+        history = self.page_load_stats.setdefault(url, [])
+        history.append(latency_ms)
+        del history[:-20]  # 直近20回分のみ保持
+        
+        self.load_latency_list.clear()
+        for stat_url, values in self.page_load_stats.items():
+            average = sum(values) / len(values)
+            self.load_latency_list.addItem(
+                f"{values[-1]:6.0f}ms (平均 {average:.0f}ms, {len(values)}回) {stat_url}")
     
     def page_back(self):
         """ブラウザで戻る"""
@@ -2090,23 +3117,27 @@ class IntegratedECTool(QMainWindow):
         self.page_browser.reload()
     
     
+    @traced_run("workflow")
     def auto_execute_workflow(self):
         """ワークフロー自動実行"""
         self.log_message("ワークフローの自動実行を開始します")
+        self.progress_bar.setFormat("%p%")
         self.progress_bar.setValue(0)
         
         try:
             # 1. マスタ作成ツール起動
             if self.master_tool_path and os.path.exists(self.master_tool_path):
                 self.log_message("1. マスタ作成ツールを起動...")
-                work_dir = os.path.dirname(self.master_tool_path)
-                subprocess.Popen(self.master_tool_path, cwd=work_dir)
-                QMessageBox.information(self, "確認", "マスタ作成が完了したらOKを押してください")
+                with timed_operation("workflow.master"):
+                    work_dir = os.path.dirname(self.master_tool_path)
+                    subprocess.Popen(self.master_tool_path, cwd=work_dir)
+                    QMessageBox.information(self, "確認", "マスタ作成が完了したらOKを押してください")
                 self.progress_bar.setValue(15)
             
             # 2. CSV生成
             self.log_message("2. CSV生成を実行...")
-            self.generate_csv()
+            with timed_operation("workflow.csv"):
+                self.generate_csv()
             self.progress_bar.setValue(30)
             
             # 3. 画像準備確認
@@ -2120,13 +3151,21 @@ class IntegratedECTool(QMainWindow):
             reply = QMessageBox.question(self, "確認", "楽天市場へアップロードしますか？")
             if reply == QMessageBox.Yes:
                 self.log_message("4. 楽天市場へアップロード...")
-                self.upload_csv_to_rakuten()
-                self.upload_images_to_rakuten()
+                with timed_operation("workflow.rakuten_upload"):
+                    worker = self.start_rakuten_upload()
+                    if worker is not None:
+                        # 完了まで待機（待機中も画面は操作可能）
+                        loop = QEventLoop()
+                        worker.finished.connect(loop.quit)
+                        if not worker.isFinished():
+                            loop.exec_()
+                self.progress_bar.setFormat("%p%")
             self.progress_bar.setValue(70)
             
             # 5. Yahoo準備
             self.log_message("5. Yahoo用ファイル準備...")
-            self.prepare_yahoo_csv()
+            with timed_operation("workflow.yahoo_prepare"):
+                self.prepare_yahoo_csv()
             self.progress_bar.setValue(85)
             
             # 6. 完了
@@ -2138,17 +3177,30 @@ class IntegratedECTool(QMainWindow):
             self.log_message(f"エラー: {str(e)}", "ERROR")
             QMessageBox.critical(self, "エラー", f"処理中にエラーが発生しました: {str(e)}")
     
+    def read_settings_file(self):
+        """設定ファイルを辞書で取得（無い・壊れている場合は空）"""
+        return read_settings()
+    
     def load_settings(self):
         """設定読み込み"""
         try:
-            with open("integrated_tool_settings.json", "r") as f:
-                settings = json.load(f)
-                saved_path = settings.get("master_tool_path")
-                if saved_path and os.path.exists(saved_path):
-                    self.master_tool_path = saved_path
+            settings = self.read_settings_file()
+            self.render_pool_size = settings.get("render_pool_size", self.render_pool_size)
+            self.render_memory_budget_mb = settings.get("render_memory_budget_mb", self.render_memory_budget_mb)
+            saved_path = settings.get("master_tool_path")
+            if saved_path and os.path.exists(saved_path):
+                self.master_tool_path = saved_path
+                if hasattr(self, 'master_path_label'):
                     self.master_path_label.setText(self.master_tool_path)
-                self.ftp_server_input.setText(settings.get("ftp_server", "upload.rakuten.ne.jp"))
-                self.ftp_user_input.setText(settings.get("ftp_user", "taiho-kagu"))
+            image_folder = settings.get("rakuten_image_folder")
+            if image_folder and os.path.isdir(image_folder):
+                self.rakuten_image_folder = image_folder
+                if hasattr(self, 'rakuten_image_folder_label'):
+                    self.rakuten_image_folder_label.setText(f"📂 {image_folder}")
+            if hasattr(self, 'ftp_server_input'):
+                host, user = ftp_settings(settings)
+                self.ftp_server_input.setText(host)
+                self.ftp_user_input.setText(user)
         except:
             pass
 
@@ -2156,8 +3208,11 @@ def main():
     # 高DPI対応（QApplication作成前に設定）
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+    # QtWebEngineWidgetsをQApplication作成後に読み込むために必要
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
     
     app = QApplication(sys.argv)
+    mark_startup_phase("qapplication")
     
     # DPIスケールファクターを取得してフォントサイズを調整
     screen = app.primaryScreen()
@@ -2172,8 +3227,15 @@ def main():
     app.setFont(font)
     
     window = IntegratedECTool()
+    mark_startup_phase("window")
     window.showMaximized()  # デフォルトで最大化表示
+    mark_startup_phase("show")
     window.load_settings()
+    mark_startup_phase("settings")
+    # イベントループ開始後の最初の描画までを計測
+    QTimer.singleShot(0, window.report_startup)
+    # 前回転送できなかったファイルは起動後に復元
+    QTimer.singleShot(0, window.restore_transfer_queue)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ログ出力先 - 画面表示用の固定長リングバッファ・ローテーションするJSONLファイル
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from app_settings import DATA_DIR
+from metrics import metrics_registry
+from tracing import span
+
+LOGGER_NAME = "integrated_ec_tool"
+DEFAULT_LOG_DIR = DATA_DIR / "logs"
+LOG_FILE_NAME = "integrated_ec_tool.jsonl"
+
+# 処理ごとの計測項目（構造化ログの列）
+OPERATION_FIELDS = ("operation", "duration_ms", "bytes", "files")
+
+# 重要度の低い順
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+
+def level_rank(level):
+    """ログレベルの順位（未知のレベルはINFO扱い）"""
+    return LOG_LEVELS.index(level) if level in LOG_LEVELS else 1
+
+
+def format_record(record):
+    """画面表示用の1行に整形"""
+    _, timestamp, level, message = record
+    return f"[{timestamp}] {level}: {message}"
+
+
+class LogRingBuffer:
+    """固定長のログバッファ（どのスレッドからでも追加でき、古いものから捨てる）"""
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self.records = deque(maxlen=capacity)  # (連番, 時刻, レベル, メッセージ)
+        self.lock = threading.Lock()
+        self.next_seq = 0
+
+    def append(self, message, level="INFO"):
+        """ログを追加"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            self.records.append((self.next_seq, timestamp, level, message))
+            self.next_seq += 1
+
+    def since(self, seq):
+        """指定した連番以降のレコードを取得。戻り値は (次回の連番, レコードのリスト)"""
+        with self.lock:
+            if not self.records or self.records[-1][0] < seq:
+                return self.next_seq, []
+            start = max(0, seq - self.records[0][0])
+            return self.next_seq, list(itertools.islice(self.records, start, None))
+
+    def __len__(self):
+        with self.lock:
+            return len(self.records)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """1レコード1行のJSONに整形"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for field in OPERATION_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        extra_fields = getattr(record, "fields", None)
+        if extra_fields:
+            entry.update(extra_fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# ログに出してはいけない文字列（パスワード等）。ファイル・画面に出す前に伏せ字にする
+_secrets = set()
+_secrets_lock = threading.Lock()
+_redact_order = ()  # 長い順（他の秘密を含む秘密を先に伏せる）。登録時に作り直し、読む側はロック不要
+REDACTED = "****"
+
+
+def register_secret(value):
+    """ログから伏せる文字列を登録（どのスレッドからでもよい）"""
+    global _redact_order
+    if not value:
+        return
+    with _secrets_lock:
+        if value not in _secrets:
+            _secrets.add(value)
+            _redact_order = tuple(sorted(_secrets, key=len, reverse=True))
+
+
+def redact(text):
+    """登録済みの秘密の文字列を伏せ字にする"""
+    for secret in _redact_order:
+        if secret in text:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+class RedactingFilter(logging.Filter):
+    """メッセージ中の秘密の文字列を伏せ字にする（キューに積む前に呼び出し元スレッドで適用）"""
+
+    def filter(self, record):
+        message = record.getMessage()
+        redacted = redact(message)
+        if redacted != message:
+            record.msg = redacted
+            record.args = None
+        return True
+
+
+_listener = None
+
+
+def setup_structured_logging(log_dir=DEFAULT_LOG_DIR, max_bytes=5 * 1024 * 1024, backup_count=10,
+                             level=logging.INFO, console=True):
+    """ログをキュー経由のバックグラウンドスレッドでローテーションJSONLファイルへ出力"""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_dir / LOG_FILE_NAME, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+
+    # 呼び出し元スレッドはキューに積むだけ（ファイル書き込みはリスナースレッド）
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RedactingFilter())
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    # このツールのログはJSONLファイルとコンソールに出すため、ルートロガーには渡さない
+    logger.propagate = False
+    if not logging.getLogger().handlers:
+        # 他のライブラリ（ルートロガー）のログは従来どおりコンソールへ
+        logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_structured_logging)
+    return logger
+
+
+def stop_structured_logging():
+    """キューに残ったログを書き出してリスナースレッドを停止"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_operation(operation, duration_ms, nbytes=0, files=0, message=None, level=logging.INFO, **fields):
+    """処理1件分の計測結果を構造化ログに出力し、メトリクスにも記録"""
+    metrics_registry().record_operation(operation, duration_ms, nbytes, files)
+    logging.getLogger(LOGGER_NAME).log(
+        level,
+        message or f"{operation} ({duration_ms:.0f}ms)",
+        extra={
+            "operation": operation,
+            "duration_ms": round(duration_ms, 1),
+            "bytes": nbytes,
+            "files": files,
+            "fields": fields,
+        },
+    )
+
+
+class TimedOperation:
+    """with文の範囲の処理時間を計測し、終了時に転送量・ファイル数と一緒に記録（トレース中はスパンも記録）"""
+
+    def __init__(self, operation, **fields):
+        self.operation = operation
+        self.fields = fields
+        self.bytes = 0
+        self.files = 0
+        self.started_at = None
+        self.span = span(operation, "operation", **fields)
+
+    def __enter__(self):
+        self.span.__enter__()
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self.started_at) * 1000
+        if exc_type is None:
+            message = f"{self.operation} 完了 ({duration_ms:.0f}ms)"
+            level = logging.INFO
+        else:
+            message = f"{self.operation} 失敗 ({duration_ms:.0f}ms): {exc}"
+            level = logging.ERROR
+        log_operation(self.operation, duration_ms, self.bytes, self.files, message, level, **self.fields)
+        self.span.args.update(bytes=self.bytes, files=self.files)
+        self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+def timed_operation(operation, **fields):
+    """処理時間計測のコンテキストマネージャー"""
+    return TimedOperation(operation, **fields)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能メトリクス - カウンター・ゲージ・ヒストグラムの集計と履歴
+"""
+
+import threading
+import time
+from collections import deque
+
+# ヒストグラムが保持する直近の値の数（分位数はこの範囲で計算）
+HISTOGRAM_WINDOW = 1000
+# 履歴のサンプル数（ダッシュボードのスパークライン用）
+HISTORY_LENGTH = 120
+QUANTILES = (0.5, 0.9, 0.99)
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class Counter:
+    """増加のみの累計値"""
+
+    kind = "counter"
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def summary(self):
+        return {"value": self.value}
+
+
+class Gauge:
+    """最新の値"""
+
+    kind = "gauge"
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def summary(self):
+        return {"value": self.value}
+
+
+class Histogram:
+    """値の分布（件数・合計・最小・最大と直近の値からの分位数）"""
+
+    kind = "histogram"
+
+    def __init__(self, name, window=HISTOGRAM_WINDOW):
+        self.name = name
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def summary(self):
+        if not self.values:
+            return {"count": 0}
+        ordered = sorted(self.values)
+        result = {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            "value": self.values[-1],
+        }
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}"] = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return result
+
+
+class MetricsRegistry:
+    """メトリクスの登録・記録（どのスレッドからでも記録できる）"""
+
+    def __init__(self, history_length=HISTORY_LENGTH):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.history = {}  # 名前 -> deque[(時刻, 値)]
+        self.history_length = history_length
+
+    def _get(self, cls, name):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name)
+        elif not isinstance(metric, cls):
+            raise Exception(f"メトリクス {name} は {metric.kind} として登録済みです")
+        return metric
+
+    def inc(self, name, amount=1):
+        """カウンターを加算"""
+        with self.lock:
+            self._get(Counter, name).inc(amount)
+
+    def set(self, name, value):
+        """ゲージを更新"""
+        with self.lock:
+            self._get(Gauge, name).set(value)
+
+    def observe(self, name, value):
+        """ヒストグラムに値を追加"""
+        with self.lock:
+            self._get(Histogram, name).observe(value)
+
+    def record_operation(self, operation, duration_ms, nbytes=0, files=0):
+        """処理1件分の所要時間・転送量・ファイル数を記録"""
+        with self.lock:
+            self._get(Counter, f"{operation}.count").inc()
+            self._get(Histogram, f"{operation}.duration_ms").observe(duration_ms)
+            if nbytes:
+                self._get(Counter, f"{operation}.bytes").inc(nbytes)
+                if duration_ms > 0:
+                    self._get(Histogram, f"{operation}.throughput_kbps").observe(
+                        nbytes / 1024 / (duration_ms / 1000))
+            if files:
+                self._get(Counter, f"{operation}.files").inc(files)
+
+    def snapshot(self):
+        """全メトリクスの集計値を名前順に取得"""
+        with self.lock:
+            return [(name, metric.kind, metric.summary())
+                    for name, metric in sorted(self.metrics.items())]
+
+    def sample(self, now=None):
+        """現在値を履歴に追加（ヒストグラムは直近の中央値）"""
+        now = now or time.time()
+        for name, kind, summary in self.snapshot():
+            value = summary.get("p50") if kind == "histogram" else summary.get("value")
+            if value is None:
+                continue
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.history_length)
+            history.append((now, value))
+
+    def reset(self):
+        """全メトリクスと履歴を消去"""
+        with self.lock:
+            self.metrics.clear()
+            self.history.clear()
+
+
+def sparkline(values, width=30):
+    """値の推移をブロック文字で表現"""
+    values = list(values)[-width:]
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_CHARS[int((value - low) / span * (len(SPARK_CHARS) - 1))] for value in values)
+
+
+_registry = None
+
+
+def metrics_registry():
+    """アプリ全体で共有するレジストリ"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
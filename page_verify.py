@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+公開ページの内容検証 - CSVの登録内容と商品ページ（JSON-LD・metaタグ）の照合
+"""
+
+import json
+import re
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from pathlib import Path
+
+from csv_source import read_csv_rows
+
+# 店舗ごとの商品ページURL
+PRODUCT_PAGE_URLS = {
+    "rakuten": "https://item.rakuten.co.jp/taiho-kagu/{code}/",
+    "taiho-kagu": "https://store.shopping.yahoo.co.jp/taiho-kagu/{code}.html",
+    "taiho-kagu2": "https://store.shopping.yahoo.co.jp/taiho-kagu2/{code}.html",
+}
+STORE_LABELS = {
+    "rakuten": "楽天市場",
+    "taiho-kagu": "Yahoo 1号店",
+    "taiho-kagu2": "Yahoo 2号店",
+}
+
+# 店舗ごとの照合元CSVと列名（候補のうち最初に見つかった列を使用）
+CSV_SOURCES = {
+    "rakuten": {
+        "file": "rakuten_normal-item.csv",
+        "code": ["商品管理番号（商品URL）", "商品番号"],
+        "title": ["商品名"],
+        "price": ["販売価格"],
+        "stock": ["在庫数"],
+    },
+    "taiho-kagu": {
+        "file": "yahoo_item.csv",
+        "code": ["code"],
+        "title": ["name"],
+        "price": ["sale-price", "price"],
+        "stock": ["quantity"],
+    },
+    "taiho-kagu2": {
+        "file": "yahoo2_item.csv",
+        "code": ["code"],
+        "title": ["name"],
+        "price": ["sale-price", "price"],
+        "stock": ["quantity"],
+    },
+}
+
+# 静的HTML（fetch_html）で照合できる項目。Yahooの価格・在庫はJavaScriptで表示されるため照合せず未確認とする
+VERIFY_FIELDS = ("title", "price", "stock")
+STATIC_FIELDS = {
+    "rakuten": VERIFY_FIELDS,
+    "taiho-kagu": ("title",),
+    "taiho-kagu2": ("title",),
+}
+FIELD_LABELS = {"title": "商品名", "price": "価格", "stock": "在庫"}
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) integrated-ec-tool page verifier"
+
+
+def _column(header, candidates):
+    for name in candidates:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def build_csv_index(run_dir, store):
+    """CSVの行を商品コードで引ける辞書にする"""
+    source = CSV_SOURCES[store]
+    path = Path(run_dir) / source["file"]
+    if not path.exists():
+        return {}
+    header, rows = read_csv_rows(path)
+    columns = {field: _column(header, source[field]) for field in ("code", "title", "price", "stock")}
+    if columns["code"] is None:
+        return {}
+
+    index = {}
+    for row in rows:
+        if len(row) <= columns["code"] or not row[columns["code"]].strip():
+            continue
+        index[row[columns["code"]].strip()] = {
+            field: (row[col].strip() if col is not None and col < len(row) else "")
+            for field, col in columns.items() if field != "code"
+        }
+    return index
+
+
+class ProductPageParser(HTMLParser):
+    """JSON-LDとmetaタグを収集"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.json_ld = []
+        self.title = ""
+        self._in_json_ld = False
+        self._in_title = False
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            if key and "content" in attrs:
+                self.meta.setdefault(key, attrs["content"])
+        elif attrs.get("itemprop") and "content" in attrs:
+            self.meta.setdefault(attrs["itemprop"], attrs["content"])
+        if tag == "script" and attrs.get("type") == "application/ld+json":
+            self._in_json_ld = True
+            self._buffer = []
+        elif tag == "title":
+            self._in_title = True
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._in_json_ld:
+            self.json_ld.append("".join(self._buffer))
+            self._in_json_ld = False
+        elif tag == "title" and self._in_title:
+            self.title = "".join(self._buffer).strip()
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_json_ld or self._in_title:
+            self._buffer.append(data)
+
+
+def _json_ld_products(texts):
+    """JSON-LDからProductを列挙"""
+    stack = []
+    for text in texts:
+        try:
+            stack.append(json.loads(text))
+        except ValueError:
+            continue
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            node_type = node.get("@type")
+            types = node_type if isinstance(node_type, list) else [node_type]
+            if "Product" in types:
+                yield node
+            if "@graph" in node:
+                stack.append(node["@graph"])
+
+
+def extract_from_json_ld(texts):
+    """JSON-LDのProductから商品名・価格・在庫状態を取得"""
+    for product in _json_ld_products(texts):
+        offers = product.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        return {
+            "title": product.get("name") or "",
+            "price": str(offers.get("price") or offers.get("lowPrice") or ""),
+            "availability": offers.get("availability") or "",
+        }
+    return {}
+
+
+def extract_product_data(html):
+    """商品ページHTMLから商品名・価格・在庫状態を取得（JSON-LD優先、無ければmetaタグ）"""
+    parser = ProductPageParser()
+    parser.feed(html)
+    data = extract_from_json_ld(parser.json_ld)
+    meta = parser.meta
+    return {
+        "title": data.get("title") or meta.get("og:title") or parser.title,
+        "price": data.get("price") or meta.get("product:price:amount") or meta.get("price") or "",
+        "availability": (data.get("availability") or meta.get("product:availability")
+                         or meta.get("availability") or ""),
+    }
+
+
+def fetch_html(url, timeout=20):
+    """ページHTMLを取得（文字コードはヘッダー → metaタグ → UTF-8の順に判定）"""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+        charset = response.headers.get_content_charset()
+    if not charset:
+        match = re.search(rb'charset=["\']?([\w-]+)', body[:2048], re.IGNORECASE)
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    return body.decode(charset, errors="replace")
+
+
+def _number(value):
+    digits = re.sub(r"[^\d]", "", str(value).split(".")[0])
+    return int(digits) if digits else None
+
+
+def _normalize(text):
+    return re.sub(r"[\s　]+", " ", text or "").strip()
+
+
+def compare_product(expected, actual, fields=VERIFY_FIELDS):
+    """CSVの値とページの値を比較して (不一致のリスト, 未確認の項目名のリスト) を返す。
+    fields以外の項目とページから取得できなかった項目は不一致ではなく未確認とする"""
+    mismatches = []
+    unverified = []
+
+    expected_price = _number(expected.get("price", ""))
+    if expected_price is not None:
+        actual_price = _number(actual.get("price", ""))
+        if "price" not in fields or actual_price is None:
+            unverified.append(FIELD_LABELS["price"])
+        elif actual_price != expected_price:
+            mismatches.append((FIELD_LABELS["price"], expected_price, actual_price))
+
+    expected_title = _normalize(expected.get("title"))
+    if expected_title:
+        actual_title = _normalize(actual.get("title"))
+        if "title" not in fields or not actual_title:
+            unverified.append(FIELD_LABELS["title"])
+        elif expected_title not in actual_title:
+            mismatches.append((FIELD_LABELS["title"], expected_title, actual_title))
+
+    stock = _number(expected.get("stock", ""))
+    if stock is not None:
+        availability = actual.get("availability", "")
+        if "stock" not in fields or not availability:
+            unverified.append(FIELD_LABELS["stock"])
+        else:
+            in_stock = "InStock" in availability or "in stock" in availability.lower()
+            if in_stock != (stock > 0):
+                mismatches.append((FIELD_LABELS["stock"], stock, availability))
+
+    return mismatches, unverified
+
+
+def verify_products(run_dir, stores=None, codes=None, max_workers=8, fetch=fetch_html, progress=None):
+    """CSVの全商品について公開ページを並列取得して照合（静的HTMLで読めない項目は結果の unverified）"""
+    stores = stores or list(CSV_SOURCES)
+    indexes = {store: build_csv_index(run_dir, store) for store in stores}
+    targets = [
+        (store, code)
+        for store, index in indexes.items()
+        for code in index
+        if codes is None or code in codes
+    ]
+
+    def check(store, code):
+        url = PRODUCT_PAGE_URLS[store].format(code=code)
+        result = {"store": store, "code": code, "url": url, "mismatches": [], "unverified": [], "error": None}
+        try:
+            actual = extract_product_data(fetch(url))
+            result["mismatches"], result["unverified"] = compare_product(
+                indexes[store][code], actual, STATIC_FIELDS.get(store, VERIFY_FIELDS))
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(check, store, code) for store, code in targets]
+        for done, future in enumerate(as_completed(futures), start=1):
+            results.append(future.result())
+            if progress:
+                progress(done, len(futures))
+    return results
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+進捗の集約 - 転送スレッドが通知したバイト数・件数をバッチ全体で集計（画面は一定間隔で読み取る）
+"""
+
+import threading
+import time
+from collections import deque
+
+# 転送速度を計算する直近の時間幅（秒）
+THROUGHPUT_WINDOW_SEC = 5.0
+
+
+class ProgressBus:
+    """バッチ全体の進捗（どのスレッドから通知してもよい）"""
+
+    def __init__(self, window_sec=THROUGHPUT_WINDOW_SEC):
+        self.lock = threading.Lock()
+        self.window_sec = window_sec
+        self.label = ""
+        self.total_bytes = 0
+        self.total_items = 0
+        self.done_bytes = 0
+        self.done_items = 0
+        self.started_at = None
+        self.finished_at = None
+        self.samples = deque()  # (時刻, 累計バイト数)
+        self.version = 0  # 通知ごとに増える（画面側は変化が無ければ再描画しない）
+
+    def begin(self, total_bytes=0, total_items=0, label=""):
+        """新しいバッチを開始"""
+        with self.lock:
+            self.label = label
+            self.total_bytes = total_bytes
+            self.total_items = total_items
+            self.done_bytes = 0
+            self.done_items = 0
+            self.started_at = time.monotonic()
+            self.finished_at = None
+            self.samples.clear()
+            self.samples.append((self.started_at, 0))
+            self.version += 1
+
+    def add_total(self, nbytes=0, items=0):
+        """実行中のバッチに転送量を追加（キューへの追加・スキップ時）"""
+        with self.lock:
+            self.total_bytes = max(0, self.total_bytes + nbytes)
+            self.total_items = max(0, self.total_items + items)
+            self.version += 1
+
+    def publish(self, nbytes=0, items=0):
+        """転送済みのバイト数・完了件数を加算"""
+        now = time.monotonic()
+        with self.lock:
+            self.done_bytes += nbytes
+            self.done_items += items
+            self.samples.append((now, self.done_bytes))
+            while len(self.samples) > 2 and now - self.samples[0][0] > self.window_sec:
+                self.samples.popleft()
+            self.version += 1
+
+    def file_callback(self):
+        """1ファイル分の (転送済み, 全体) 通知を差分に変換するコールバック（paramikoのcallback用）"""
+        last = [0]
+
+        def callback(transferred, total):
+            delta = transferred - last[0]
+            last[0] = transferred
+            if delta > 0:
+                self.publish(delta)
+
+        return callback
+
+    def finish(self):
+        """バッチを終了"""
+        with self.lock:
+            self.finished_at = time.monotonic()
+            self.version += 1
+
+    @property
+    def active(self):
+        return self.started_at is not None and self.finished_at is None
+
+    def snapshot(self):
+        """現在の進捗（割合・速度・残り時間）"""
+        with self.lock:
+            now = self.finished_at or time.monotonic()
+            elapsed = now - self.started_at if self.started_at else 0
+            first_time, first_bytes = self.samples[0] if self.samples else (now, 0)
+            span = now - first_time
+            throughput = (self.done_bytes - first_bytes) / span if span > 0 else 0.0
+            remaining = max(0, self.total_bytes - self.done_bytes)
+            if self.total_bytes:
+                percent = min(100, int(self.done_bytes * 100 / self.total_bytes))
+            elif self.total_items:
+                percent = min(100, int(self.done_items * 100 / self.total_items))
+            else:
+                percent = 0
+            return {
+                "label": self.label,
+                "version": self.version,
+                "percent": percent,
+                "done_bytes": self.done_bytes,
+                "total_bytes": self.total_bytes,
+                "done_items": self.done_items,
+                "total_items": self.total_items,
+                "elapsed_sec": elapsed,
+                "throughput_bps": throughput,
+                "eta_sec": remaining / throughput if throughput > 0 and self.finished_at is None else None,
+                "finished": self.finished_at is not None,
+            }
+
+
+def format_bytes(value):
+    """バイト数を読みやすい単位で表示"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+
+
+def format_duration(seconds):
+    """秒数を 分:秒 で表示"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def describe(snapshot):
+    """進捗の1行表示"""
+    text = (f"{snapshot['done_items']}/{snapshot['total_items']}件 "
+            f"{format_bytes(snapshot['done_bytes'])}/{format_bytes(snapshot['total_bytes'])} "
+            f"{format_bytes(snapshot['throughput_bps'])}/s")
+    if snapshot["finished"]:
+        return f"{text} 完了 ({format_duration(snapshot['elapsed_sec'])})"
+    return f"{text} 残り {format_duration(snapshot['eta_sec'])}"
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SFTP接続診断 - 名前解決・TCP接続・鍵交換・認証・転送速度を段階ごとに計測し、履歴と比較
+"""
+
+import json
+import logging
+import os
+import socket
+import statistics
+import time
+from datetime import datetime
+
+from log_sink import DEFAULT_LOG_DIR, LOGGER_NAME, log_operation, register_secret
+from metrics import metrics_registry
+from sftp_transfer import DEFAULT_PROFILE, FALLBACK_PASSWORDS, MB, WRITE_CHUNK_SIZE, get_profile
+
+DIAGNOSTICS_FILE = DEFAULT_LOG_DIR / "sftp_diagnostics.jsonl"
+DIAGNOSTICS_TIMEOUT_SEC = 10
+RTT_SAMPLES = 5
+
+# 計測する段階（表示順）
+PHASES = (
+    ("dns_ms", "名前解決"),
+    ("tcp_ms", "TCP接続"),
+    ("kex_ms", "鍵交換"),
+    ("auth_ms", "認証"),
+    ("sftp_open_ms", "SFTP開始"),
+    ("rtt_ms", "往復遅延"),
+    ("upload_kbps", "送信速度"),
+    ("download_kbps", "受信速度"),
+)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def _elapsed_ms(started_at):
+    return (time.perf_counter() - started_at) * 1000
+
+
+def diagnose(host, user, password=None, port=22, sample_size=MB, remote_dir=".", profile_name=DEFAULT_PROFILE,
+             timeout=DIAGNOSTICS_TIMEOUT_SEC, log=_default_log):
+    """接続の各段階を計測。失敗した段階で止め、結果の辞書を返す（例外は投げない）"""
+    import paramiko
+    profile = get_profile(profile_name)
+    result = {"time": datetime.now().isoformat(timespec="seconds"), "host": host, "port": port, "user": user,
+              "profile": profile_name, "sample_size": sample_size, "phases": {}, "failed_phase": None,
+              "error": None}
+    phases = result["phases"]
+    sock = transport = sftp = None
+    phase = "dns_ms"
+    try:
+        started_at = time.perf_counter()
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        phases["dns_ms"] = _elapsed_ms(started_at)
+        family, socktype, proto, _, address = addresses[0]
+        result["address"] = address[0]
+
+        phase = "tcp_ms"
+        started_at = time.perf_counter()
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        phases["tcp_ms"] = _elapsed_ms(started_at)
+
+        phase = "kex_ms"
+        started_at = time.perf_counter()
+        transport = paramiko.Transport(sock)
+        transport.start_client(timeout=timeout)
+        phases["kex_ms"] = _elapsed_ms(started_at)
+        result["server_version"] = transport.remote_version
+        result["cipher"] = transport.remote_cipher
+        result["host_key_type"] = transport.get_remote_server_key().get_name()
+
+        # 認証は成功した1回の所要時間（失敗したパスワードの試行は auth_failures_ms に別に記録）
+        phase = "auth_ms"
+        register_secret(password)
+        passwords = ([password] if password else []) + FALLBACK_PASSWORDS
+        result["auth_failures_ms"] = []
+        for attempt, candidate in enumerate(passwords, start=1):
+            started_at = time.perf_counter()
+            try:
+                transport.auth_password(user, candidate)
+            except paramiko.AuthenticationException:
+                result["auth_failures_ms"].append(_elapsed_ms(started_at))
+                if attempt == len(passwords):
+                    raise
+                continue
+            phases["auth_ms"] = _elapsed_ms(started_at)
+            result["auth_attempts"] = attempt
+            break
+
+        phase = "sftp_open_ms"
+        started_at = time.perf_counter()
+        sftp = paramiko.SFTPClient.from_transport(transport)
+        sftp.chdir(remote_dir)
+        phases["sftp_open_ms"] = _elapsed_ms(started_at)
+
+        phase = "rtt_ms"
+        samples = []
+        for _ in range(RTT_SAMPLES):
+            started_at = time.perf_counter()
+            sftp.stat(".")
+            samples.append(_elapsed_ms(started_at))
+        phases["rtt_ms"] = statistics.median(samples)
+
+        # 作業用ファイルで送受信速度を計測（圧縮の効かないデータ）
+        phase = "upload_kbps"
+        remote_name = f"_integrated_ec_tool_diag_{os.getpid()}.tmp"
+        data = os.urandom(sample_size)
+        try:
+            started_at = time.perf_counter()
+            with sftp.open(remote_name, "wb") as remote:
+                remote.set_pipelined(profile["pipelined"])
+                for offset in range(0, sample_size, WRITE_CHUNK_SIZE):
+                    remote.write(data[offset:offset + WRITE_CHUNK_SIZE])
+            elapsed = time.perf_counter() - started_at
+            phases["upload_kbps"] = sample_size / 1024 / elapsed if elapsed else 0
+
+            phase = "download_kbps"
+            started_at = time.perf_counter()
+            with sftp.open(remote_name, "rb") as remote:
+                remote.prefetch(sample_size)
+                received = remote.read()
+            elapsed = time.perf_counter() - started_at
+            phases["download_kbps"] = len(received) / 1024 / elapsed if elapsed else 0
+            if received != data:
+                raise IOError("受信したデータが送信したデータと一致しません")
+        finally:
+            try:
+                sftp.remove(remote_name)
+            except IOError:
+                pass
+    except Exception as e:
+        result["failed_phase"] = phase
+        result["error"] = f"{type(e).__name__}: {str(e)}"
+        log(f"接続診断: {dict(PHASES)[phase]}で失敗しました: {result['error']}", "WARNING")
+    finally:
+        for resource in (sftp, transport, sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception:
+                    pass
+
+    for name, value in phases.items():
+        metrics_registry().observe(f"sftp_diag.{name}", value)
+    log_operation("sftp_diagnostics", sum(value for name, value in phases.items() if name.endswith("_ms")),
+                  host=host, failed_phase=result["failed_phase"])
+    return result
+
+
+def save_result(result, path=DIAGNOSTICS_FILE):
+    """診断結果を履歴（JSON Lines）に追加"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def load_history(host=None, limit=20, path=DIAGNOSTICS_FILE):
+    """過去の診断結果（新しい順、hostで絞り込み）"""
+    if not path.exists():
+        return []
+    results = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if host is None or entry.get("host") == host:
+                results.append(entry)
+    return results[::-1][:limit]
+
+
+def compare_with_history(result, history):
+    """段階ごとの (今回, 過去の中央値, 過去の回数)。過去の値が無い段階は中央値がNone"""
+    comparison = {}
+    for name, _ in PHASES:
+        past = [entry["phases"][name] for entry in history if name in entry.get("phases", {})]
+        comparison[name] = (result["phases"].get(name), statistics.median(past) if past else None, len(past))
+    return comparison
+
+
+def describe_result(result, history=()):
+    """診断結果の表示用テキスト（過去の中央値との比較付き）"""
+    lines = [f"{result['user']}@{result['host']}:{result['port']} ({result.get('address', '-')})"]
+    if result.get("server_version"):
+        lines.append(f"サーバー: {result['server_version']} / {result.get('host_key_type')} / {result.get('cipher')}")
+    for name, (value, median, count) in compare_with_history(result, history).items():
+        label = dict(PHASES)[name]
+        if value is None:
+            if name == result["failed_phase"]:
+                lines.append(f"{label}: 失敗 ({result['error']})")
+            continue
+        unit = "KB/s" if name.endswith("_kbps") else "ms"
+        line = f"{label}: {value:.1f}{unit}"
+        if median:
+            line += f"（過去{count}回の中央値 {median:.1f}{unit}、{value / median:.2f}倍）"
+        if name == "auth_ms" and result.get("auth_failures_ms"):
+            line += (f" ※パスワード{result['auth_attempts']}件目で成功、"
+                     f"失敗した試行 {sum(result['auth_failures_ms']):.1f}ms")
+        lines.append(line)
+    return "\n".join(lines)
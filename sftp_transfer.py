@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+楽天 SFTP転送 - 接続（パスワード自動切り替え）・CSV/画像アップロード
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from log_sink import LOGGER_NAME, log_operation, register_secret
+from tracing import span
+
+# 入力・保存済みのパスワードが無い場合に順に試すパスワード
+FALLBACK_PASSWORDS = ["ta1hoKa9", "Ta1hoka9"]
+for _password in FALLBACK_PASSWORDS:
+    register_secret(_password)
+
+RAKUTEN_CSV_DIR = "/ritem/batch"
+# アップロード順（ローカルファイル名, 楽天側のファイル名）
+RAKUTEN_CSV_FILES = [
+    ("rakuten_normal-item.csv", "normal-item.csv"),
+    ("rakuten_item-cat.csv", "item-cat.csv"),
+]
+RAKUTEN_IMAGE_DIR = "/cabinet/images"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+TEXT_EXTENSIONS = ('.csv', '.txt')
+
+KB = 1024
+MB = 1024 * 1024
+# 1回の書き込み要求の大きさ（paramikoのSFTP要求上限）
+WRITE_CHUNK_SIZE = 32 * KB
+
+# 転送プロファイル（プロファイルで変わるのは次の2つだけ）
+#   pipelined: 書き込みごとの応答を待たずに次を送信（遅延の大きい回線ほど効く）
+#   compress: SSH圧縮を使うファイル種別（CSVは圧縮が効き、JPEG等は既に圧縮済み）
+# 送信量の上限はサーバー側のウィンドウで決まり、要求の大きさ（32KB）と未応答の要求数はparamikoが決めるため設定しない
+TRANSFER_PROFILES = {
+    "compat": {
+        "label": "互換（応答待ち・圧縮なし）",
+        "pipelined": False,
+        "compress": (),
+    },
+    "standard": {
+        "label": "標準（CSVのみ圧縮）",
+        "pipelined": True,
+        "compress": ("csv",),
+    },
+    "uncompressed": {
+        "label": "圧縮なし（高速回線向け）",
+        "pipelined": True,
+        "compress": (),
+    },
+}
+DEFAULT_PROFILE = "standard"
+# 計測用ファイルを送ってはいけないフォルダ（楽天が取り込む・公開される）
+PRODUCTION_DIRS = ("/ritem", "/cabinet")
+
+# アップロード後の検証
+VERIFY_WORKERS = 4  # 同時に開くSFTPセッション数
+VERIFY_RETRIES = 2  # 不一致のファイルを再アップロードする回数
+HASH_ALGORITHM = "sha1"  # check-file拡張で比較するハッシュ（未対応のサーバーはサイズのみ）
+# check-file拡張に未対応のサーバーの応答（SSH_FX_OP_UNSUPPORTED。paramikoはメッセージだけのIOErrorにする）
+HASH_UNSUPPORTED_WORDS = ("unsupported", "not supported", "not implemented")
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class TransferCancelled(Exception):
+    """転送がキャンセルされた"""
+
+
+class ConnectionFailed(Exception):
+    """SFTPサーバーに接続できない（auth_failed: サーバーには届いたが認証に失敗）"""
+
+    def __init__(self, message, auth_failed=False):
+        super().__init__(message)
+        self.auth_failed = auth_failed
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+def get_profile(name):
+    """転送プロファイルを取得（未知の名前は標準）"""
+    return TRANSFER_PROFILES.get(name) or TRANSFER_PROFILES[DEFAULT_PROFILE]
+
+
+def file_kind(path):
+    """圧縮の要否を決めるファイル種別（"csv" / "image"）"""
+    return "csv" if Path(path).suffix.lower() in TEXT_EXTENSIONS else "image"
+
+
+def connect_sftp(host, user, password=None, port=22, log=_default_log, compress=False):
+    """SFTPに接続（指定パスワード → 予備パスワードの順に試行）。戻り値は (sftp, transport)"""
+    import paramiko
+    passwords = list(FALLBACK_PASSWORDS)
+    if password:
+        passwords.insert(0, password)
+        register_secret(password)
+
+    started_at = time.perf_counter()
+    auth_failures = 0
+    for attempt, candidate in enumerate(passwords, start=1):
+        try:
+            with span("sftp_auth", host=host, attempt=attempt, compress=compress):
+                transport = paramiko.Transport((host, port))
+                transport.use_compression(compress)
+                transport.connect(username=user, password=candidate)
+                sftp = paramiko.SFTPClient.from_transport(transport)
+            log("SFTP接続成功" + ("（圧縮あり）" if compress else ""))
+            log_operation("sftp_connect", (time.perf_counter() - started_at) * 1000,
+                          host=host, attempts=attempt, compress=compress)
+            return sftp, transport
+        except paramiko.AuthenticationException as e:
+            auth_failures += 1
+            log(f"パスワード {attempt}件目で接続失敗: {str(e)}", "WARNING")
+        except Exception as e:
+            log(f"パスワード {attempt}件目で接続失敗: {str(e)}", "WARNING")
+
+    raise ConnectionFailed("すべてのパスワードで接続に失敗しました", auth_failed=auth_failures == len(passwords))
+
+
+def put_file(sftp, local_path, remote_name, progress=None, pipelined=True, operation="sftp_put", verify=True,
+             cancelled=None):
+    """1ファイルをアップロードして所要時間を記録（progressはProgressBus、verify=Falseはサイズ確認を後の検証に任せる）。
+    cancelled() が真になると途中のリモートファイルを削除して TransferCancelled。戻り値は転送バイト数"""
+    file_size = os.path.getsize(local_path)
+    callback = progress.file_callback() if progress else None
+    started_at = time.perf_counter()
+    transferred = 0
+    with span(operation, "operation", file=remote_name, bytes=file_size, pipelined=pipelined), \
+            open(local_path, 'rb') as f, sftp.open(remote_name, 'wb') as remote:
+        remote.set_pipelined(pipelined)
+        while not (cancelled and cancelled()):
+            data = f.read(WRITE_CHUNK_SIZE)
+            if not data:
+                break
+            remote.write(data)
+            transferred += len(data)
+            if callback:
+                callback(transferred, file_size)
+        # 書き込み結果を閉じる前に開いたままのハンドルで確認（楽天は/ritem/batchのファイルを取り込むと削除する）
+        if verify and transferred == file_size:
+            remote.flush()
+            remote_size = remote.stat().st_size
+            if remote_size != file_size:
+                raise IOError(f"{remote_name} のサイズが一致しません ({remote_size} != {file_size})")
+    if transferred < file_size and cancelled and cancelled():
+        try:
+            sftp.remove(remote_name)
+        except IOError:
+            pass
+        raise TransferCancelled(remote_name)
+    log_operation(operation, (time.perf_counter() - started_at) * 1000, file_size, 1,
+                  file=remote_name, pipelined=pipelined)
+    if progress:
+        progress.publish(items=1)
+    return file_size
+
+
+class SessionPool:
+    """1つの接続上に複数のSFTPセッションを開いて使い回す（検証の並列化用）"""
+
+    def __init__(self, transport, size=VERIFY_WORKERS):
+        self.transport = transport
+        self.size = size
+        self.idle = queue.Queue()
+        self.sessions = []
+        self.lock = threading.Lock()
+        self.hash_supported = True  # check-file拡張が使えないと分かったらFalse
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if len(self.sessions) < self.size:
+                sftp = self.transport.open_sftp_client()
+                self.sessions.append(sftp)
+                return sftp
+        return self.idle.get()
+
+    def release(self, sftp):
+        self.idle.put(sftp)
+
+    def close(self):
+        for sftp in self.sessions:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+        self.sessions = []
+
+
+def local_hash(path, algorithm=HASH_ALGORITHM):
+    """ローカルファイルのハッシュ（check-file拡張の結果と同じ形式）"""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(MB), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _hash_unsupported(error):
+    """check-file拡張に未対応という応答か（タイムアウト等の一時的なエラーは含まない）"""
+    text = str(error).lower()
+    return not getattr(error, "errno", None) and any(word in text for word in HASH_UNSUPPORTED_WORDS)
+
+
+def check_remote_file(pool, local_path, remote_path, log=_default_log):
+    """リモートのファイルをローカルと比較。一致すればNone、不一致・確認できなければ理由"""
+    sftp = pool.acquire()
+    try:
+        expected = os.path.getsize(local_path)
+        actual = sftp.stat(remote_path).st_size
+        if actual != expected:
+            return f"サイズ不一致 ({actual} != {expected})"
+        if not pool.hash_supported:
+            return None
+        try:
+            with sftp.open(remote_path, 'rb') as remote:
+                remote_digest = remote.check(HASH_ALGORITHM, 0, 0, 0)
+        except IOError as e:
+            if not _hash_unsupported(e):
+                return f"ハッシュを確認できません: {str(e)}"
+            # サーバーがcheck-file拡張に対応していない。以降はサイズのみ比較
+            with pool.lock:
+                disabled, pool.hash_supported = pool.hash_supported, False
+            if disabled:
+                log(f"サーバーがハッシュ確認（check-file）に対応していないため、以降はサイズのみで検証します: {str(e)}",
+                    "WARNING")
+            return None
+        if remote_digest != local_hash(local_path):
+            return "ハッシュ不一致"
+        return None
+    except IOError as e:
+        return f"確認できません: {str(e)}"
+    finally:
+        pool.release(sftp)
+
+
+def rakuten_csv_files(run_dir):
+    """アップロードするCSV [(ローカルパス, 楽天側のファイル名)]（存在するもののみ、アップロード順）"""
+    run_dir = Path(run_dir)
+    return [(run_dir / local_name, remote_name)
+            for local_name, remote_name in RAKUTEN_CSV_FILES
+            if (run_dir / local_name).exists()]
+
+
+def list_images(folder):
+    """アップロード対象の画像ファイル"""
+    return sorted(file for file in Path(folder).iterdir()
+                  if file.is_file() and file.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def _benchmark_samples(directory, size):
+    """計測用のファイル（CSV相当のテキストと、圧縮の効かない画像相当のデータ）"""
+    rows = []
+    total = 0
+    index = 0
+    while total < size:
+        row = f"A{index:06d},大宝家具 テスト商品 {index} ナチュラル 幅{index % 200}cm,{1000 + index % 50000},{index % 30}\n"
+        rows.append(row)
+        total += len(row.encode("cp932"))
+        index += 1
+    csv_path = Path(directory) / "bench.csv"
+    csv_path.write_bytes(("code,name,price,stock\n" + "".join(rows)).encode("cp932"))
+    image_path = Path(directory) / "bench.jpg"
+    image_path.write_bytes(os.urandom(size))
+    return {"csv": csv_path, "image": image_path}
+
+
+def check_scratch_dir(remote_dir):
+    """計測用ファイルを送るフォルダの確認（ログインフォルダや楽天の取り込み・公開フォルダは不可）"""
+    remote_dir = (remote_dir or "").strip().rstrip("/")
+    if remote_dir in ("", "."):
+        raise ValueError("計測用ファイルを送信する作業フォルダを指定してください")
+    if any(remote_dir == root or remote_dir.startswith(root + "/") for root in PRODUCTION_DIRS):
+        raise ValueError(f"{remote_dir} は楽天の取り込み・公開用フォルダのため計測に使えません")
+    return remote_dir
+
+
+def benchmark_profiles(host, user, password, remote_dir, profile_names=None, sample_size=4 * MB,
+                       log=_default_log):
+    """各プロファイルで計測用ファイルを作業フォルダ（remote_dir）に送信・削除し、最速のプロファイル名と結果を返す"""
+    remote_dir = check_scratch_dir(remote_dir)
+    profile_names = profile_names or list(TRANSFER_PROFILES)
+    def quiet(message, level="INFO"):
+        pass
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="sftp_bench_") as directory:
+        samples = _benchmark_samples(directory, sample_size)
+        for name in profile_names:
+            profile = get_profile(name)
+            entry = {"profile": name, "label": profile["label"], "kinds": {}, "total_sec": 0.0}
+            for kind, path in samples.items():
+                sftp, transport = connect_sftp(host, user, password, log=quiet, compress=kind in profile["compress"])
+                remote_name = f"_integrated_ec_tool_bench_{name}_{kind}.tmp"
+                try:
+                    sftp.chdir(remote_dir)
+                    started_at = time.perf_counter()
+                    size = put_file(sftp, path, remote_name, pipelined=profile["pipelined"],
+                                    operation="sftp_bench_put")
+                    elapsed = time.perf_counter() - started_at
+                    sftp.remove(remote_name)
+                finally:
+                    sftp.close()
+                    transport.close()
+                entry["kinds"][kind] = {"seconds": elapsed, "throughput_bps": size / elapsed if elapsed else 0}
+                entry["total_sec"] += elapsed
+            details = ", ".join(f"{kind} {value['throughput_bps'] / MB:.2f}MB/s"
+                                for kind, value in entry["kinds"].items())
+            log(f"転送プロファイル {name}（{profile['label']}）: {entry['total_sec']:.2f}秒 ({details})")
+            results.append(entry)
+    best = min(results, key=lambda entry: entry["total_sec"])["profile"]
+    log(f"最速の転送プロファイル: {best}")
+    return best, results
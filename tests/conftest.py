@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+テスト共通設定 - リポジトリ直下のモジュールを読み込めるようにし、ログ・キャッシュは一時フォルダへ
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 各モジュールがDATA_DIRを決める前に設定する
+os.environ["INTEGRATED_EC_DATA_DIR"] = tempfile.mkdtemp(prefix="integrated_ec_tool_test_")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
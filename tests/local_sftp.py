@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+テスト用のローカルSFTPサーバー - 一時フォルダを公開し、パスワード認証のみ受け付ける（paramikoで実装）
+"""
+
+import os
+import socket
+import threading
+
+import paramiko
+from paramiko.sftp import SFTP_NO_SUCH_FILE, SFTP_OK
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, user, password):
+        self.user = user
+        self.password = password
+
+    def check_auth_password(self, username, password):
+        if username == self.user and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _Handle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class _SFTPServer(paramiko.SFTPServerInterface):
+    """rootフォルダをSFTPの / として公開"""
+
+    def __init__(self, server, *args, root=None, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+
+    def _local(self, path):
+        path = self.canonicalize(path)
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def canonicalize(self, path):
+        return os.path.normpath("/" + path.lstrip("/")).replace("\\", "/")
+
+    def list_folder(self, path):
+        local = self._local(path)
+        try:
+            result = []
+            for name in os.listdir(local):
+                attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)))
+                attr.filename = name
+                result.append(attr)
+            return result
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        local = self._local(path)
+        try:
+            fd = os.open(local, flags | getattr(os, "O_BINARY", 0), 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+        handle = _Handle(flags)
+        handle.filename = local
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            os.rename(self._local(oldpath), self._local(newpath))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return SFTP_OK
+
+    def chattr(self, path, attr):
+        return SFTP_OK if os.path.exists(self._local(path)) else SFTP_NO_SUCH_FILE
+
+
+class LocalSFTPServer:
+    """127.0.0.1の空きポートで待ち受けるSFTPサーバー（with文で起動・停止）"""
+
+    def __init__(self, root, user="tester", password="secret"):
+        self.root = str(root)
+        self.user = user
+        self.password = password
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.sock.listen(8)
+        self.transports = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _serve(self):
+        self.sock.settimeout(0.2)
+        while not self.stopped.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SFTPServer, root=self.root)
+            transport.start_server(server=_Server(self.user, self.password))
+            self.transports.append(transport)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
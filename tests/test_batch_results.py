@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""batch_results のエラーレポート解析・商品コード対応付け・監視のテスト（接続しない）"""
+
+import io
+from types import SimpleNamespace
+
+from batch_results import (
+    FAILED, PICKED_UP, RAKUTEN_RESULT_DIR, SUCCEEDED, BatchResultPoller, map_errors_to_codes, parse_error_report
+)
+from sftp_transfer import RAKUTEN_CSV_DIR
+
+
+class FakeSFTP:
+    """フォルダ -> {ファイル名: 内容} を持つだけのSFTP"""
+
+    def __init__(self, files):
+        self.files = files
+
+    def listdir(self, path):
+        return list(self.files.get(path, {}))
+
+    def listdir_attr(self, path):
+        return [SimpleNamespace(filename=name) for name in self.files.get(path, {})]
+
+    def open(self, path, mode="rb"):
+        folder, _, name = path.rpartition("/")
+        return io.BytesIO(self.files[folder][name])
+
+    def close(self):
+        pass
+
+
+def test_report_with_header_is_parsed_by_column():
+    data = "行番号,商品管理番号（商品URL）,エラー内容\r\n3,sofa-001,価格が不正です\r\n,,\r\n".encode("cp932")
+    assert parse_error_report(data) == [{"line": 3, "code": "sofa-001", "message": "価格が不正です"}]
+
+
+def test_report_without_header_keeps_whole_row_as_message():
+    data = "sofa-001 価格が不正です\r\n在庫数が不正です\r\n".encode("cp932")
+    assert parse_error_report(data) == [
+        {"line": None, "code": "", "message": "sofa-001 価格が不正です"},
+        {"line": None, "code": "", "message": "在庫数が不正です"},
+    ]
+
+
+def test_missing_message_column_uses_remaining_cells():
+    data = "行番号,項目,値\n2,販売価格,-1\n".encode("utf-8-sig")
+    assert parse_error_report(data) == [{"line": 2, "code": "", "message": "販売価格 -1"}]
+
+
+def test_errors_are_mapped_to_codes_by_line_number(tmp_path):
+    uploaded = tmp_path / "rakuten_normal-item.csv"
+    uploaded.write_bytes("コントロールカラム,商品管理番号（商品URL）\nu,sofa-001\nu,bed-002\n".encode("cp932"))
+    errors = [{"line": 3, "code": "", "message": "a"}, {"line": 9, "code": "", "message": "b"},
+              {"line": None, "code": "", "message": "c"}, {"line": 2, "code": "chair-003", "message": "d"}]
+    assert [error["code"] for error in map_errors_to_codes(errors, uploaded)] == ["bed-002", "", "", "chair-003"]
+
+
+def test_errors_are_unchanged_without_uploaded_csv(tmp_path):
+    errors = [{"line": 2, "code": "", "message": "a"}]
+    assert map_errors_to_codes(errors, tmp_path / "missing.csv") == errors
+
+
+def test_reports_present_before_upload_are_ignored(tmp_path):
+    report = "行番号,エラー内容\n2,価格が不正です\n".encode("cp932")
+    sftp = FakeSFTP({
+        RAKUTEN_CSV_DIR: {},
+        RAKUTEN_RESULT_DIR: {"normal-item_old.csv": report, "normal-item_new.csv": report},
+    })
+    poller = BatchResultPoller(lambda: (sftp, sftp),
+                               [(tmp_path / "missing.csv", "normal-item.csv", {"normal-item_old.csv"}),
+                                (tmp_path / "missing.csv", "item-cat.csv", set())])
+    assert poller.poll_once()
+    result = poller.results["normal-item.csv"]
+    assert result["state"] == FAILED and result["reports"] == ["normal-item_new.csv"]
+    assert poller.results["item-cat.csv"]["state"] == PICKED_UP
+
+
+def test_run_ignores_reports_listed_at_start_and_succeeds_after_grace(tmp_path):
+    sftp = FakeSFTP({
+        RAKUTEN_CSV_DIR: {},
+        RAKUTEN_RESULT_DIR: {"normal-item_old.csv": "行番号,エラー内容\n2,古いエラー\n".encode("cp932")},
+    })
+    poller = BatchResultPoller(lambda: (sftp, sftp), [(tmp_path / "missing.csv", "normal-item.csv")],
+                               initial=0, grace=0)
+    result = poller.run()["normal-item.csv"]
+    assert result["state"] == SUCCEEDED and result["errors"] == []
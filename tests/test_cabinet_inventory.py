@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""cabinet_inventory の差分更新・照合のテスト（接続しない）"""
+
+import stat
+from types import SimpleNamespace
+
+import pytest
+
+import cabinet_inventory
+from cabinet_inventory import LISTING_MAX_AGE_SEC, CabinetInventory
+
+
+class FakeSFTP:
+    """フォルダ -> {名前: (サイズ, 更新時刻) or None（サブフォルダ）} と、フォルダの更新時刻"""
+
+    def __init__(self, dirs):
+        self.dirs = dirs
+        self.dir_mtimes = {directory: 1000 for directory in dirs}
+        self.listed = []
+
+    def stat(self, directory):
+        return SimpleNamespace(st_mtime=self.dir_mtimes[directory])
+
+    def listdir_attr(self, directory):
+        self.listed.append(directory)
+        entries = []
+        for name, info in self.dirs[directory].items():
+            if info is None:
+                entries.append(SimpleNamespace(filename=name, st_mode=stat.S_IFDIR, st_size=0, st_mtime=0))
+            else:
+                entries.append(SimpleNamespace(filename=name, st_mode=stat.S_IFREG, st_size=info[0], st_mtime=info[1]))
+        return entries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cabinet_inventory.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def inventory(tmp_path, clock):
+    return CabinetInventory("upload.rakuten.ne.jp", "tester", cache_dir=tmp_path)
+
+
+def test_unchanged_folders_are_reused_until_listing_expires(inventory, clock):
+    sftp = FakeSFTP({"/cabinet/images": {"a.jpg": (100, 500), "sub": None},
+                     "/cabinet/images/sub": {"b.jpg": (200, 500)}})
+    assert inventory.refresh(sftp) == {"listed": 2, "reused": 0, "files": 2}
+    assert inventory.refresh(sftp) == {"listed": 0, "reused": 2, "files": 2}
+
+    # 同じ名前で上書き（フォルダの更新時刻は変わらない）
+    sftp.dirs["/cabinet/images"]["a.jpg"] = (150, 900)
+    clock.now += LISTING_MAX_AGE_SEC + 1
+    assert inventory.refresh(sftp)["listed"] == 2
+    assert inventory.lookup("/cabinet/images", "a.jpg") == (150, 900)
+
+
+def test_changed_folder_mtime_triggers_listing(inventory):
+    sftp = FakeSFTP({"/cabinet/images": {"a.jpg": (100, 500)}})
+    inventory.refresh(sftp)
+    sftp.dirs["/cabinet/images"]["c.jpg"] = (300, 600)
+    sftp.dir_mtimes["/cabinet/images"] = 2000
+    assert inventory.refresh(sftp)["listed"] == 1
+    assert inventory.lookup("/cabinet/images", "c.jpg") == (300, 600)
+
+
+def test_sibling_folders_with_same_prefix_are_kept(inventory):
+    inventory.refresh(FakeSFTP({"/cabinet/images2": {"x.jpg": (1, 1)}}), root="/cabinet/images2")
+    sftp = FakeSFTP({"/cabinet/images": {"a.jpg": (100, 500), "old": None}, "/cabinet/images/old": {}})
+    inventory.refresh(sftp)
+    del sftp.dirs["/cabinet/images"]["old"]
+    sftp.dir_mtimes["/cabinet/images"] = 2000
+    inventory.refresh(sftp)
+
+    assert set(inventory.dirs) == {"/cabinet/images", "/cabinet/images2"}
+    assert inventory.files("/cabinet/images") == [("/cabinet/images/a.jpg", 100)]
+
+
+def test_images_edited_after_upload_are_pending(inventory, tmp_path):
+    sftp = FakeSFTP({"/cabinet/images": {"same.jpg": (3, 0), "edited.jpg": (3, 0), "resized.jpg": (3, 0)}})
+    for name in ("same.jpg", "edited.jpg", "resized.jpg", "new.jpg"):
+        (tmp_path / name).write_bytes(b"abc")
+    (tmp_path / "resized.jpg").write_bytes(b"abcd")
+    now = (tmp_path / "same.jpg").stat().st_mtime
+    sftp.dirs["/cabinet/images"]["same.jpg"] = (3, int(now))
+    inventory.refresh(sftp)
+
+    result = inventory.reconcile(sorted(tmp_path.glob("*.jpg")))
+    assert [path.name for path in result["present"]] == ["same.jpg"]
+    assert sorted(path.name for path in result["changed"]) == ["edited.jpg", "resized.jpg"]
+    assert [path.name for path in result["missing"]] == ["new.jpg"]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""concurrency の並列数調整（AIMD）のテスト（時刻は差し替え）"""
+
+import socket
+
+import pytest
+
+import concurrency
+from concurrency import BACKOFF_COOLDOWN_SEC, EVALUATE_SEC, ConcurrencyController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(concurrency.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def controller(clock, tmp_path):
+    return ConcurrencyController("upload.rakuten.ne.jp", path=tmp_path / "concurrency.json",
+                                 log=lambda message, level="INFO": None)
+
+
+def transfer(controller, clock, kbps, index=0):
+    """EVALUATE_SEC の間に kbps で転送したことにする"""
+    clock.now += EVALUATE_SEC
+    controller.record(index, kbps * 1024 * EVALUATE_SEC, EVALUATE_SEC)
+
+
+def test_limit_is_not_changed_before_evaluation_window(controller, clock):
+    clock.now += EVALUATE_SEC - 1
+    controller.record(0, 10 * 1024 * 1024, 1)
+    assert controller.limit == 2
+
+
+def test_limit_grows_while_throughput_improves(controller, clock):
+    transfer(controller, clock, 100)
+    assert controller.limit == 3
+    transfer(controller, clock, 200)
+    assert controller.limit == 4
+    transfer(controller, clock, 202)  # IMPROVE_RATIO 未満の改善は据え置き
+    assert controller.limit == 4
+
+
+def test_limit_steps_back_when_increase_slows_down(controller, clock):
+    transfer(controller, clock, 100)
+    transfer(controller, clock, 200)
+    transfer(controller, clock, 150)
+    assert controller.limit == 3
+    transfer(controller, clock, 100)  # 減らした後の低下ではさらに減らさない
+    assert controller.limit == 3
+
+
+def test_connection_error_halves_limit_once_per_cooldown(controller, clock):
+    controller.limit = 8
+    controller.record_error(0, socket.timeout("timed out"))
+    assert controller.limit == 4
+    clock.now += BACKOFF_COOLDOWN_SEC - 1
+    controller.record_error(1, ConnectionResetError("reset by peer"))
+    assert controller.limit == 4
+    clock.now += 1
+    controller.record_error(1, EOFError())
+    assert controller.limit == 2
+    assert controller.last_bps is None
+    assert [stats["errors"] for stats in controller.summary().values()] == [1, 2]
+
+
+def test_other_errors_do_not_change_limit(controller, clock):
+    controller.record_error(0, PermissionError("permission denied"))
+    controller.record_error(0, FileNotFoundError("no such file"))
+    assert controller.limit == 2
+
+
+def test_limit_stays_within_bounds(controller, clock):
+    controller.limit = 1
+    controller.record_error(0, TimeoutError())
+    assert controller.limit == 1
+    controller.limit = 8
+    transfer(controller, clock, 100)
+    assert controller.limit == 8
+
+
+def test_best_limit_is_saved_per_host(controller, clock, tmp_path):
+    transfer(controller, clock, 100)
+    transfer(controller, clock, 300)
+    transfer(controller, clock, 150)
+    controller.save()
+    restored = ConcurrencyController("upload.rakuten.ne.jp", path=tmp_path / "concurrency.json")
+    assert restored.limit == 3
+    assert ConcurrencyController("other.example.com", path=tmp_path / "concurrency.json").limit == 2
+
+
+def test_limit_that_caused_backoff_is_not_saved(controller, clock, tmp_path):
+    transfer(controller, clock, 100)
+    transfer(controller, clock, 300)  # 並列数3で最速
+    transfer(controller, clock, 250)  # 4で遅くなり3に戻す
+    assert controller.best == (300 * 1024, 3) and controller.limit == 3
+    controller.record_error(0, ConnectionResetError("reset by peer"))  # 最速だった3で切断 → 1
+    controller.save()
+    assert ConcurrencyController("upload.rakuten.ne.jp", path=tmp_path / "concurrency.json").limit == 1
+
+    transfer(controller, clock, 150)  # 切断後の計測は保存対象
+    assert controller.best == (150 * 1024, 1)
+
+
+def test_best_below_failing_limit_is_kept(controller, clock, tmp_path):
+    transfer(controller, clock, 100)
+    transfer(controller, clock, 300)  # 並列数3で最速、4に増やす
+    controller.record_error(0, ConnectionResetError("reset by peer"))  # 4で切断 → 2
+    controller.save()
+    assert ConcurrencyController("upload.rakuten.ne.jp", path=tmp_path / "concurrency.json").limit == 3
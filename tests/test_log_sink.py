@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""log_sink の伏せ字処理のテスト"""
+
+import threading
+
+from log_sink import REDACTED, redact, register_secret
+
+
+def test_longer_secret_containing_another_is_fully_redacted():
+    register_secret("pass")
+    register_secret("pass-word-123")
+    register_secret("")
+    register_secret(None)
+    assert redact("login pass-word-123 / pass") == f"login {REDACTED} / {REDACTED}"
+
+
+def test_registering_while_redacting_from_other_threads():
+    errors = []
+    stop = threading.Event()
+
+    def redact_loop():
+        try:
+            while not stop.is_set():
+                redact("user=tester token=secret-0")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=redact_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for index in range(2000):
+        register_secret(f"secret-{index}")
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert redact("token=secret-1999") == f"token={REDACTED}"
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""page_verify の商品ページ解析・照合のテスト（tests/fixtures のHTMLを使用、接続しない）"""
+
+from pathlib import Path
+
+import pytest
+
+from page_verify import PRODUCT_PAGE_URLS, compare_product, extract_product_data, verify_products
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def fixture_html(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def test_json_ld_product_in_graph_is_preferred():
+    assert extract_product_data(fixture_html("rakuten_item.html")) == {
+        "title": "【送料無料】ソファ 3人掛け ナチュラル",
+        "price": "29800",
+        "availability": "https://schema.org/InStock",
+    }
+
+
+def test_meta_tags_are_used_without_json_ld():
+    assert extract_product_data(fixture_html("meta_only.html")) == {
+        "title": "ベッド シングル & マットレス",
+        "price": "19,800",
+        "availability": "out of stock",
+    }
+
+
+def test_static_yahoo_page_has_only_title():
+    assert extract_product_data(fixture_html("yahoo_static.html")) == {
+        "title": "チェア 2脚セット", "price": "", "availability": ""}
+
+
+def test_matching_product_has_no_mismatches():
+    actual = extract_product_data(fixture_html("rakuten_item.html"))
+    expected = {"title": "ソファ 3人掛け ナチュラル", "price": "29800", "stock": "5"}
+    assert compare_product(expected, actual) == ([], [])
+
+
+def test_price_title_and_stock_mismatches():
+    actual = extract_product_data(fixture_html("meta_only.html"))
+    expected = {"title": "ベッド ダブル", "price": "18800", "stock": "3"}
+    mismatches, unverified = compare_product(expected, actual)
+    assert mismatches == [
+        ("価格", 18800, 19800),
+        ("商品名", "ベッド ダブル", "ベッド シングル & マットレス"),
+        ("在庫", 3, "out of stock"),
+    ]
+    assert unverified == []
+
+
+def test_values_missing_from_page_are_unverified_not_mismatched():
+    actual = extract_product_data(fixture_html("yahoo_static.html"))
+    expected = {"title": "チェア 2脚セット", "price": "9800", "stock": "0"}
+    assert compare_product(expected, actual) == ([], ["価格", "在庫"])
+
+
+def test_fields_outside_static_fields_are_unverified():
+    actual = extract_product_data(fixture_html("meta_only.html"))
+    expected = {"title": "ベッド シングル", "price": "1", "stock": "1"}
+    assert compare_product(expected, actual, fields=("title",)) == ([], ["価格", "在庫"])
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    (tmp_path / "rakuten_normal-item.csv").write_bytes(
+        "商品管理番号（商品URL）,商品名,販売価格,在庫数\nsofa-001,ソファ 3人掛け ナチュラル,29800,5\n".encode("cp932"))
+    (tmp_path / "yahoo_item.csv").write_bytes(
+        "code,name,price,quantity\nchair-002,チェア 2脚セット,9800,0\n".encode("cp932"))
+    return tmp_path
+
+
+def test_verify_products_uses_static_fields_per_store(run_dir):
+    pages = {
+        PRODUCT_PAGE_URLS["rakuten"].format(code="sofa-001"): fixture_html("rakuten_item.html"),
+        PRODUCT_PAGE_URLS["taiho-kagu"].format(code="chair-002"): fixture_html("rakuten_item.html"),
+    }
+    results = {result["store"]: result for result in
+               verify_products(run_dir, stores=["rakuten", "taiho-kagu"], fetch=pages.__getitem__)}
+    assert results["rakuten"]["mismatches"] == [] and results["rakuten"]["unverified"] == []
+    # Yahooは静的HTMLの価格・在庫を信用しない（表示と違っても不一致にしない）
+    assert results["taiho-kagu"]["mismatches"] == [("商品名", "チェア 2脚セット", "【送料無料】ソファ 3人掛け ナチュラル")]
+    assert results["taiho-kagu"]["unverified"] == ["価格", "在庫"]
+
+
+def test_fetch_errors_are_reported_per_product(run_dir):
+    def fetch(url):
+        raise IOError("timed out")
+    (result,) = verify_products(run_dir, stores=["rakuten"], fetch=fetch)
+    assert result["error"] == "timed out" and result["mismatches"] == []
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""sftp_diagnostics のテスト（ローカルのSFTPサーバーに対して実際に計測）"""
+
+import socket
+
+import pytest
+
+pytest.importorskip("paramiko")
+
+from local_sftp import LocalSFTPServer
+from sftp_diagnostics import PHASES, describe_result, diagnose, load_history, save_result
+from sftp_transfer import FALLBACK_PASSWORDS
+
+SAMPLE_SIZE = 64 * 1024
+
+
+@pytest.fixture
+def server_root(tmp_path):
+    root = tmp_path / "remote"
+    root.mkdir()
+    return root
+
+
+def run_diagnose(server, password, **kwargs):
+    return diagnose("127.0.0.1", server.user, password, port=server.port, sample_size=SAMPLE_SIZE,
+                    remote_dir="/", timeout=5, log=lambda message, level="INFO": None, **kwargs)
+
+
+def test_diagnose_measures_every_phase(server_root):
+    with LocalSFTPServer(server_root) as server:
+        result = run_diagnose(server, server.password)
+    assert result["failed_phase"] is None, result["error"]
+    assert set(result["phases"]) == {name for name, _ in PHASES}
+    assert result["auth_attempts"] == 1
+    assert result["auth_failures_ms"] == []
+    assert result["phases"]["upload_kbps"] > 0 and result["phases"]["download_kbps"] > 0
+    # 計測用ファイルは削除される
+    assert list(server_root.iterdir()) == []
+
+
+def test_auth_time_excludes_failed_attempts(server_root):
+    with LocalSFTPServer(server_root, password=FALLBACK_PASSWORDS[-1]) as server:
+        result = run_diagnose(server, "wrong-password")
+    assert result["failed_phase"] is None, result["error"]
+    assert result["auth_attempts"] == len(FALLBACK_PASSWORDS) + 1
+    assert len(result["auth_failures_ms"]) == len(FALLBACK_PASSWORDS)
+    assert "auth_ms" in result["phases"]
+
+
+def test_auth_failure_is_recorded_not_raised(server_root):
+    with LocalSFTPServer(server_root) as server:
+        result = run_diagnose(server, "wrong-password")
+    assert result["failed_phase"] == "auth_ms"
+    assert "AuthenticationException" in result["error"]
+    assert "auth_ms" not in result["phases"]
+    assert set(result["phases"]) == {"dns_ms", "tcp_ms", "kex_ms"}
+    assert "wrong-password" not in describe_result(result)
+
+
+def test_closed_port_fails_at_tcp_connect():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    result = diagnose("127.0.0.1", "tester", "secret", port=port, timeout=2, log=lambda message, level="INFO": None)
+    assert result["failed_phase"] == "tcp_ms"
+    assert "dns_ms" in result["phases"]
+
+
+def test_history_is_compared_per_host(tmp_path):
+    path = tmp_path / "history.jsonl"
+    for host, tcp_ms in (("a", 10), ("b", 500), ("a", 30)):
+        save_result({"host": host, "port": 22, "user": "u", "phases": {"tcp_ms": tcp_ms},
+                     "failed_phase": None, "error": None}, path)
+    history = load_history("a", path=path)
+    assert [entry["phases"]["tcp_ms"] for entry in history] == [30, 10]
+
+    result = {"host": "a", "port": 22, "user": "u", "phases": {"tcp_ms": 40}, "failed_phase": None, "error": None}
+    assert "過去2回の中央値 20.0ms、2.00倍" in describe_result(result, history)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""sftp_transfer の計測用フォルダの確認・アップロード後の検証のテスト"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from sftp_transfer import SessionPool, benchmark_profiles, check_remote_file, check_scratch_dir, local_hash
+
+
+@pytest.mark.parametrize("remote_dir", ["", " ", ".", "./", "/ritem", "/ritem/batch", "/cabinet/images/"])
+def test_login_and_production_dirs_are_rejected(remote_dir):
+    with pytest.raises(ValueError):
+        check_scratch_dir(remote_dir)
+
+
+def test_scratch_dir_is_normalized():
+    assert check_scratch_dir(" /tmp/bench/ ") == "/tmp/bench"
+    assert check_scratch_dir("/cabinet-test") == "/cabinet-test"
+
+
+def test_benchmark_refuses_to_start_without_scratch_dir():
+    with pytest.raises(ValueError):
+        benchmark_profiles("127.0.0.1", "tester", "secret", ".")
+
+
+class FakeRemote:
+    def __init__(self, error=None, digest=None):
+        self.error = error
+        self.digest = digest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def check(self, hash_algorithm, offset=0, length=0, block_size=0):
+        if self.error is not None:
+            raise self.error
+        return self.digest
+
+
+class FakeSFTP:
+    def __init__(self, size, remotes):
+        self.size = size
+        self.remotes = remotes  # check() ごとの結果（順に使う）
+
+    def stat(self, path):
+        return SimpleNamespace(st_size=self.size)
+
+    def open(self, path, mode):
+        return self.remotes.pop(0)
+
+
+def make_pool(sftp):
+    return SessionPool(SimpleNamespace(open_sftp_client=lambda: sftp), size=1)
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"abc")
+    return path
+
+
+def test_transient_check_error_keeps_hash_verification(local_file):
+    sftp = FakeSFTP(3, [FakeRemote(IOError("Timeout opening channel.")),
+                        FakeRemote(digest=local_hash(local_file))])
+    pool = make_pool(sftp)
+    assert check_remote_file(pool, local_file, "/cabinet/images/a.jpg").startswith("ハッシュを確認できません")
+    assert pool.hash_supported
+    assert check_remote_file(pool, local_file, "/cabinet/images/a.jpg") is None
+
+
+def test_unsupported_check_file_disables_hash_once_with_warning(local_file):
+    messages = []
+    log = lambda message, level="INFO": messages.append(level)
+    sftp = FakeSFTP(3, [FakeRemote(IOError("Operation unsupported")), FakeRemote(digest=b"never used")])
+    pool = make_pool(sftp)
+    assert check_remote_file(pool, local_file, "/cabinet/images/a.jpg", log) is None
+    assert check_remote_file(pool, local_file, "/cabinet/images/a.jpg", log) is None
+    assert not pool.hash_supported and messages == ["WARNING"]
+
+
+def test_size_and_hash_mismatch(local_file):
+    assert check_remote_file(make_pool(FakeSFTP(4, [])), local_file, "a.jpg") == "サイズ不一致 (4 != 3)"
+    assert check_remote_file(make_pool(FakeSFTP(3, [FakeRemote(digest=b"x")])), local_file, "a.jpg") == "ハッシュ不一致"
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""tracing のスパン記録・デコレーターのテスト"""
+
+import io
+import json
+from types import SimpleNamespace
+
+from sftp_transfer import put_file
+from tracing import span, trace_run, traced_run
+
+
+def spans(path):
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    return {event["name"]: event for event in events if event["ph"] == "X"}
+
+
+def test_nested_spans_are_exported(tmp_path):
+    with trace_run("upload", trace_dir=tmp_path) as run:
+        with span("sftp_put", "operation", file="a.csv"):
+            pass
+    events = spans(run.path)
+    assert set(events) == {"upload", "sftp_put"}
+    assert events["sftp_put"]["args"]["file"] == "a.csv"
+
+
+def test_traced_run_wraps_each_call(tmp_path):
+    class Tool:
+        path = "C:/master.exe"
+
+        @traced_run("master_launch", lambda self: {"path": self.path, "trace_dir": tmp_path})
+        def launch(self):
+            """マスタツール起動"""
+            with span("master_popen"):
+                return "launched"
+
+    assert Tool.launch.__doc__ == "マスタツール起動"
+    assert Tool().launch() == "launched"
+    (path,) = tmp_path.glob("*.json")
+    events = spans(path)
+    assert set(events) == {"master_launch", "master_popen"}
+    assert events["master_launch"]["args"]["path"] == "C:/master.exe"
+
+
+class FakeRemoteFile(io.BytesIO):
+    def set_pipelined(self, pipelined):
+        pass
+
+    def stat(self):
+        return SimpleNamespace(st_size=len(self.getvalue()))
+
+
+def test_put_file_records_a_span_per_file(tmp_path):
+    local = tmp_path / "normal-item.csv"
+    local.write_bytes(b"x" * 100)
+    sftp = SimpleNamespace(open=lambda name, mode: FakeRemoteFile())
+    with trace_run("rakuten_upload", trace_dir=tmp_path / "traces") as run:
+        assert put_file(sftp, local, "normal-item.csv") == 100
+    put = spans(run.path)["sftp_put"]
+    assert put["args"]["file"] == "normal-item.csv" and put["args"]["bytes"] == 100
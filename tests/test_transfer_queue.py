@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""transfer_queue の優先度・依存関係・重複追加のテスト（接続しない）"""
+
+import pytest
+
+from transfer_queue import (
+    CANCELLED, DONE, FAILED, PRIORITY_BULK, PRIORITY_NORMAL, PRIORITY_URGENT, QUEUED, RUNNING, TransferQueue
+)
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    def make(name, size=10):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return path
+    return make
+
+
+def next_name(transfer_queue):
+    with transfer_queue.cond:
+        job = transfer_queue._next_job()
+    return job.name if job else None
+
+
+def test_lower_priority_value_goes_first_then_insertion_order(make_file):
+    transfer_queue = TransferQueue()
+    transfer_queue.add(make_file("bulk.jpg"), "/cabinet/images/bulk.jpg", priority=PRIORITY_BULK)
+    transfer_queue.add(make_file("first.csv"), "/ritem/batch/first.csv", priority=PRIORITY_NORMAL)
+    transfer_queue.add(make_file("second.csv"), "/ritem/batch/second.csv", priority=PRIORITY_NORMAL)
+    assert next_name(transfer_queue) == "first.csv"
+
+    urgent = transfer_queue.add(make_file("urgent.jpg"), "/cabinet/images/urgent.jpg", priority=PRIORITY_BULK)
+    transfer_queue.set_priority(urgent.id, PRIORITY_URGENT)
+    assert next_name(transfer_queue) == "urgent.jpg"
+
+
+def test_paused_jobs_and_paused_queue_are_skipped(make_file):
+    transfer_queue = TransferQueue()
+    held = transfer_queue.add(make_file("held.csv"), "/ritem/batch/held.csv")
+    other = transfer_queue.add(make_file("other.csv"), "/ritem/batch/other.csv")
+    transfer_queue.set_job_paused(held.id, True)
+    assert transfer_queue.take() is other and other.state == RUNNING and other.attempts == 1
+
+    transfer_queue._finish(other, DONE)
+    assert transfer_queue.take() is None  # 保留中のジョブだけなら待たずに終わる
+
+
+def test_dependent_waits_for_dependency_to_finish(make_file):
+    transfer_queue = TransferQueue()
+    first = transfer_queue.add(make_file("normal-item.csv"), "/ritem/batch/normal-item.csv")
+    second = transfer_queue.add(make_file("item-cat.csv"), "/ritem/batch/item-cat.csv", depends_on=[first.id])
+    first.state = RUNNING
+    assert next_name(transfer_queue) is None
+    first.state = DONE
+    assert next_name(transfer_queue) == "item-cat.csv"
+    assert second.state == QUEUED
+
+
+def test_dependent_is_cancelled_when_dependency_fails(make_file):
+    transfer_queue = TransferQueue()
+    first = transfer_queue.add(make_file("normal-item.csv"), "/ritem/batch/normal-item.csv")
+    second = transfer_queue.add(make_file("item-cat.csv"), "/ritem/batch/item-cat.csv", depends_on=[first.id])
+    first.state = FAILED
+    assert next_name(transfer_queue) is None
+    assert second.state == CANCELLED
+
+
+def test_same_remote_path_is_not_queued_twice(make_file):
+    transfer_queue = TransferQueue()
+    path = make_file("a.jpg")
+    job = transfer_queue.add(path, "/cabinet/images/a.jpg")
+    assert transfer_queue.add(path, "/cabinet/images/a.jpg") is None
+    job.state = RUNNING
+    assert transfer_queue.add(path, "/cabinet/images/a.jpg") is None
+    job.state = DONE
+    assert transfer_queue.add(path, "/cabinet/images/a.jpg") is not None
+
+
+def test_rakuten_csv_dependency_and_requeue_while_unfinished(tmp_path):
+    for name in ("rakuten_normal-item.csv", "rakuten_item-cat.csv"):
+        (tmp_path / name).write_text("x")
+    transfer_queue = TransferQueue()
+    log = lambda message, level="INFO": None
+    normal_item, item_cat = transfer_queue.add_rakuten_csv(tmp_path, log=log)
+    assert item_cat.depends_on == {normal_item.id}
+    assert transfer_queue.add_rakuten_csv(tmp_path, log=log) == []
+
+    # item-catだけ完了済みなら、追加したitem-catは転送待ちのnormal-itemを待つ
+    item_cat.state = DONE
+    (readded,) = transfer_queue.add_rakuten_csv(tmp_path, log=log)
+    assert readded.name == "item-cat.csv" and readded.depends_on == {normal_item.id}
+
+
+def test_saved_queue_is_restored_without_duplicates(make_file, tmp_path):
+    path = tmp_path / "queue.json"
+    transfer_queue = TransferQueue(path)
+    first = transfer_queue.add(make_file("normal-item.csv"), "/ritem/batch/normal-item.csv")
+    transfer_queue.add(make_file("item-cat.csv"), "/ritem/batch/item-cat.csv", depends_on=[first.id])
+    transfer_queue.save()
+
+    restored = TransferQueue(path)
+    assert restored.load() == 2
+    assert restored.load() == 0
+    first_restored, second_restored = restored.ordered()
+    assert second_restored.depends_on == {first_restored.id}
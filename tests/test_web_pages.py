@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""web_pages のメモリ上限超過時の破棄順のテスト"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+QtWebEngineWidgets = pytest.importorskip("PyQt5.QtWebEngineWidgets")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from web_pages import LIFECYCLE_SUPPORTED, PAGE_MEMORY_ESTIMATE_MB, ViewLifecycleManager  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not LIFECYCLE_SUPPORTED, reason="Qt 5.14未満はライフサイクル状態が無い")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(["pytest"])
+
+
+@pytest.fixture
+def manager(app, monkeypatch):
+    manager = ViewLifecycleManager(memory_ceiling_mb=PAGE_MEMORY_ESTIMATE_MB * 3, check_interval_ms=3600000)
+    view = QtWebEngineWidgets.QWebEngineView()
+    manager.register("yahoo", view)
+    manager.set_visible("yahoo", False)
+    yield manager
+    view.deleteLater()
+
+
+def discarded(manager):
+    return manager._state("yahoo") == QtWebEngineWidgets.QWebEnginePage.Discarded
+
+
+def test_background_pages_are_released_before_views(manager, monkeypatch):
+    monkeypatch.setattr(manager, "renderer_memory_mb", lambda: PAGE_MEMORY_ESTIMATE_MB * 5)
+    calls = []
+    manager.add_reclaimer(lambda: calls.append("prefetch") or 2)
+    manager.add_reclaimer(lambda: calls.append("pool") or 0)
+    manager.enforce_memory_ceiling()
+    assert calls == ["prefetch"]
+    assert not discarded(manager)
+
+
+def test_view_is_discarded_when_background_pages_are_not_enough(manager, monkeypatch):
+    monkeypatch.setattr(manager, "renderer_memory_mb", lambda: PAGE_MEMORY_ESTIMATE_MB * 5)
+    manager.add_reclaimer(lambda: 1)
+    manager.enforce_memory_ceiling()
+    assert discarded(manager)
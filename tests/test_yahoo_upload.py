@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""yahoo_upload の自動アップロードをローカル代替ページ（STANDIN_HTML）で確認"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+QtWebEngineWidgets = pytest.importorskip("PyQt5.QtWebEngineWidgets")
+
+from PyQt5.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from yahoo_upload import STANDIN_HTML, YAHOO_STORES, YahooUploadAutomation, YahooUploadPage, merge_form_spec  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication(["pytest"])
+
+
+@pytest.fixture
+def view(app):
+    view = QtWebEngineWidgets.QWebEngineView()
+    view.setPage(YahooUploadPage(QtWebEngineWidgets.QWebEngineProfile.defaultProfile(), view))
+    view.resize(800, 600)
+    view.show()
+    yield view
+    view.close()
+    view.deleteLater()
+
+
+def standin_spec(tmp_path):
+    standin = tmp_path / "itemmgr.html"
+    standin.write_text(STANDIN_HTML, encoding="utf-8")
+    # 種類ごとに別のURLにして、種類ごとのフォーム定義が使われることを確認する
+    form = {"file_input": "#upfile", "submit": "input[type=submit]"}
+    return {"item": dict(form, url=standin.as_uri() + "?kind=item"),
+            "option": dict(form, url=standin.as_uri() + "?kind=option"),
+            "result": "#result", "timeout_sec": 30}
+
+
+def run_until_finished(automation, timeout_ms=120000):
+    loop = QEventLoop()
+    results = []
+    automation.all_finished.connect(lambda finished: (results.extend(finished), loop.quit()))
+    QTimer.singleShot(timeout_ms, loop.quit)
+    automation.start()
+    loop.exec_()
+    return results
+
+
+def test_item_and_option_files_are_uploaded_for_both_stores(view, tmp_path):
+    files = {}
+    for kind in ("item", "option"):
+        files[kind] = tmp_path / f"yahoo_{kind}.csv"
+        files[kind].write_bytes("code,name\nA000001,テスト\n".encode("cp932"))
+    automation = YahooUploadAutomation(view, standin_spec(tmp_path))
+    for store in YAHOO_STORES:
+        for kind, path in files.items():
+            automation.enqueue(store, kind, path)
+
+    results = run_until_finished(automation)
+    assert [(job.store, job.kind) for job in results] == [
+        (store, kind) for store in YAHOO_STORES for kind in files]
+    for job in results:
+        assert job.status == "success", job.message
+        assert job.name in job.message
+
+
+def test_option_form_is_required(view):
+    automation = YahooUploadAutomation(view)
+    assert automation.can_upload("item")
+    assert not automation.can_upload("option")
+    with pytest.raises(Exception):
+        automation.enqueue("taiho-kagu", "option", "yahoo_option.csv")
+
+
+def test_form_spec_is_merged_per_kind():
+    spec = merge_form_spec({"item": {"submit": "#send"}, "option": {"url": "https://example.com/{store}"}})
+    assert spec["item"]["submit"] == "#send"
+    assert spec["item"]["url"].startswith("https://editor.store.yahoo.co.jp/")
+    assert spec["option"]["file_input"] == "input[type=file]"
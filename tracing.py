@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+処理トレース - 入れ子のスパンを記録し、Chromeトレース形式(JSON)で出力（Perfettoで表示可能）
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app_settings import DATA_DIR
+
+DEFAULT_TRACE_DIR = DATA_DIR / "logs" / "traces"
+# 残しておくトレースファイル数
+TRACE_KEEP = 50
+
+# 統合ツールのロガーの子（構造化ログのファイルに出力される）
+logger = logging.getLogger("integrated_ec_tool.tracing")
+
+
+class Tracer:
+    """実行中のトレースのイベントを集める（トレース中でなければスパンは記録しない）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = None
+        self.thread_names = {}
+        self.origin = 0.0
+        self.pid = os.getpid()
+
+    @property
+    def active(self):
+        return self.events is not None
+
+    def begin(self):
+        with self.lock:
+            self.events = []
+            self.thread_names = {}
+            self.origin = time.perf_counter()
+
+    def end(self):
+        """記録したイベントを取り出してトレースを終了"""
+        with self.lock:
+            events, self.events = self.events or [], None
+            thread_names, self.thread_names = self.thread_names, {}
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+             "args": {"name": "integrated_ec_tool"}}
+        ]
+        for tid, name in thread_names.items():
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                             "args": {"name": name}})
+        return metadata + events
+
+    def add_span(self, name, category, started_at, finished_at, args):
+        thread = threading.current_thread()
+        with self.lock:
+            if self.events is None:
+                return
+            self.thread_names.setdefault(thread.ident, thread.name)
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started_at - self.origin) * 1e6, 1),
+                "dur": round((finished_at - started_at) * 1e6, 1),
+                "pid": self.pid,
+                "tid": thread.ident,
+                "args": args,
+            })
+
+
+_tracer = Tracer()
+
+
+class Span:
+    """with文の範囲を1つのスパンとして記録（範囲内のスパンは子として表示される）"""
+
+    def __init__(self, name, category="ec", **args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started_at = None
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = str(exc)
+        _tracer.add_span(self.name, self.category, self.started_at, time.perf_counter(), self.args)
+        return False
+
+
+def span(name, category="ec", **args):
+    """スパンのコンテキストマネージャー"""
+    return Span(name, category, **args)
+
+
+def export_chrome_trace(events, path):
+    """Chromeトレース形式で保存"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+    return path
+
+
+def _prune_traces(trace_dir, keep=TRACE_KEEP):
+    traces = sorted(Path(trace_dir).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in traces[:-keep]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+class TraceRun:
+    """実行単位のトレース。既にトレース中なら1つのスパンとして入れ子にし、最外側の終了時にファイルへ出力"""
+
+    def __init__(self, name, trace_dir=DEFAULT_TRACE_DIR, **args):
+        self.name = name
+        self.trace_dir = trace_dir
+        self.span = Span(name, "run", **args)
+        self.root = False
+        self.path = None
+
+    def __enter__(self):
+        self.root = not _tracer.active
+        if self.root:
+            _tracer.begin()
+        self.span.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.__exit__(exc_type, exc, tb)
+        if self.root:
+            events = _tracer.end()
+            file_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.name}.json"
+            try:
+                self.path = export_chrome_trace(events, Path(self.trace_dir) / file_name)
+                _prune_traces(self.trace_dir)
+                logger.info(f"トレースを保存しました: {self.path}")
+            except OSError as e:
+                logger.warning(f"トレースを保存できませんでした: {e}")
+        return False
+
+
+def trace_run(name, trace_dir=DEFAULT_TRACE_DIR, **args):
+    """実行単位のトレースのコンテキストマネージャー"""
+    return TraceRun(name, trace_dir, **args)
+
+
+def traced_run(name, fields=None):
+    """関数の実行を trace_run で囲むデコレーター（fields: 関数と同じ引数を受け取り、スパンの引数を返す関数）"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_run(name, **(fields(*args, **kwargs) if fields else {})):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
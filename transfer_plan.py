@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+転送の見積もり - アップロードするファイル・バイト数・所要時間を、接続せずに（在庫キャッシュと過去の転送速度から）計算
+"""
+
+from concurrency import load_learned
+from progress_bus import format_bytes, format_duration
+from sftp_transfer import RAKUTEN_CSV_DIR, RAKUTEN_IMAGE_DIR, list_images, rakuten_csv_files
+
+# 過去の転送速度が無い場合の仮定値
+DEFAULT_THROUGHPUT_BPS = 1024 * 1024
+# 接続（パスワード試行・SFTPセッション開始）にかかる時間
+CONNECT_OVERHEAD_SEC = 3
+# 1ファイルごとの開く・閉じる・検証の往復
+PER_FILE_OVERHEAD_SEC = 0.1
+
+
+def historical_throughput(host):
+    """そのサーバーへの過去の全体転送速度（bytes/s、記録が無ければNone）"""
+    return load_learned().get(host, {}).get("throughput_bps")
+
+
+def plan_upload(host, csv_dir=None, image_folder=None, inventory=None, connect=None):
+    """アップロードする内容と所要時間の見積もり
+
+    inventory: R-Cabinet在庫キャッシュ（保存済みの一覧があれば接続しない）
+    connect: 一覧が無い場合に (sftp, transport) を返す関数（Noneなら接続せず全画像を対象とする）
+    """
+    plan = {"csv": [], "images": [], "skipped": [], "changed": [], "inventory": None, "inventory_age_sec": None}
+    if csv_dir:
+        plan["csv"] = [(path, f"{RAKUTEN_CSV_DIR}/{remote_name}", path.stat().st_size)
+                       for path, remote_name in rakuten_csv_files(csv_dir)]
+
+    if image_folder:
+        files = list_images(image_folder)
+        if inventory is not None and not inventory.available and connect is not None:
+            sftp, transport = connect()
+            try:
+                inventory.refresh(sftp)
+            finally:
+                sftp.close()
+                transport.close()
+            inventory.save()
+            plan["inventory"] = "refreshed"
+        elif inventory is not None and inventory.available:
+            plan["inventory"] = "cached"
+            plan["inventory_age_sec"] = inventory.age_sec()
+
+        if plan["inventory"]:
+            result = inventory.reconcile(files)
+            plan["skipped"] = result["present"]
+            plan["changed"] = result["changed"]
+            files = result["missing"] + result["changed"]
+        plan["images"] = [(path, f"{RAKUTEN_IMAGE_DIR}/{path.name}", path.stat().st_size) for path in files]
+
+    transfers = plan["csv"] + plan["images"]
+    plan["files"] = len(transfers)
+    plan["bytes"] = sum(size for _, _, size in transfers)
+    throughput = historical_throughput(host)
+    plan["history"] = throughput is not None
+    plan["throughput_bps"] = throughput or DEFAULT_THROUGHPUT_BPS
+    plan["seconds"] = (CONNECT_OVERHEAD_SEC + plan["bytes"] / plan["throughput_bps"]
+                       + plan["files"] * PER_FILE_OVERHEAD_SEC) if transfers else 0
+    return plan
+
+
+def _format_age(seconds):
+    if seconds < 3600:
+        return f"{int(seconds // 60)}分前"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}時間前"
+    return f"{int(seconds // 86400)}日前"
+
+
+def describe_plan(plan):
+    """見積もりの表示用テキスト"""
+    lines = [f"転送ファイル: {plan['files']}件 / {format_bytes(plan['bytes'])}"]
+    if plan["csv"]:
+        lines.append(f"  CSV: {', '.join(remote.rpartition('/')[2] for _, remote, _ in plan['csv'])}")
+    if plan["images"] or plan["skipped"]:
+        lines.append(f"  画像: {len(plan['images'])}件（うち変更 {len(plan['changed'])}件）"
+                     f" / アップロード済みでスキップ {len(plan['skipped'])}件")
+        if plan["inventory"] == "cached":
+            lines.append(f"  R-Cabinet一覧: 保存済み（{_format_age(plan['inventory_age_sec'])}に取得）")
+        elif plan["inventory"] is None:
+            lines.append("  R-Cabinet一覧: 未取得のため全画像を対象としています")
+    source = "過去の実績" if plan["history"] else "仮定値（実績なし）"
+    lines.append(f"所要時間の目安: {format_duration(plan['seconds'])}"
+                 f"（{format_bytes(plan['throughput_bps'])}/s、{source}）")
+    return "\n".join(lines)
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+転送キュー - 優先度・依存関係付きのSFTPアップロード（並列数は自動調整、一時停止・再開・キャンセル、転送済みファイルは並列に検証）
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app_settings import DATA_DIR
+from batch_results import list_report_names
+from concurrency import ConcurrencyController, is_connection_error
+from log_sink import LOGGER_NAME, timed_operation
+from sftp_transfer import (
+    DEFAULT_PROFILE, RAKUTEN_CSV_DIR, RAKUTEN_CSV_FILES, RAKUTEN_IMAGE_DIR, VERIFY_RETRIES, VERIFY_WORKERS,
+    ConnectionFailed, SessionPool, TransferCancelled, check_remote_file, connect_sftp, file_kind, get_profile, list_images,
+    put_file, rakuten_csv_files
+)
+from tracing import span
+
+# 優先度（小さいほど先に転送）
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 10  # CSV
+PRIORITY_BULK = 20  # 画像の一括アップロード
+
+# ジョブの状態
+QUEUED = "queued"
+RUNNING = "running"
+VERIFYING = "verifying"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+CANCELLED = "cancelled"
+STATE_LABELS = {
+    QUEUED: "待機",
+    RUNNING: "転送中",
+    VERIFYING: "検証中",
+    DONE: "完了",
+    SKIPPED: "スキップ",
+    FAILED: "失敗",
+    CANCELLED: "キャンセル",
+}
+FINISHED_STATES = (DONE, SKIPPED, FAILED, CANCELLED)
+
+# 転送・検証に失敗したジョブを再試行する回数
+MAX_ATTEMPTS = VERIFY_RETRIES + 1
+
+# 未完了のジョブの保存先（接続できない間も残し、回復後に続きを転送）
+QUEUE_FILE = DATA_DIR / "cache" / "transfer_queue.json"
+QUEUE_SAVE_INTERVAL_SEC = 30
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def _default_log(message, level="INFO"):
+    logger.log(getattr(logging, level, logging.INFO), message)
+
+
+class TransferJob:
+    """1ファイルの転送"""
+
+    def __init__(self, job_id, local_path, remote_path, kind, priority, depends_on=()):
+        self.id = job_id
+        self.local_path = Path(local_path)
+        self.remote_path = remote_path
+        self.kind = kind
+        self.priority = priority
+        self.depends_on = set(depends_on)
+        self.size = os.path.getsize(local_path)
+        self.state = QUEUED
+        self.paused = False
+        self.cancel_requested = False
+        self.attempts = 0
+        self.error = None
+        self.seq = 0  # 同じ優先度では追加順
+        self.report_baseline = None  # CSV: アップロード直前にあった楽天のエラーレポート名（処理結果の監視用）
+
+    @property
+    def name(self):
+        return self.remote_path.rpartition("/")[2]
+
+    @property
+    def remote_dir(self):
+        return self.remote_path.rpartition("/")[0]
+
+
+class TransferQueue:
+    """転送ジョブのキュー（追加・優先度変更・一時停止・キャンセルはどのスレッドからでもよい）"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None  # 未完了のジョブの保存先（Noneは保存しない）
+        self.offline = False  # 直前の転送がサーバーに接続できずに中断した
+        self.auth_failed = False  # 直前の転送が認証エラーで中断した
+        self.cond = threading.Condition()
+        self.jobs = {}  # ジョブID -> TransferJob（追加順）
+        self.ids = itertools.count(1)
+        self.seqs = itertools.count()
+        self.paused = False
+        self.inventory = None  # 画像のアップロード済み判定に使うR-Cabinet在庫キャッシュ
+        self.version = 0  # 変更ごとに増える（画面側は変化が無ければ再描画しない）
+
+    def _changed(self):
+        self.version += 1
+        self.cond.notify_all()
+
+    def unfinished_job(self, remote_path):
+        """同じ転送先の未完了（待機・転送中・検証中）のジョブ"""
+        with self.cond:
+            for job in self.jobs.values():
+                if job.remote_path == remote_path and job.state not in FINISHED_STATES:
+                    return job
+        return None
+
+    def add(self, local_path, remote_path, kind=None, priority=PRIORITY_NORMAL, depends_on=()):
+        """ジョブを追加（同じ転送先の未完了のジョブがあれば追加せずNone）"""
+        with self.cond:
+            if self.unfinished_job(remote_path) is not None:
+                return None
+            job = TransferJob(next(self.ids), local_path, remote_path, kind or file_kind(local_path),
+                              priority, depends_on)
+            job.seq = next(self.seqs)
+            self.jobs[job.id] = job
+            self._changed()
+        return job
+
+    def add_rakuten_csv(self, run_dir, priority=PRIORITY_NORMAL, log=_default_log):
+        """楽天用CSVを追加（item-cat.csvはnormal-item.csvの完了後に転送）"""
+        run_dir = Path(run_dir)
+        for local_name, _ in RAKUTEN_CSV_FILES:
+            if not (run_dir / local_name).exists():
+                log(f"{local_name} が見つかりません", "WARNING")
+        jobs = []
+        previous = None
+        for local_path, remote_name in rakuten_csv_files(run_dir):
+            remote_path = f"{RAKUTEN_CSV_DIR}/{remote_name}"
+            depends_on = [previous.id] if previous else []
+            job = self.add(local_path, remote_path, "csv", priority, depends_on)
+            if job is None:
+                # 転送待ち・転送中のものを待つ（二重に送ると楽天で2回処理される）
+                log(f"{remote_name} は転送キューにあるため追加しません", "WARNING")
+                job = self.unfinished_job(remote_path)
+            else:
+                jobs.append(job)
+            previous = job
+        return jobs
+
+    def add_images(self, folder, priority=PRIORITY_BULK, inventory=None):
+        """画像フォルダの画像を追加（inventory指定時は保存済みの一覧でアップロード済みを除く）"""
+        files = list_images(folder)
+        if inventory is not None:
+            # 転送中に追加された場合は、転送スレッドが更新中の一覧をそのまま使う
+            if self.inventory is None or self.inventory.path != inventory.path:
+                self.inventory = inventory
+            files = self.inventory.pending(files)
+        jobs = [self.add(path, f"{RAKUTEN_IMAGE_DIR}/{path.name}", "image", priority) for path in files]
+        return [job for job in jobs if job is not None]
+
+    def save(self):
+        """未完了（待機・転送中・検証中・失敗）のジョブを保存"""
+        if self.path is None:
+            return
+        with self.cond:
+            entries = [{
+                "id": job.id,
+                "local_path": str(job.local_path),
+                "remote_path": job.remote_path,
+                "kind": job.kind,
+                "priority": job.priority,
+                "depends_on": sorted(job.depends_on),
+                "paused": job.paused,
+            } for job in self.jobs.values() if job.state not in (DONE, SKIPPED, CANCELLED)]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps({"saved_at": time.time(), "jobs": entries}, ensure_ascii=False),
+                             encoding="utf-8")
+        temp_path.replace(self.path)
+
+    def load(self, log=_default_log):
+        """保存済みのジョブを待機状態で追加（ローカルに無くなったファイルは除く）。戻り値は追加したジョブ数"""
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8")).get("jobs", [])
+        except Exception as e:
+            log(f"転送キューを読み込めませんでした: {str(e)}", "WARNING")
+            return 0
+        new_ids = {}
+        restored = 0
+        for entry in sorted(entries, key=lambda entry: entry["id"]):
+            if not Path(entry["local_path"]).exists():
+                log(f"{entry['local_path']} が見つからないため転送キューから除きます", "WARNING")
+                continue
+            # 保存されていない依存先は完了済み
+            depends_on = [new_ids[job_id] for job_id in entry["depends_on"] if job_id in new_ids]
+            job = self.add(entry["local_path"], entry["remote_path"], entry["kind"], entry["priority"], depends_on)
+            if job is None:
+                # 既にキューにある
+                new_ids[entry["id"]] = self.unfinished_job(entry["remote_path"]).id
+                continue
+            job.paused = entry.get("paused", False)
+            new_ids[entry["id"]] = job.id
+            restored += 1
+        return restored
+
+    def pending(self):
+        """転送を待っているジョブ（保留中を除く）"""
+        with self.cond:
+            return [job for job in self.jobs.values() if job.state == QUEUED and not job.paused]
+
+    def retry_failed(self):
+        """失敗したジョブを待機に戻す。戻り値は戻したジョブ数"""
+        with self.cond:
+            failed = [job for job in self.jobs.values() if job.state == FAILED]
+            for job in failed:
+                job.state = QUEUED
+                job.attempts = 0
+                job.error = None
+            self._changed()
+        return len(failed)
+
+    def set_priority(self, job_id, priority):
+        with self.cond:
+            self.jobs[job_id].priority = priority
+            self._changed()
+
+    def set_job_paused(self, job_id, paused):
+        """待機中のジョブを保留・保留解除"""
+        with self.cond:
+            self.jobs[job_id].paused = paused
+            self._changed()
+
+    def cancel(self, job_id):
+        """ジョブをキャンセル（転送中のものは次の書き込みで中断）"""
+        with self.cond:
+            job = self.jobs[job_id]
+            if job.state == QUEUED:
+                job.state = CANCELLED
+            elif job.state == RUNNING:
+                job.cancel_requested = True
+            self._changed()
+
+    def cancel_all(self):
+        with self.cond:
+            for job_id, job in self.jobs.items():
+                if job.state in (QUEUED, RUNNING):
+                    self.cancel(job_id)
+            self.paused = False
+            self._changed()
+
+    def pause(self):
+        """キュー全体を一時停止（転送中のファイルは最後まで送る）"""
+        with self.cond:
+            self.paused = True
+            self._changed()
+
+    def resume(self):
+        with self.cond:
+            self.paused = False
+            self._changed()
+
+    def clear_finished(self):
+        """終了したジョブを一覧から除く"""
+        with self.cond:
+            finished = [job_id for job_id, job in self.jobs.items() if job.state in FINISHED_STATES]
+            for job_id in finished:
+                del self.jobs[job_id]
+            self._changed()
+
+    def counts(self):
+        """状態ごとのジョブ数"""
+        with self.cond:
+            result = dict.fromkeys(STATE_LABELS, 0)
+            for job in self.jobs.values():
+                result[job.state] += 1
+            return result
+
+    def ordered(self):
+        """表示順（転送中・検証中 → 待機中を転送順 → 終了）のジョブ"""
+        with self.cond:
+            order = {RUNNING: 0, VERIFYING: 1, QUEUED: 2}
+            return sorted(self.jobs.values(),
+                          key=lambda job: (order.get(job.state, 3), job.paused, job.priority, job.seq))
+
+    def _next_job(self):
+        """次に転送できるジョブ（依存先がすべて完了し、優先度が最も高いもの）"""
+        candidates = []
+        for job in self.jobs.values():
+            if job.state != QUEUED or job.paused:
+                continue
+            dependencies = [self.jobs.get(job_id) for job_id in job.depends_on]
+            if any(dep is not None and dep.state in (FAILED, CANCELLED) for dep in dependencies):
+                job.state = CANCELLED
+                job.error = "依存するファイルの転送が完了しませんでした"
+                self._changed()
+                continue
+            if all(dep is None or dep.state in (DONE, SKIPPED) for dep in dependencies):
+                candidates.append(job)
+        return min(candidates, key=lambda job: (job.priority, job.seq)) if candidates else None
+
+    def take(self):
+        """次のジョブを転送中にして返す。転送できるジョブも検証中のジョブも無ければNone"""
+        with self.cond:
+            while True:
+                if not self.paused:
+                    job = self._next_job()
+                    if job is not None:
+                        job.state = RUNNING
+                        job.attempts += 1
+                        self._changed()
+                        return job
+                # 検証中のジョブがあれば結果（再試行・依存先の完了）を待つ。一時停止中は再開を待つ
+                busy = any(job.state in (RUNNING, VERIFYING) for job in self.jobs.values())
+                waiting = self.paused and any(job.state == QUEUED and not job.paused for job in self.jobs.values())
+                if not busy and not waiting:
+                    return None
+                self.cond.wait(0.5)
+
+    def _finish(self, job, state, error=None):
+        with self.cond:
+            job.state = state
+            job.error = error
+            job.cancel_requested = False
+            self._changed()
+
+    def _retry_or_fail(self, job, error, log):
+        """再試行回数が残っていれば待機に戻す"""
+        with self.cond:
+            if job.attempts < MAX_ATTEMPTS and not job.cancel_requested:
+                log(f"{job.name}: {error}。再アップロードします", "WARNING")
+                job.state = QUEUED
+                job.error = error
+                self._changed()
+                return
+        log(f"{job.name}: {error}", "ERROR")
+        self._finish(job, FAILED, error)
+        if self.inventory is not None and job.kind == "image":
+            self.inventory.forget(job.remote_dir, job.name)
+
+    def _verify(self, pool, job, log):
+        """転送済みファイルの検証（検証用スレッドで実行）"""
+        reason = check_remote_file(pool, job.local_path, job.remote_path, log)
+        if reason:
+            self._retry_or_fail(job, reason, log)
+            return
+        if self.inventory is not None and job.kind == "image":
+            self.inventory.record_upload(job.remote_dir, job.name, job.size)
+        self._finish(job, DONE)
+
+    def run(self, host, user, password=None, profile_name=DEFAULT_PROFILE, progress=None, log=_default_log,
+            controller=None):
+        """転送できるジョブが無くなるまで優先度順に転送（転送済みファイルは別セッションで並列に検証）。
+        並列数はcontroller（ConcurrencyController）が転送速度・エラーから調整。戻り値は今回失敗したジョブのリスト"""
+        profile = get_profile(profile_name)
+        controller = controller or ConcurrencyController(host, log=log)
+        self.offline = False
+        self.auth_failed = False
+        lock = threading.Lock()
+        stopped = threading.Event()  # すべて終わった・接続できない
+        connections = {}  # 圧縮の有無 -> (sftp, transport, 検証用セッションプール)
+        state = {"inventory_refreshed": False, "last_saved": time.monotonic()}
+        started = {}
+        executor = ThreadPoolExecutor(max_workers=VERIFY_WORKERS)
+
+        def connection(compress):
+            with lock:
+                if compress not in connections:
+                    sftp, transport = connect_sftp(host, user, password, log=log, compress=compress)
+                    connections[compress] = (sftp, transport, SessionPool(transport))
+                return connections[compress]
+
+        def disconnect(compress, transport=None):
+            """接続を閉じる（transport指定時は、他のスレッドが既に接続し直していれば何もしない）"""
+            with lock:
+                if compress not in connections or (transport is not None and connections[compress][1] is not transport):
+                    return
+                sftp, transport, pool = connections.pop(compress)
+            pool.close()
+            sftp.close()
+            transport.close()
+
+        def refresh_inventory(sftp):
+            with lock:
+                if state["inventory_refreshed"]:
+                    return
+                # 一覧は差分更新（変更の無いフォルダは取り直さない）
+                with span("cabinet_inventory_refresh"):
+                    stats = self.inventory.refresh(sftp)
+                log(f"R-Cabinet一覧を更新: {stats['listed']}フォルダ取得 / {stats['reused']}フォルダ変更なし")
+                state["inventory_refreshed"] = True
+
+        def save_periodically():
+            with lock:
+                if time.monotonic() - state["last_saved"] < QUEUE_SAVE_INTERVAL_SEC:
+                    return
+                state["last_saved"] = time.monotonic()
+            # 途中で終了しても完了分を送り直さないよう定期的に保存
+            self.save()
+            if self.inventory is not None:
+                self.inventory.save()
+
+        def worker(index):
+            channels = {}  # このスレッドのSFTPセッション（転送元の接続ごと）
+            while not stopped.is_set():
+                if not controller.admit(index):
+                    stopped.wait(0.2)
+                    continue
+                save_periodically()
+                job = self.take()
+                if job is None:
+                    stopped.set()
+                    break
+                with lock:
+                    started[job.id] = job
+                compress = job.kind in profile["compress"]
+                transport = None
+                try:
+                    main_sftp, transport, pool = connection(compress)
+                    if job.kind == "image" and self.inventory is not None:
+                        refresh_inventory(main_sftp)
+                        if self.inventory.is_uploaded(job.remote_dir, job.local_path):
+                            self._finish(job, SKIPPED)
+                            if progress:
+                                progress.add_total(-job.size, -1)
+                            continue
+                    if channels.get(compress, (None, None))[1] is not transport:
+                        channels[compress] = (transport.open_sftp_client(), transport)
+                    sftp = channels[compress][0]
+                    if job.kind == "csv":
+                        job.report_baseline = list_report_names(sftp)
+                    log(f"{job.local_path.name} をアップロード中...")
+                    put_started = time.perf_counter()
+                    # CSVは楽天が取り込むと消えるため後から検証できない。転送中のハンドルでサイズを確認して完了とする
+                    put_file(sftp, job.local_path, job.remote_path, progress, profile["pipelined"],
+                             operation=f"sftp_put_{job.kind}", verify=job.kind == "csv",
+                             cancelled=lambda: job.cancel_requested)
+                    controller.record(index, job.size, time.perf_counter() - put_started)
+                except ConnectionFailed as e:
+                    # 接続できない間はジョブを待機に戻して中断（回復後に続きから転送）
+                    with self.cond:
+                        job.state = QUEUED
+                        job.attempts -= 1
+                        self.auth_failed = e.auth_failed
+                        self.offline = not e.auth_failed
+                        self._changed()
+                    if not stopped.is_set():
+                        stopped.set()
+                        log(f"SFTPサーバーに接続できないため転送を中断しました（残り {len(self.pending())}件）", "WARNING")
+                    break
+                except TransferCancelled:
+                    log(f"{job.name} の転送をキャンセルしました", "WARNING")
+                    self._finish(job, CANCELLED)
+                    continue
+                except Exception as e:
+                    controller.record_error(index, e)
+                    if is_connection_error(e):
+                        # 接続が切れている可能性があるため、次のジョブは接続し直す
+                        channels.pop(compress, None)
+                        disconnect(compress, transport)
+                    self._retry_or_fail(job, str(e), log)
+                    continue
+                if job.kind == "csv":
+                    self._finish(job, DONE)
+                    continue
+                with self.cond:
+                    job.state = VERIFYING
+                    self._changed()
+                executor.submit(self._verify, pool, job, log)
+            for channel, _ in channels.values():
+                try:
+                    channel.close()
+                except Exception:
+                    pass
+
+        log(f"並列数 {controller.limit} で転送を開始します（最大 {controller.maximum}）", "DEBUG")
+        try:
+            with timed_operation("transfer_queue", profile=profile_name) as operation:
+                threads = [threading.Thread(target=worker, args=(index,), name=f"transfer-{index}", daemon=True)
+                           for index in range(controller.maximum)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                for stats in controller.summary().values():
+                    operation.bytes += stats["bytes"]
+                    operation.files += stats["files"]
+        finally:
+            executor.shutdown(wait=True)
+            for compress in list(connections):
+                disconnect(compress)
+            self.save()
+            if self.inventory is not None:
+                self.inventory.save()
+            controller.save()
+        for index, stats in controller.summary().items():
+            log(f"転送スレッド{index + 1}: {stats['files']}件 {stats['throughput_bps'] / 1024:.0f}KB/s "
+                f"エラー {stats['errors']}件", "DEBUG")
+        return [job for job in started.values() if job.state == FAILED]
+
+
+def upload_rakuten(host, user, password, csv_dir=None, image_folder=None, profile_name=DEFAULT_PROFILE,
+                   progress=None, log=_default_log, inventory=None):
+    """CSV・画像をキューに入れて転送。
+    戻り値は {"csv": 楽天側のファイル名のリスト, "csv_baselines": {ファイル名: アップロード前のレポート名}, "image": 画像数}"""
+    transfer_queue = TransferQueue()
+    csv_jobs = transfer_queue.add_rakuten_csv(csv_dir, log=log) if csv_dir else []
+    image_jobs = transfer_queue.add_images(image_folder, inventory=inventory) if image_folder else []
+    if inventory is not None and image_folder:
+        skipped = len(list_images(image_folder)) - len(image_jobs)
+        if skipped:
+            log(f"アップロード済みの画像 {skipped}件をスキップします")
+    failed = transfer_queue.run(host, user, password, profile_name, progress, log)
+    if transfer_queue.offline or transfer_queue.auth_failed:
+        raise ConnectionFailed("すべてのパスワードで接続に失敗しました", transfer_queue.auth_failed)
+    if failed:
+        raise IOError(f"{len(failed)}件のファイルが正しくアップロードできませんでした")
+
+    results = {}
+    if csv_dir:
+        results["csv"] = [job.name for job in csv_jobs if job.state == DONE]
+        results["csv_baselines"] = {job.name: job.report_baseline for job in csv_jobs if job.state == DONE}
+    if image_folder:
+        results["image"] = sum(1 for job in image_jobs if job.state == DONE)
+    return results
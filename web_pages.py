@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebEngineページ管理 - 共有プロファイル・読み込み計測・先読み・オフスクリーンレンダリング・ライフサイクル
+"""
+
+import json
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile
+
+from app_settings import DATA_DIR
+
+# レンダラープロセスのメモリ計測（任意）
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# レンダラー（Chromium）の子プロセス名。マスタツールなど他の子プロセスは数えない
+RENDERER_PROCESS_PREFIX = "QtWebEngineProcess"
+
+# 1ページあたりのレンダラーメモリ見積もり（MB）
+PAGE_MEMORY_ESTIMATE_MB = 120
+
+# 共有プロファイル（ストアクリエイター・ページ確認・レンダリングプールで共用）
+PROFILE_NAME = "integrated_ec_tool"
+DEFAULT_PROFILE_DIR = DATA_DIR / "web_profile"
+DEFAULT_CACHE_SIZE_MB = 300
+
+_shared_profile = None
+
+# ページのライフサイクル状態（Qt 5.14以降）
+LIFECYCLE_SUPPORTED = hasattr(QWebEnginePage, "Frozen")
+
+# 価格・在庫などを取り出す抽出スクリプト（JSON文字列で返す）
+EXTRACT_SCRIPT = """
+(function() {
+    function meta(selector) {
+        var el = document.querySelector(selector);
+        if (!el) { return ''; }
+        return (el.getAttribute('content') || el.textContent || '').trim();
+    }
+    var jsonLd = [];
+    document.querySelectorAll('script[type="application/ld+json"]').forEach(function(s) {
+        jsonLd.push(s.textContent);
+    });
+    return JSON.stringify({
+        url: location.href,
+        title: meta('meta[property="og:title"]') || document.title,
+        price: meta('meta[property="product:price:amount"]') || meta('[itemprop="price"]'),
+        availability: meta('meta[property="product:availability"]') || meta('[itemprop="availability"]'),
+        json_ld: jsonLd
+    });
+})()
+"""
+
+def shared_profile(cache_size_mb=None):
+    """ディスクキャッシュと永続Cookieを持つ名前付きプロファイルを取得（初回のみ作成、cache_size_mb指定時は毎回上限を更新）"""
+    global _shared_profile
+    if _shared_profile is None:
+        storage_dir = Path(DEFAULT_PROFILE_DIR)
+        storage_dir.mkdir(parents=True, exist_ok=True)
+        # 名前付きプロファイルはoff-the-recordではなくディスクに保存される
+        profile = QWebEngineProfile(PROFILE_NAME)
+        profile.setPersistentStoragePath(str(storage_dir / "storage"))
+        profile.setCachePath(str(storage_dir / "cache"))
+        profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        profile.setHttpCacheMaximumSize(DEFAULT_CACHE_SIZE_MB * 1024 * 1024)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.ForcePersistentCookies)
+        _shared_profile = profile
+    if cache_size_mb is not None:
+        _shared_profile.setHttpCacheMaximumSize(int(cache_size_mb) * 1024 * 1024)
+    return _shared_profile
+
+
+# 転送バイト数を集計するスクリプト（Navigation/Resource Timing API）
+BYTES_SCRIPT = """
+(function() {
+    var total = 0;
+    var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    entries.forEach(function(e) { total += e.transferSize || 0; });
+    return total;
+})()
+"""
+
+
+class PageLoadRequest(QObject):
+    """1回分のページ読み込み（loadFinishedへの接続は読み込みごとに1つだけ）"""
+
+    finished = pyqtSignal(object)  # PageLoadRequest
+
+    def __init__(self, page, url, parent=None):
+        super().__init__(parent)
+        self.page = page
+        self.url = url
+        self.final_url = url
+        self.started_at = None   # ナビゲーション開始
+        self.finished_at = None  # 読み込み完了
+        self.ok = None
+        self.bytes = 0
+        self.cancelled = False
+        self._connected = False
+        self._load_started = False  # このリクエストのナビゲーションが始まったか
+
+    def start(self):
+        """読み込み開始"""
+        self.page.loadStarted.connect(self._on_load_started)
+        self.page.loadFinished.connect(self._on_load_finished)
+        self._connected = True
+        self.started_at = time.perf_counter()
+        self.page.load(QUrl(self.url))
+
+    def cancel(self):
+        """結果を受け取らずに接続を解除"""
+        self.cancelled = True
+        self._disconnect()
+
+    @property
+    def latency_ms(self):
+        """ナビゲーション開始から読み込み完了までの時間"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    def _disconnect(self):
+        if self._connected:
+            for signal, slot in ((self.page.loadStarted, self._on_load_started),
+                                 (self.page.loadFinished, self._on_load_finished)):
+                try:
+                    signal.disconnect(slot)
+                except TypeError:
+                    pass
+            self._connected = False
+
+    def _on_load_started(self):
+        self._load_started = True
+
+    def _on_load_finished(self, ok):
+        # 前の読み込み（中断・停止されたもの）の完了通知は、このリクエストの開始より前に届くため無視
+        if not self._load_started:
+            return
+        self._disconnect()
+        self.finished_at = time.perf_counter()
+        self.ok = ok
+        self.final_url = self.page.url().toString()
+        if ok:
+            self.page.runJavaScript(BYTES_SCRIPT, self._on_bytes)
+        else:
+            self.finished.emit(self)
+
+    def _on_bytes(self, value):
+        if self.cancelled:
+            return
+        try:
+            self.bytes = int(value or 0)
+        except (TypeError, ValueError):
+            self.bytes = 0
+        self.finished.emit(self)
+
+
+class PagePrefetchCache(QObject):
+    """URLを裏で読み込んでおくLRUキャッシュ（表示時はページごとビューに差し替え）"""
+
+    page_loaded = pyqtSignal(object)  # PageLoadRequest
+
+    def __init__(self, profile=None, capacity=6, page_settings=None, parent=None):
+        super().__init__(parent)
+        self.profile = profile or shared_profile()
+        self.capacity = max(1, capacity)
+        self.page_settings = page_settings or {}  # QWebEngineSettings属性 -> 値
+        self.entries = OrderedDict()  # URL -> {"page": ..., "request": 読み込み中のPageLoadRequest}
+
+    def prefetch(self, urls):
+        """URLを先読み（キャッシュ済みなら最近使用扱いにするだけ）"""
+        for url in urls:
+            if url in self.entries:
+                self.entries.move_to_end(url)
+                continue
+            page = QWebEnginePage(self.profile, self)
+            for attribute, value in self.page_settings.items():
+                page.settings().setAttribute(attribute, value)
+            request = PageLoadRequest(page, url, self)
+            request.finished.connect(self._on_loaded)
+            self.entries[url] = {"page": page, "request": request}
+            request.start()
+            self._evict()
+
+    def take(self, url):
+        """ページを取り出す（読み込み中でも可）。戻り値は (ページ, 読み込み中のリクエスト)"""
+        entry = self.entries.pop(url, None)
+        if entry is None:
+            return None, None
+        if LIFECYCLE_SUPPORTED:
+            entry["page"].setLifecycleState(QWebEnginePage.Active)
+        return entry["page"], entry["request"]
+
+    def put(self, url, page):
+        """ビューから外したページをキャッシュに戻す（このキャッシュが所有するページのみ）"""
+        if page.parent() is not self:
+            return False
+        self.entries[url] = {"page": page, "request": None}
+        self.entries.move_to_end(url)
+        if LIFECYCLE_SUPPORTED:
+            page.setLifecycleState(QWebEnginePage.Frozen)
+        self._evict()
+        return True
+
+    def release(self):
+        """先読み済み・読み込み中のページをすべて破棄（メモリ不足時）。戻り値は破棄したページ数"""
+        released = len(self.entries)
+        capacity, self.capacity = self.capacity, 0
+        self._evict()
+        self.capacity = capacity
+        return released
+
+    def _on_loaded(self, request):
+        entry = self.entries.get(request.url)
+        if entry is not None and entry["request"] is request:
+            entry["request"] = None
+            # 表示されるまでJSとタイマーを止めておく
+            if LIFECYCLE_SUPPORTED and request.ok:
+                entry["page"].setLifecycleState(QWebEnginePage.Frozen)
+        self.page_loaded.emit(request)
+        request.deleteLater()
+
+    def _evict(self):
+        """容量を超えた分を古い順に破棄"""
+        while len(self.entries) > self.capacity:
+            _, entry = self.entries.popitem(last=False)
+            if entry["request"] is not None:
+                entry["request"].cancel()
+                entry["request"].deleteLater()
+            entry["page"].deleteLater()
+
+
+class RenderPagePool(QObject):
+    """オフスクリーンQWebEnginePageのプール（JS実行後のページ内容を並列取得）"""
+
+    result_ready = pyqtSignal(str, bool, dict)  # URL, 成功, 抽出データ
+    queue_finished = pyqtSignal()
+
+    def __init__(self, size=3, profile=None, memory_budget_mb=600, timeout_ms=30000,
+                 recycle_after=20, script=EXTRACT_SCRIPT, parent=None):
+        super().__init__(parent)
+        self.profile = profile or shared_profile()
+        # メモリ予算を超えない範囲でページ数を決定
+        self.size = max(1, min(size, memory_budget_mb // PAGE_MEMORY_ESTIMATE_MB))
+        self.timeout_ms = timeout_ms
+        self.recycle_after = recycle_after  # この回数使ったページは作り直してメモリを解放
+        self.script = script
+        self.queue = deque()
+        self.idle_pages = []
+        self.busy = {}        # page -> (job_id, PageLoadRequest, timer)
+        self.use_counts = {}  # page -> 読み込み回数
+        self.next_job_id = 0
+
+    def enqueue(self, urls):
+        """URLをキューに追加して処理開始"""
+        self.queue.extend(urls)
+        self._dispatch()
+
+    def clear(self):
+        """未処理のURLを破棄"""
+        self.queue.clear()
+
+    def is_idle(self):
+        """処理中・待機中のURLがないか"""
+        return not self.queue and not self.busy
+
+    def release_idle_pages(self):
+        """待機中のページを破棄（メモリ不足時、次のURLで作り直す）。戻り値は破棄したページ数"""
+        pages, self.idle_pages = self.idle_pages, []
+        for page in pages:
+            del self.use_counts[page]
+            page.deleteLater()
+        return len(pages)
+
+    def _create_page(self):
+        """オフスクリーンページを作成"""
+        page = QWebEnginePage(self.profile, self)
+        self.use_counts[page] = 0
+        return page
+
+    def _dispatch(self):
+        """空いているページにURLを割り当て"""
+        while self.queue:
+            if self.idle_pages:
+                page = self.idle_pages.pop()
+            elif len(self.busy) < self.size:
+                page = self._create_page()
+            else:
+                break
+            url = self.queue.popleft()
+            self.next_job_id += 1
+            request = PageLoadRequest(page, url, self)
+            request.finished.connect(
+                lambda req, p=page, j=self.next_job_id: self._on_load_finished(p, j, req))
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda p=page, j=self.next_job_id: self._on_timeout(p, j))
+            self.busy[page] = (self.next_job_id, request, timer)
+            timer.start(self.timeout_ms)
+            request.start()
+
+        if self.is_idle():
+            self.queue_finished.emit()
+
+    def _on_load_finished(self, page, job_id, request):
+        """読み込み完了時に抽出スクリプトを実行"""
+        entry = self.busy.get(page)
+        if not entry or entry[0] != job_id:
+            return  # タイムアウト済み
+        if not request.ok:
+            self._finish(page, job_id, False, {})
+            return
+        page.runJavaScript(self.script, lambda value, p=page, j=job_id: self._on_extracted(p, j, value))
+
+    def _on_extracted(self, page, job_id, value):
+        """抽出結果を受け取る"""
+        try:
+            data = json.loads(value) if isinstance(value, str) else (value or {})
+        except ValueError:
+            data = {}
+        self._finish(page, job_id, True, data)
+
+    def _on_timeout(self, page, job_id):
+        """タイムアウト時は読み込みを止めて失敗扱い"""
+        entry = self.busy.get(page)
+        if not entry or entry[0] != job_id:
+            return  # 既に完了したジョブ
+        # 停止で出るloadFinished(False)を受け取らないよう、先に接続を解除する
+        entry[1].cancel()
+        page.triggerAction(QWebEnginePage.Stop)
+        # 停止した読み込みの通知が次のジョブに届かないよう、このページは再利用しない
+        self._finish(page, job_id, False, {"error": "timeout"}, reuse=False)
+
+    def _finish(self, page, job_id, ok, data, reuse=True):
+        """ジョブを完了させてページを再利用に回す"""
+        entry = self.busy.get(page)
+        if not entry or entry[0] != job_id:
+            return  # 古いジョブからの遅延コールバック
+        _, request, timer = self.busy.pop(page)
+        timer.stop()
+        timer.deleteLater()
+        request.deleteLater()
+        if request.latency_ms is not None:
+            data["load_ms"] = request.latency_ms
+            data["bytes"] = request.bytes
+        self.result_ready.emit(request.url, ok, data)
+
+        self.use_counts[page] += 1
+        if not reuse or self.use_counts[page] >= self.recycle_after:
+            del self.use_counts[page]
+            page.deleteLater()
+        else:
+            self.idle_pages.append(page)
+        self._dispatch()
+
+
+class ViewLifecycleManager(QObject):
+    """非表示のWebEngineビューを猶予時間後にフリーズし、メモリ上限超過時は古いものから破棄"""
+
+    state_changed = pyqtSignal(str, str)  # ビュー名, 状態
+
+    def __init__(self, grace_ms=30000, memory_ceiling_mb=800, check_interval_ms=15000, parent=None):
+        super().__init__(parent)
+        self.grace_ms = grace_ms
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.views = OrderedDict()  # 名前 -> ビュー（末尾ほど最近表示されたもの）
+        self.freeze_timers = {}
+        self.reclaimers = []  # 管理対象外のページ（先読み・レンダリングプール）を破棄する関数。戻り値は破棄したページ数
+        self.check_timer = QTimer(self)
+        self.check_timer.timeout.connect(self.enforce_memory_ceiling)
+        if LIFECYCLE_SUPPORTED:
+            self.check_timer.start(check_interval_ms)
+
+    def register(self, name, view):
+        """管理対象のビューを登録"""
+        self.views[name] = view
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda n=name: self._freeze(n))
+        self.freeze_timers[name] = timer
+
+    def add_reclaimer(self, reclaimer):
+        """メモリ上限超過時、ビューより先に呼ぶ破棄処理を登録"""
+        self.reclaimers.append(reclaimer)
+
+    def set_visible(self, name, visible):
+        """ビューの表示状態を通知"""
+        if not LIFECYCLE_SUPPORTED or name not in self.views:
+            return
+        timer = self.freeze_timers[name]
+        if visible:
+            timer.stop()
+            self.views.move_to_end(name)
+            self._set_state(name, QWebEnginePage.Active)
+        elif not timer.isActive() and self._state(name) == QWebEnginePage.Active:
+            timer.start(self.grace_ms)
+
+    def enforce_memory_ceiling(self):
+        """メモリ上限を超えていれば、先読み・プールのページ → 非表示ビュー（古い順）の順に破棄"""
+        used_mb = self.renderer_memory_mb()
+        if used_mb <= self.memory_ceiling_mb:
+            return
+        # 計測値には管理対象外のページも含まれるため、ユーザーが使うビューより先に裏のページを手放す
+        for reclaimer in self.reclaimers:
+            used_mb -= reclaimer() * PAGE_MEMORY_ESTIMATE_MB
+            if used_mb <= self.memory_ceiling_mb:
+                return
+        for name, view in list(self.views.items()):
+            if view.isVisible() or self._state(name) == QWebEnginePage.Discarded:
+                continue
+            self._set_state(name, QWebEnginePage.Discarded)
+            used_mb -= PAGE_MEMORY_ESTIMATE_MB
+            if used_mb <= self.memory_ceiling_mb:
+                break
+
+    def renderer_memory_mb(self):
+        """レンダラープロセスの使用メモリ（psutilが無い場合は見積もり）"""
+        if psutil is not None:
+            try:
+                total = 0
+                for child in psutil.Process().children(recursive=True):
+                    try:
+                        if child.name().startswith(RENDERER_PROCESS_PREFIX):
+                            total += child.memory_info().rss
+                    except psutil.Error:
+                        continue  # 計測中に終了したプロセス
+                return total / (1024 * 1024)
+            except psutil.Error:
+                pass
+        active = [name for name in self.views if self._state(name) != QWebEnginePage.Discarded]
+        return len(active) * PAGE_MEMORY_ESTIMATE_MB
+
+    def _freeze(self, name):
+        """猶予時間経過後もまだ非表示ならフリーズ"""
+        if self.views[name].isVisible():
+            return
+        self._set_state(name, QWebEnginePage.Frozen)
+        self.enforce_memory_ceiling()
+
+    def _state(self, name):
+        return self.views[name].page().lifecycleState()
+
+    def _set_state(self, name, state):
+        page = self.views[name].page()
+        if page.lifecycleState() == state:
+            return
+        page.setLifecycleState(state)
+        label = {QWebEnginePage.Active: "active", QWebEnginePage.Frozen: "frozen",
+                 QWebEnginePage.Discarded: "discarded"}.get(state, str(state))
+        self.state_changed.emit(name, label)
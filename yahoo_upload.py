@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストアクリエイターPro CSVアップロード自動化
+"""
+
+import json
+import re
+import time
+from collections import deque
+from pathlib import Path
+
+from PyQt5.QtCore import QEvent, QObject, QPointF, Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+from web_pages import PageLoadRequest
+
+# 店舗ID -> 表示名
+YAHOO_STORES = {
+    "taiho-kagu": "大宝家具 1号店",
+    "taiho-kagu2": "大宝家具 2号店",
+}
+
+UPLOAD_KINDS = ("item", "option")
+
+# フォームの要素（種類ごとの定義で省略した場合）
+FORM_FIELD_DEFAULTS = {
+    "file_input": "input[type=file]",
+    "submit": "input[type=submit], button[type=submit]",
+}
+
+# ItemMgrのアップロードフォーム定義（画面が変わった場合は設定ファイルの yahoo_upload_form で上書き）
+# オプションデータのフォームは未確認のため既定では無し（yahoo_upload_form.option.url を設定するまで、
+# オプションデータがある場合は自動アップロードを開始しない）
+DEFAULT_FORM_SPEC = {
+    "item": dict(FORM_FIELD_DEFAULTS, url="https://editor.store.yahoo.co.jp/RT/{store}/ItemMgr/index"),
+    "option": None,
+    "result": ".resultMessage, .result, #result, .message",
+    "success_pattern": "完了|受け付け|成功",
+    "error_pattern": "エラー|失敗|不正",
+    "timeout_sec": 180,
+}
+
+# 要素を表示範囲に入れて中心座標を返す
+LOCATE_SCRIPT = """
+(function(selector) {
+    var el = document.querySelector(selector);
+    if (!el) { return null; }
+    el.scrollIntoView({block: 'center'});
+    var r = el.getBoundingClientRect();
+    return JSON.stringify({x: r.left + r.width / 2, y: r.top + r.height / 2, w: r.width, h: r.height});
+})(%s)
+"""
+
+# ファイルが選択された状態で送信
+SUBMIT_SCRIPT = """
+(function(inputSelector, submitSelector) {
+    var input = document.querySelector(inputSelector);
+    if (!input || !input.files || input.files.length === 0) { return 'no-file'; }
+    var button = document.querySelector(submitSelector);
+    if (button) { button.click(); return 'clicked'; }
+    if (input.form) { input.form.submit(); return 'submitted'; }
+    return 'no-submit';
+})(%s, %s)
+"""
+
+# 結果表示欄のテキストを取得
+RESULT_SCRIPT = """
+(function(selector) {
+    var el = document.querySelector(selector);
+    return el ? el.textContent.trim() : '';
+})(%s)
+"""
+
+
+class YahooUploadPage(QWebEnginePage):
+    """ファイル選択ダイアログを横取りできるページ"""
+
+    def __init__(self, profile, parent=None):
+        super().__init__(profile, parent)
+        self.pending_files = None  # 次のファイル選択で返すパス
+
+    def chooseFiles(self, mode, old_files, accepted_mime_types):
+        if self.pending_files is not None:
+            files, self.pending_files = self.pending_files, None
+            return files
+        return super().chooseFiles(mode, old_files, accepted_mime_types)
+
+
+class UploadJob:
+    """1ファイル分のアップロード"""
+
+    def __init__(self, store, kind, path):
+        self.store = store
+        self.kind = kind  # "item" / "option"
+        self.path = str(path)
+        self.status = "waiting"  # waiting / running / success / error
+        self.message = ""
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def name(self):
+        return Path(self.path).name
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+def merge_form_spec(form_spec=None):
+    """既定のフォーム定義に設定を重ねる（種類ごとの定義は項目単位で上書き）"""
+    spec = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_FORM_SPEC.items()}
+    for key, value in (form_spec or {}).items():
+        if key in UPLOAD_KINDS and isinstance(value, dict):
+            spec[key] = dict(spec[key] or FORM_FIELD_DEFAULTS, **value)
+        else:
+            spec[key] = value
+    return spec
+
+
+class YahooUploadAutomation(QObject):
+    """ブラウザのアップロードフォームを操作してCSVを順番にアップロード"""
+
+    job_started = pyqtSignal(object)   # UploadJob
+    job_finished = pyqtSignal(object)  # UploadJob
+    all_finished = pyqtSignal(list)    # [UploadJob]
+
+    def __init__(self, view, form_spec=None, parent=None):
+        super().__init__(parent)
+        if not isinstance(view.page(), YahooUploadPage):
+            raise Exception("ブラウザのページがYahooUploadPageではありません")
+        self.view = view
+        self.spec = merge_form_spec(form_spec)
+        self.queue = deque()
+        self.results = []
+        self.current = None
+        self.request = None
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self._poll_result)
+        self.poll_deadline = 0
+
+    def can_upload(self, kind):
+        """その種類のアップロードフォームが設定されているか"""
+        return bool((self.spec.get(kind) or {}).get("url"))
+
+    def enqueue(self, store, kind, path):
+        """アップロードするファイルを追加"""
+        if not self.can_upload(kind):
+            raise Exception(f"{kind} のアップロードフォームが設定されていません（設定ファイルの yahoo_upload_form.{kind}）")
+        job = UploadJob(store, kind, path)
+        self.queue.append(job)
+        return job
+
+    def is_running(self):
+        return self.current is not None
+
+    def start(self):
+        """キューのジョブを順番に実行"""
+        self.results = []
+        if not self.is_running():
+            self._next_job()
+
+    def cancel(self):
+        """未実行のジョブを破棄し、実行中のジョブを中断"""
+        self.queue.clear()
+        if self.current is not None:
+            self._finish("error", "中断しました")
+
+    @property
+    def page(self):
+        return self.view.page()
+
+    def _next_job(self):
+        if not self.queue:
+            self.current = None
+            self.all_finished.emit(self.results)
+            return
+        job = self.current = self.queue.popleft()
+        job.status = "running"
+        job.started_at = time.time()
+        self.job_started.emit(job)
+
+        url = self.spec[job.kind]["url"].format(store=job.store)
+        self.request = PageLoadRequest(self.page, url, self)
+        self.request.finished.connect(self._on_form_loaded)
+        self.request.start()
+
+    def _on_form_loaded(self, request):
+        self.request = None
+        request.deleteLater()
+        if not request.ok:
+            self._finish("error", f"フォームを開けませんでした: {request.url}")
+            return
+        selector = self.spec[self.current.kind]["file_input"]
+        self.page.runJavaScript(LOCATE_SCRIPT % json.dumps(selector), self._on_file_input_located)
+
+    def _on_file_input_located(self, value):
+        if self.current is None:
+            return
+        if not value:
+            self._finish("error", "ファイル選択欄が見つかりません（ログイン状態を確認してください）")
+            return
+        rect = json.loads(value)
+
+        # ユーザー操作としてクリックし、開かれるファイル選択をchooseFilesで横取りする
+        self.page.pending_files = [self.current.path]
+        zoom = self.view.zoomFactor()
+        position = QPointF(rect["x"] * zoom, rect["y"] * zoom)
+        target = self.view.focusProxy() or self.view
+        for event_type in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+            event = QMouseEvent(event_type, position, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+            QApplication.sendEvent(target, event)
+
+        QTimer.singleShot(500, self._submit)
+
+    def _submit(self):
+        if self.current is None:
+            return
+        form = self.spec[self.current.kind]
+        script = SUBMIT_SCRIPT % (json.dumps(form["file_input"]), json.dumps(form["submit"]))
+        self.page.runJavaScript(script, self._on_submitted)
+
+    def _on_submitted(self, value):
+        if self.current is None:
+            return
+        self.page.pending_files = None
+        if value == "no-file":
+            self._finish("error", "ファイルを選択できませんでした")
+            return
+        if value == "no-submit":
+            self._finish("error", "送信ボタンが見つかりません")
+            return
+        self.poll_deadline = time.time() + self.spec["timeout_sec"]
+        self.poll_timer.start(1000)
+
+    def _poll_result(self):
+        if self.current is None:
+            self.poll_timer.stop()
+            return
+        if time.time() > self.poll_deadline:
+            self._finish("error", "結果の表示を待機中にタイムアウトしました")
+            return
+        self.page.runJavaScript(RESULT_SCRIPT % json.dumps(self.spec["result"]), self._on_result_text)
+
+    def _on_result_text(self, text):
+        if self.current is None or not self.poll_timer.isActive() or not text:
+            return
+        if re.search(self.spec["error_pattern"], text):
+            self._finish("error", text)
+        elif re.search(self.spec["success_pattern"], text):
+            self._finish("success", text)
+
+    def _finish(self, status, message):
+        self.poll_timer.stop()
+        if self.request is not None:
+            self.request.cancel()
+            self.request.deleteLater()
+            self.request = None
+        self.page.pending_files = None
+        job = self.current
+        job.status = status
+        job.message = message
+        job.finished_at = time.time()
+        self.results.append(job)
+        self.job_finished.emit(job)
+        self.current = None
+        self._next_job()
+
+
+# 動作確認用のローカル代替ページ（ItemMgrのアップロードフォームを模したもの、tests/test_yahoo_upload.py で使用）
+STANDIN_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ItemMgr stand-in</title></head>
+<body>
+<form id="upload">
+  <input type="file" id="upfile" name="upfile">
+  <input type="submit" value="アップロード">
+</form>
+<div id="result"></div>
+<script>
+document.getElementById('upload').addEventListener('submit', function(e) {
+    e.preventDefault();
+    var file = document.getElementById('upfile').files[0];
+    var result = document.getElementById('result');
+    if (!file) { result.textContent = 'エラー: ファイルが選択されていません'; return; }
+    setTimeout(function() {
+        result.textContent = 'アップロード完了: ' + file.name + ' (' + file.size + ' bytes)';
+    }, 500);
+});
+</script>
+</body></html>
+"""